@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.database import get_supabase_client
 from supabase import Client
+from app.tracing import span
 
 security = HTTPBearer()
 
@@ -17,7 +18,8 @@ async def get_current_user(
         token = credentials.credentials
         
         # Verify the token with Supabase
-        user = supabase.auth.get_user(token)
+        with span("auth"):
+            user = supabase.auth.get_user(token)
         
         if not user or not user.user:
             raise HTTPException(
@@ -59,7 +61,8 @@ async def require_admin(
     """
     Require that the current user is an admin
     """
-    role = await get_current_user_role(user, supabase)
+    with span("auth", check="role"):
+        role = await get_current_user_role(user, supabase)
     
     if role != "admin":
         raise HTTPException(
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from app.metrics import metrics
+from app.pool import ExecutorPool
+
+logger = logging.getLogger(__name__)
+
+
+def load_per_cpu() -> float:
+    """
+    One-minute load average divided by the number of CPUs (0.0 where unavailable)
+    """
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+class Autoscaler:
+    """
+    Grows and shrinks an ExecutorPool between min_size and max_size
+
+    Checked every `interval` seconds:
+
+    - Scale up as soon as jobs have queued for at least up_wait seconds,
+      by as many slots as there are queued jobs, so a burst is absorbed in
+      one step. Growth is held back while the host's load per CPU is above
+      max_load, since more processes wouldn't get more CPU.
+    - Scale down only after the pool has had no queue and utilization below
+      down_utilization for down_after seconds, retiring half the idle
+      processes at a time and waiting another down_after before the next
+      step.
+
+    The wide gap between the two conditions is the hysteresis that keeps
+    the pool from thrashing.
+    """
+
+    def __init__(
+        self,
+        pool: ExecutorPool,
+        min_size: int,
+        max_size: int,
+        interval: float = 1.0,
+        up_wait: float = 0.05,
+        down_after: float = 60.0,
+        down_utilization: float = 0.5,
+        max_load: float = 1.5,
+        load: Callable[[], float] = load_per_cpu
+    ):
+        self.pool = pool
+        self.min_size = max(1, min_size)
+        self.max_size = min(max(self.min_size, max_size), pool.max_size)
+        self.interval = interval
+        self.up_wait = up_wait
+        self.down_after = down_after
+        self.down_utilization = down_utilization
+        self.max_load = max_load
+        self.load = load
+        self.events: Deque[Dict] = deque(maxlen=20)
+        self._last_busy = time.monotonic()
+        self._stop = asyncio.Event()
+        metrics.gauge("executor_pool_size", lambda: self.pool.size)
+
+    def decide(self, now: float) -> Optional[Tuple[int, str]]:
+        """
+        The size the pool should have now and why, or None to leave it
+        """
+        pool = self.pool
+        queued = pool.waiting
+        oldest_wait = pool.scheduler.oldest_wait()
+
+        if queued and oldest_wait >= self.up_wait and pool.size < self.max_size:
+            self._last_busy = now
+            load = self.load()
+            if load > self.max_load:
+                metrics.counter("pool_scale_up_blocked").inc()
+                return None
+            return (
+                min(self.max_size, pool.size + queued),
+                f"{queued} queued, oldest waiting {oldest_wait:.2f}s, load {load:.2f}/CPU"
+            )
+
+        if queued or pool.utilization >= self.down_utilization:
+            self._last_busy = now
+            return None
+
+        if pool.size > self.min_size and now - self._last_busy >= self.down_after:
+            # Wait another down_after before shrinking further
+            self._last_busy = now
+            idle = pool.size - pool.busy
+            return (
+                max(self.min_size, pool.size - max(1, math.ceil(idle / 2))),
+                f"utilization below {self.down_utilization:.0%} for {self.down_after:.0f}s"
+            )
+
+        return None
+
+    async def step(self) -> None:
+        decision = self.decide(time.monotonic())
+        if decision is None:
+            return
+
+        size, reason = decision
+        previous = self.pool.size
+        if size == previous:
+            return
+
+        self.pool.resize(size)
+        direction = "up" if size > previous else "down"
+        metrics.counter(f"pool_scale_{direction}").inc()
+        self.events.append({"at": time.time(), "from": previous, "to": size, "reason": reason})
+        logger.info("Scaled executor pool %s from %d to %d: %s", direction, previous, size, reason)
+        if size > previous:
+            # Spawn the new processes now rather than on first use
+            await self.pool.spawn()
+
+    async def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await self.step()
+            except Exception:
+                logger.exception("Autoscaling step failed")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def status(self) -> Dict:
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "events": list(self.events)
+        }
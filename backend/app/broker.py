@@ -0,0 +1,256 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+
+class SQLiteBroker:
+    """
+    Execution job queue in a local SQLite file
+
+    Stand-in for the shared Supabase queue: API processes and workers on the
+    same host (or in tests) share jobs through one database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS execution_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'queued',
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                worker_id TEXT,
+                created_at REAL NOT NULL,
+                claimed_at REAL,
+                finished_at REAL,
+                priority INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(execution_jobs)")]
+        if "priority" not in columns:
+            conn.execute("ALTER TABLE execution_jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+        conn.execute("DROP INDEX IF EXISTS idx_execution_jobs_queued")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_execution_jobs_priority "
+            "ON execution_jobs(status, priority, created_at)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, payload: Dict, priority: int = 0) -> str:
+        """
+        Queue a job; lower priority values are claimed first
+        """
+        job_id = str(uuid.uuid4())
+        self._connection().execute(
+            "INSERT INTO execution_jobs (id, payload, created_at, priority) VALUES (?, ?, ?, ?)",
+            (job_id, json.dumps(payload), time.time(), priority)
+        )
+        return job_id
+
+    def claim(self, worker_id: str, max_priority: Optional[int] = None) -> Optional[Tuple[str, Dict]]:
+        """
+        Atomically take the oldest queued job of the highest priority
+
+        Args:
+            worker_id: Identifies the claiming worker
+            max_priority: Only consider jobs with at most this priority value
+
+        Returns:
+            Tuple of (job_id, payload), or None if the queue is empty
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, payload FROM execution_jobs WHERE status = 'queued' "
+                "AND (? IS NULL OR priority <= ?) "
+                "ORDER BY priority, created_at LIMIT 1",
+                (max_priority, max_priority)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE execution_jobs SET status = 'running', worker_id = ?, claimed_at = ? "
+                    "WHERE id = ?",
+                    (worker_id, time.time(), row[0])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if not row:
+            return None
+        return row[0], json.loads(row[1])
+
+    def complete(self, job_id: str, result: Dict) -> None:
+        self._connection().execute(
+            "UPDATE execution_jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._connection().execute(
+            "UPDATE execution_jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (error, time.time(), job_id)
+        )
+
+    def get_result(self, job_id: str) -> Optional[Dict]:
+        """
+        Returns:
+            {"status": "done", "result": ...} or {"status": "failed", "error": ...}
+            once the job has finished, otherwise None
+        """
+        row = self._connection().execute(
+            "SELECT status, result, error FROM execution_jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if not row or row[0] not in ("done", "failed"):
+            return None
+        return {
+            "status": row[0],
+            "result": json.loads(row[1]) if row[1] else None,
+            "error": row[2]
+        }
+
+    def discard(self, job_id: str) -> None:
+        """
+        Remove a job in any state; a worker running it stops at its next exists() check
+        """
+        self._connection().execute("DELETE FROM execution_jobs WHERE id = ?", (job_id,))
+
+    def exists(self, job_id: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM execution_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return row is not None
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """
+        Renew a worker's claim on a running job so requeue_stale() leaves it alone
+
+        Returns:
+            False if the worker no longer holds the job (discarded or requeued)
+        """
+        cursor = self._connection().execute(
+            "UPDATE execution_jobs SET claimed_at = ? "
+            "WHERE id = ? AND status = 'running' AND worker_id = ?",
+            (time.time(), job_id, worker_id)
+        )
+        return cursor.rowcount > 0
+
+    def requeue_stale(self, stale_after: float) -> int:
+        """
+        Put running jobs back in the queue whose claim hasn't been renewed by a
+        heartbeat for stale_after seconds (their worker died or hung)
+        """
+        cursor = self._connection().execute(
+            "UPDATE execution_jobs SET status = 'queued', worker_id = NULL, claimed_at = NULL "
+            "WHERE status = 'running' AND claimed_at < ?",
+            (time.time() - stale_after,)
+        )
+        return cursor.rowcount
+
+
+class SupabaseBroker:
+    """
+    Execution job queue in the execution_jobs table (see database/migrate_execution_jobs.sql)
+
+    Claiming goes through the claim_execution_job() function, which uses
+    FOR UPDATE SKIP LOCKED so concurrent workers never take the same job.
+    """
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def enqueue(self, payload: Dict, priority: int = 0) -> str:
+        job_id = str(uuid.uuid4())
+        self.supabase.table("execution_jobs").insert({
+            "id": job_id,
+            "payload": payload,
+            "priority": priority
+        }).execute()
+        return job_id
+
+    def claim(self, worker_id: str, max_priority: Optional[int] = None) -> Optional[Tuple[str, Dict]]:
+        result = self.supabase.rpc("claim_execution_job", {
+            "p_worker_id": worker_id,
+            "p_max_priority": max_priority
+        }).execute()
+        if not result.data:
+            return None
+        job = result.data[0]
+        return job["id"], job["payload"]
+
+    def complete(self, job_id: str, result: Dict) -> None:
+        self.supabase.table("execution_jobs").update({
+            "status": "done",
+            "result": result,
+            "finished_at": datetime.now(timezone.utc).isoformat()
+        }).eq("id", job_id).execute()
+
+    def fail(self, job_id: str, error: str) -> None:
+        self.supabase.table("execution_jobs").update({
+            "status": "failed",
+            "error": error,
+            "finished_at": datetime.now(timezone.utc).isoformat()
+        }).eq("id", job_id).execute()
+
+    def get_result(self, job_id: str) -> Optional[Dict]:
+        result = self.supabase.table("execution_jobs").select(
+            "status, result, error"
+        ).eq("id", job_id).in_("status", ["done", "failed"]).execute()
+        if not result.data:
+            return None
+        return result.data[0]
+
+    def discard(self, job_id: str) -> None:
+        self.supabase.table("execution_jobs").delete().eq("id", job_id).execute()
+
+    def exists(self, job_id: str) -> bool:
+        result = self.supabase.table("execution_jobs").select("id").eq("id", job_id).execute()
+        return bool(result.data)
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        result = self.supabase.table("execution_jobs").update({
+            "claimed_at": datetime.now(timezone.utc).isoformat()
+        }).eq("id", job_id).eq("status", "running").eq("worker_id", worker_id).execute()
+        return bool(result.data)
+
+    def requeue_stale(self, stale_after: float) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after)
+        result = self.supabase.table("execution_jobs").update({
+            "status": "queued",
+            "worker_id": None,
+            "claimed_at": None
+        }).eq("status", "running").lt("claimed_at", cutoff.isoformat()).execute()
+        return len(result.data or [])
+
+
+def get_broker(url: str):
+    """
+    Create a broker from a URL: "sqlite:///path/to/jobs.db" or "supabase"
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(url[len("sqlite:///"):])
+    if url == "supabase":
+        # Imported lazily so SQLite-backed workers don't need Supabase credentials
+        from app.database import get_supabase_client
+        return SupabaseBroker(get_supabase_client())
+    raise ValueError(f"Unsupported execution broker URL: {url}")
@@ -1,5 +1,6 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -9,11 +10,73 @@ class Settings(BaseSettings):
     secret_key: str
     frontend_url: str = "http://localhost:5173"
     port: int = 8000
+    stats_cache_ttl: int = 30
+    compression_minimum_size: int = 1024
+    execution_mode: str = "local"
+    executor_pool_size: int = 4
+    executor_pool_min_size: Optional[int] = None
+    executor_pool_max_size: Optional[int] = None
+    autoscale_interval: float = 1.0
+    autoscale_up_wait: float = 0.05
+    autoscale_down_after: float = 60.0
+    autoscale_max_load: float = 1.5
+    interactive_reserved_slots: int = 1
+    interactive_max_slots: Optional[int] = None
+    bulk_max_slots: Optional[int] = None
+    execution_broker_url: str = "sqlite:///execution_jobs.db"
+    execution_poll_interval: float = 0.05
+    execution_remote_grace: float = 30.0
+    measure_execution_cost: bool = False
+    stress_max_size: int = 1000000
+    stress_max_samples: int = 50
+    warm_up_on_startup: bool = True
+    readiness_saturation_threshold: float = 1.5
+    health_db_check_ttl: int = 5
+    latency_window_size: int = 1000
+    import_batch_size: int = 200
+    import_max_rows: int = 10000
+    import_max_line_bytes: int = 16 * 1024 * 1024
+    export_chunk_size: int = 1000
+    autosave_cache_ttl: int = 600
+    autosave_cache_size: int = 10000
+    preflight_cache_ttl: int = 3600
+    preflight_cache_size: int = 1024
+    disconnect_poll_interval: float = 0.25
+    shared_input_min_bytes: int = 65536
+    shared_input_cache_bytes: int = 268435456
+    default_time_limit: float = 5.0
+    time_limit_min: float = 0.25
+    time_limit_max: float = 30.0
+    calibration_runs: int = 5
+    calibration_multiplier: float = 3.0
+    trace_sample_rate: float = 0.01
+    trace_trust_traceparent: bool = False
+    trace_sink: str = ""
+    trace_queue_size: int = 1000
+    record_execution_timings: bool = True
+    timing_batch_size: int = 500
+    timing_flush_interval: float = 5.0
+    deploy_id: str = ""
+    cpu_quota_seconds: float = 0.0  # 0 = account usage without a limit
+    cpu_quota_period: int = 86400
+    cpu_quota_rolling: bool = False
+    cpu_usage_flush_interval: float = 10.0
+    cpu_usage_refresh_interval: float = 30.0
     
     class Config:
         env_file = ".env"
         case_sensitive = False
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+def __getattr__(name):
+    # `settings` is built on first access rather than at import, so modules
+    # like app.worker can import app.config without any environment
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -1,10 +1,28 @@
-from supabase import create_client, Client
-from app.config import settings
+from functools import lru_cache
+from supabase import Client
+from app.config import get_settings
+from app.tracing import trace_database_client
 
-# Initialize Supabase client
-supabase: Client = create_client(settings.supabase_url, settings.supabase_service_key)
 
-# For user-authenticated requests, we'll use the anon key with JWT
-def get_supabase_client() -> Client:
-    return supabase
+class TracedClient(Client):
+    """
+    Supabase client whose table queries and RPCs show up as "db" spans in traced requests
+    """
+    _traced_postgrest = None
+
+    @property
+    def postgrest(self):
+        postgrest = super().postgrest
+        # The PostgREST client is recreated after auth events, so hook each new one
+        if postgrest is not self._traced_postgrest:
+            trace_database_client(postgrest.session)
+            self._traced_postgrest = postgrest
+        return postgrest
 
+
+# The client is created on first use instead of at import, so a cold
+# container can start serving before any Supabase setup happens
+@lru_cache(maxsize=1)
+def get_supabase_client() -> Client:
+    settings = get_settings()
+    return TracedClient.create(settings.supabase_url, settings.supabase_service_key)
@@ -0,0 +1,331 @@
+import asyncio
+import logging
+import uuid
+from typing import Awaitable, Dict, List, Optional, Tuple, TypeVar
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from fastapi import HTTPException
+from app.config import get_settings
+from app.pool import ExecutorPool, current_cpu_meter
+from app.autoscale import Autoscaler
+from app.shared_inputs import SharedInputStore
+from app.broker import get_broker
+from app.grading import grade_tests, fail_fast_order, failed_test_ids
+from app.models import TestResult
+from app.metrics import metrics
+from app.scheduler import INTERACTIVE, BULK, LANES
+from app.preflight import check_code
+from app.tracing import span
+from app import quotas, timings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ExecutorPool] = None
+_autoscaler: Optional[Autoscaler] = None
+_broker = None
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(HTTPException):
+    """
+    The client went away before its run finished (logged as 499, nobody receives it)
+    """
+
+    def __init__(self):
+        super().__init__(status_code=499, detail="Client closed request")
+
+
+def get_pool() -> ExecutorPool:
+    """
+    Get the process-wide executor pool used in local execution mode
+    """
+    global _pool
+    settings = get_settings()
+    if _pool is None:
+        min_size, max_size = pool_size_bounds()
+        _pool = ExecutorPool(
+            size=min(max(settings.executor_pool_size, min_size), max_size),
+            lane_caps={INTERACTIVE: settings.interactive_max_slots, BULK: settings.bulk_max_slots},
+            lane_reserved={INTERACTIVE: settings.interactive_reserved_slots},
+            shared_inputs=SharedInputStore(settings.shared_input_min_bytes, settings.shared_input_cache_bytes),
+            max_size=max_size
+        )
+    return _pool
+
+
+def pool_size_bounds() -> Tuple[int, int]:
+    """
+    Smallest and largest size of the local pool; equal unless autoscaling is configured
+    """
+    settings = get_settings()
+    min_size = settings.executor_pool_min_size or settings.executor_pool_size
+    max_size = max(min_size, settings.executor_pool_max_size or settings.executor_pool_size)
+    return min_size, max_size
+
+
+def get_autoscaler() -> Optional[Autoscaler]:
+    """
+    Get the autoscaler of the local pool, or None if its size is fixed
+    """
+    global _autoscaler
+    settings = get_settings()
+    min_size, max_size = pool_size_bounds()
+    if _autoscaler is None and settings.execution_mode != "remote" and min_size < max_size:
+        _autoscaler = Autoscaler(
+            get_pool(),
+            min_size,
+            max_size,
+            interval=settings.autoscale_interval,
+            up_wait=settings.autoscale_up_wait,
+            down_after=settings.autoscale_down_after,
+            max_load=settings.autoscale_max_load
+        )
+    return _autoscaler
+
+
+def get_execution_broker():
+    """
+    Get the job broker used in remote execution mode
+    """
+    global _broker
+    if _broker is None:
+        _broker = get_broker(get_settings().execution_broker_url)
+    return _broker
+
+
+def shutdown() -> None:
+    global _pool, _autoscaler
+    if _autoscaler is not None:
+        _autoscaler.stop()
+        _autoscaler = None
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+    timings.shutdown()
+    quotas.shutdown()
+
+
+async def run_tests(
+    code: str,
+    test_cases: List[Dict],
+    function_signature: str = None,
+    timeout: float = None,
+    instruction_budget: int = None,
+    lane: str = INTERACTIVE,
+    fail_fast: bool = False,
+    problem_id: Optional[str] = None
+) -> List[TestResult]:
+    """
+    Run a solution against test cases, locally or on remote execution workers
+
+    Code that fails the static pre-flight check (syntax errors, missing
+    function, wrong arity, unsafe top-level calls) fails every test without
+    being dispatched. Those results are marked skipped.
+
+    With execution_mode="local" the tests run on this process's executor
+    pool. With "remote" the run is queued on the broker and picked up by an
+    app.worker process.
+
+    Args:
+        code: Python code containing the user's function
+        test_cases: Test cases with id, input_data, expected_output and
+            optionally a calibrated time_limit
+        function_signature: Function signature the code must implement
+        timeout: Maximum execution time in seconds of tests without a
+            time_limit (default settings.default_time_limit)
+        instruction_budget: Load-independent per-test budget of line events;
+            each result then also reports its cost
+        lane: Priority lane, INTERACTIVE for runs a user is waiting on and
+            BULK for re-grading and other batch work
+        fail_fast: Stop at the first failing test, running tests in
+            fail_fast_order (historically failing and cheap tests first);
+            the rest are reported as skipped
+        problem_id: Problem the tests belong to; if given, each executed
+            test's time is added to the timing history (see app.timings)
+
+    Returns:
+        List of TestResult, in test case order
+    """
+    settings = get_settings()
+    with span("preflight"):
+        error = check_code(code, function_signature)
+    if error:
+        metrics.counter("preflight_rejections").inc()
+        # Not run, so they don't count as failures of the tests (see failed_test_ids)
+        return [
+            TestResult(test_case_id=test_case["id"], passed=False, error=error, execution_time=0.0, skipped=True)
+            for test_case in test_cases
+        ]
+
+    if timeout is None:
+        timeout = settings.default_time_limit
+    order = [test_case["id"] for test_case in test_cases]
+    if fail_fast:
+        test_cases = fail_fast_order(test_cases, timeout)
+    tests = [
+        {
+            "id": test_case["id"],
+            "input_data": test_case["input_data"],
+            "expected_output": test_case["expected_output"],
+            "timeout": min(test_case.get("time_limit") or timeout, settings.time_limit_max)
+        }
+        for test_case in test_cases
+    ]
+
+    options = {
+        "function_signature": function_signature,
+        "instruction_budget": instruction_budget,
+        "measure_cost": settings.measure_execution_cost,
+        "fail_fast": fail_fast
+    }
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    if settings.execution_mode == "remote":
+        with span("remote", tests=len(tests)):
+            raw_results = await _run_remote(code, tests, options, lane)
+    else:
+        raw_results = await grade_tests(get_pool(), code, tests, lane=lane, **options)
+
+    metrics.window("run_seconds", settings.latency_window_size).observe(loop.time() - start)
+    execution_seconds = metrics.window("execution_seconds", settings.latency_window_size)
+    for result in raw_results:
+        if result.get("execution_time") is not None and not result.get("skipped"):
+            execution_seconds.observe(result["execution_time"])
+    if problem_id and settings.record_execution_timings:
+        timings.get_timing_recorder().record(problem_id, code, raw_results)
+    if fail_fast:
+        position = {test_case_id: index for index, test_case_id in enumerate(order)}
+        raw_results.sort(key=lambda result: position[result["test_case_id"]])
+
+    return [
+        TestResult(
+            test_case_id=result["test_case_id"],
+            passed=result["passed"],
+            actual_output=result.get("actual_output"),
+            actual_json=result.get("actual_json"),
+            error=result.get("error"),
+            execution_time=result.get("execution_time"),
+            cost=result.get("cost"),
+            cpu_time=result.get("cpu_time"),
+            skipped=result.get("skipped", False)
+        )
+        for result in raw_results
+    ]
+
+
+def stored_test_cases(supabase, test_cases: List[Dict]) -> Dict[str, Dict]:
+    """
+    The stored rows of client-supplied test cases, by id
+
+    POST /api/execute receives its test cases from the client, so whatever
+    the server keeps or trusts about a test (calibrated time limit, failure
+    count, problem) is only taken from the stored row, and only for test
+    cases whose input and expected output match it exactly.
+    """
+    ids = []
+    for test_case in test_cases:
+        try:
+            ids.append(str(uuid.UUID(str(test_case["id"]))))
+        except ValueError:
+            continue
+    if not ids:
+        return {}
+
+    rows = supabase.table("test_cases").select(
+        "id, problem_id, input_data, expected_output, time_limit, failure_count"
+    ).in_("id", ids).execute()
+    stored = {row["id"]: row for row in rows.data}
+    return {
+        test_case["id"]: stored[test_case["id"]]
+        for test_case in test_cases
+        if test_case["id"] in stored
+        and stored[test_case["id"]]["input_data"] == test_case["input_data"]
+        and stored[test_case["id"]]["expected_output"] == test_case["expected_output"]
+    }
+
+
+def record_test_failures(supabase, results: List[TestResult], count: int = 1) -> None:
+    """
+    Add the failed tests of a run to their failure_count, which fail_fast_order uses
+
+    Best effort: the run's verdict doesn't depend on it, so errors (e.g.
+    database/migrate_test_failure_counts.sql not applied) are only logged.
+    """
+    failed = failed_test_ids(results)
+    if not failed:
+        return
+    try:
+        supabase.rpc("record_test_failures", {"p_test_case_ids": failed, "p_count": count}).execute()
+    except Exception:
+        logger.warning("Could not record failures of %d tests", len(failed), exc_info=True)
+
+
+async def _run_remote(code: str, tests: List[Dict], options: Dict, lane: str) -> List[Dict]:
+    settings = get_settings()
+    broker = get_execution_broker()
+    job_id = await run_in_threadpool(broker.enqueue, {
+        "code": code,
+        "tests": tests,
+        "lane": lane,
+        **options
+    }, LANES.index(lane))
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + sum(test["timeout"] for test in tests) + settings.execution_remote_grace
+    job = None
+
+    try:
+        while True:
+            job = await run_in_threadpool(broker.get_result, job_id)
+            if job is not None:
+                break
+            if loop.time() > deadline:
+                raise RuntimeError("Timed out waiting for an execution worker")
+            await asyncio.sleep(settings.execution_poll_interval)
+    finally:
+        # Results are read exactly once; abandoned jobs are dropped from the queue
+        await run_in_threadpool(broker.discard, job_id)
+        meter = current_cpu_meter()
+        if meter is not None:
+            if job is not None and job["status"] == "done":
+                meter.add(sum(result.get("cpu_time") or 0.0 for result in job["result"]["results"]))
+            else:
+                # The worker's CPU time isn't reported for jobs cut short; charge the time waited
+                meter.add(loop.time() - start)
+
+    if job["status"] == "failed":
+        raise RuntimeError(f"Execution worker failed: {job['error']}")
+    return job["result"]["results"]
+
+
+async def run_until_disconnected(request: Request, run: Awaitable[T]) -> T:
+    """
+    Await a run, cancelling it as soon as the client disconnects
+
+    Cancellation reaches the executor: the test in progress has its
+    process killed (or, in remote mode, the job is discarded so the worker
+    skips the rest) and the remaining tests never start.
+
+    Raises:
+        ClientDisconnected: The client disconnected and the run was cancelled
+    """
+    task = asyncio.ensure_future(run)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=get_settings().disconnect_poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                metrics.counter("cancelled_jobs").inc()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
@@ -8,6 +8,7 @@ import re
 import ast
 from typing import Dict, Any, List, Tuple
 from contextlib import redirect_stdout, redirect_stderr
+from app import structures
 
 
 def parse_function_signature(signature: str) -> Tuple[str, List[Tuple[str, str]], str]:
@@ -73,11 +74,22 @@ def convert_type(value: Any, target_type: str) -> Any:
     
     Args:
         value: Value to convert
-        target_type: Target type as string (e.g., "int", "str", "list[int]")
+        target_type: Target type as string (e.g., "int", "str", "list[int]", "Optional[TreeNode]")
     
     Returns:
         Converted value
     """
+    # Registered structures (ListNode, TreeNode) are built from their JSON form
+    structured = structures.structured_type(target_type)
+    if structured:
+        return structures.STRUCTURED_TYPES[structured][1](value)
+    list_of = re.match(r"^(?:list|List)\[(.+)\]$", target_type.strip())
+    if list_of and structures.structured_type(list_of.group(1)):
+        if not isinstance(value, list):
+            raise ValueError(f"Expected list, got {type(value).__name__}")
+        build = structures.STRUCTURED_TYPES[structures.structured_type(list_of.group(1))][1]
+        return [build(item) for item in value]
+    
     # Direct type mappings
     if target_type == "int":
         return int(value)
@@ -102,7 +114,94 @@ def convert_type(value: Any, target_type: str) -> Any:
         return value
 
 
-def execute_code(code: str, input_data: str, expected_output: str, timeout: int = 5, function_signature: str = None) -> Dict:
+class InstructionBudgetExceeded(BaseException):
+    """
+    Raised inside user code when it runs past its instruction budget
+
+    Derives from BaseException so `except Exception` in user code can't swallow it.
+    """
+
+
+class CostMeter:
+    """
+    Count line events executed in user code, optionally against a budget
+
+    The count only depends on the code path taken, not on host load, so it
+    gives reproducible verdicts where wall-clock timing does not. Only frames
+    compiled from `filename` are traced, so library and builtin code is free.
+    Uses sys.monitoring (Python 3.12+) when available, sys.settrace otherwise;
+    before 3.12, a loop whose whole body sits on one line is counted once,
+    so such loops are still only bounded by the wall-clock timeout.
+    """
+
+    def __init__(self, filename: str, budget: int = None):
+        self.filename = filename
+        self.budget = budget
+        self.count = 0
+        self._code = None
+
+    def watch(self, code) -> None:
+        """
+        Register the compiled module so sys.monitoring can enable events on it
+        """
+        self._code = code
+
+    def _on_line(self, *args):
+        self.count += 1
+        if self.budget is not None and self.count > self.budget:
+            raise InstructionBudgetExceeded(f"Instruction budget of {self.budget} exceeded")
+
+    def _global_trace(self, frame, event, arg):
+        if frame.f_code.co_filename != self.filename:
+            return None
+        return self._local_trace
+
+    def _local_trace(self, frame, event, arg):
+        if event == "line":
+            self._on_line()
+        return self._local_trace
+
+    def _user_code_objects(self):
+        pending = [self._code]
+        while pending:
+            code = pending.pop()
+            yield code
+            pending.extend(const for const in code.co_consts if hasattr(const, "co_code"))
+
+    def __enter__(self):
+        self.count = 0
+        if hasattr(sys, "monitoring") and self._code is not None:
+            monitoring = sys.monitoring
+            monitoring.use_tool_id(monitoring.PROFILER_ID, "cost-meter")
+            monitoring.register_callback(monitoring.PROFILER_ID, monitoring.events.LINE, self._on_line)
+            for code in self._user_code_objects():
+                monitoring.set_local_events(monitoring.PROFILER_ID, code, monitoring.events.LINE)
+        else:
+            sys.settrace(self._global_trace)
+        return self
+
+    def __exit__(self, *exc_info):
+        if hasattr(sys, "monitoring") and self._code is not None:
+            monitoring = sys.monitoring
+            for code in self._user_code_objects():
+                monitoring.set_local_events(monitoring.PROFILER_ID, code, monitoring.events.NO_EVENTS)
+            monitoring.register_callback(monitoring.PROFILER_ID, monitoring.events.LINE, None)
+            monitoring.free_tool_id(monitoring.PROFILER_ID)
+        else:
+            sys.settrace(None)
+        return False
+
+
+def execute_code(
+    code: str,
+    input_data: str,
+    expected_output: str,
+    timeout: int = 5,
+    function_signature: str = None,
+    instruction_budget: int = None,
+    measure_cost: bool = False,
+    input_args: List = None
+) -> Dict:
     """
     Execute Python code by calling the user's function with parsed arguments
     
@@ -112,9 +211,13 @@ def execute_code(code: str, input_data: str, expected_output: str, timeout: int
         expected_output: JSON-encoded expected return value
         timeout: Maximum execution time in seconds
         function_signature: Function signature (e.g., "def add(a: int, b: int) -> int:")
+        instruction_budget: Maximum line events the function may execute (enables cost metering)
+        measure_cost: Report the load-independent cost without enforcing a budget
+        input_args: Arguments already decoded from input_data (e.g. read
+            from shared memory); input_data is not parsed when given
     
     Returns:
-        Dictionary with execution results
+        Dictionary with execution results (plus "cost" when metering is enabled)
     """
     start_time = time.time()
     
@@ -135,7 +238,7 @@ def execute_code(code: str, input_data: str, expected_output: str, timeout: int
         
         # Parse input arguments from JSON
         try:
-            args = json.loads(input_data)
+            args = input_args if input_args is not None else json.loads(input_data)
             if not isinstance(args, list):
                 args = [args]
         except json.JSONDecodeError as e:
@@ -169,16 +272,23 @@ def execute_code(code: str, input_data: str, expected_output: str, timeout: int
             temp_file = f.name
         
         try:
-            # Prepare namespace for execution
-            namespace = {}
+            # Prepare namespace for execution; structure classes and typing names are predefined
+            namespace = structures.namespace()
             
             # Read and compile the code
             with open(temp_file, 'r') as f:
                 user_code = f.read()
             
+            meter = None
+            if instruction_budget is not None or measure_cost:
+                meter = CostMeter(temp_file, instruction_budget)
+            
             # Execute the user's code to define the function
             try:
-                exec(user_code, namespace)
+                compiled = compile(user_code, temp_file, 'exec')
+                if meter:
+                    meter.watch(compiled)
+                exec(compiled, namespace)
             except Exception as e:
                 execution_time = time.time() - start_time
                 return {
@@ -212,10 +322,19 @@ def execute_code(code: str, input_data: str, expected_output: str, timeout: int
                             "execution_time": time.time() - start_time
                         }
                 
-                actual_output = user_func(*converted_args)
+                if meter:
+                    with meter:
+                        actual_output = user_func(*converted_args)
+                else:
+                    actual_output = user_func(*converted_args)
                 
                 execution_time = time.time() - start_time
                 
+                # Compare returned structures by their JSON form
+                return_structure = structures.structured_type(return_type)
+                if return_structure:
+                    actual_output = structures.STRUCTURED_TYPES[return_structure][2](actual_output)
+                
                 # Check for timeout
                 if execution_time > timeout:
                     return {
@@ -231,13 +350,26 @@ def execute_code(code: str, input_data: str, expected_output: str, timeout: int
                 actual_str = json.dumps(actual_output) if not isinstance(actual_output, str) else actual_output
                 expected_str = json.dumps(expected) if not isinstance(expected, str) else expected
                 
-                return {
+                result = {
                     "passed": passed,
                     "actual_output": actual_str,
                     "expected_output": expected_str,
                     "execution_time": execution_time
                 }
+                if isinstance(actual_output, str):
+                    # actual_output shows strings unquoted; keep the JSON too
+                    result["actual_json"] = json.dumps(actual_output)
+                if meter:
+                    result["cost"] = meter.count
+                return result
                 
+            except InstructionBudgetExceeded:
+                return {
+                    "passed": False,
+                    "error": f"Instruction budget exceeded ({instruction_budget} line events)",
+                    "execution_time": time.time() - start_time,
+                    "cost": meter.count
+                }
             except Exception as e:
                 execution_time = time.time() - start_time
                 return {
@@ -0,0 +1,228 @@
+"""
+Offline batch grading
+
+Grades a directory of solution files against a problem definition with
+app.executor, in parallel across all cores, without the API or Supabase:
+
+    python -m app.grade problem.json solutions/ --output results.csv
+    python -m app.grade problem.json a.py b.py --output results.jsonl
+
+The problem file holds the function signature and the test cases, in the
+same form the test case import accepts:
+
+    {
+        "function_signature": "def two_sum(nums: List[int], target: int) -> List[int]:",
+        "instruction_budget": null,
+        "test_cases": [
+            {"id": "1", "input_data": [[2, 7, 11, 15], 9], "expected_output": [0, 1], "time_limit": 0.5}
+        ]
+    }
+
+Writes one row per solution with its summary columns and per-test timing
+percentiles (JSONL rows also hold the full test results), then prints
+totals to stderr. Solutions that differ only in whitespace, comments,
+docstrings or local variable names are executed once.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.grading import grade_tests, summarize_results
+from app.importer import TestCaseValidator
+from app.metrics import percentile
+from app.normalize import normalized_hash
+from app.pool import ExecutorPool
+from app.scheduler import INTERACTIVE
+from app.shared_inputs import SharedInputStore
+
+# Per-test execution time percentiles reported for each solution
+PERCENTILES = (50, 90, 99)
+
+CSV_COLUMNS = [
+    "solution", "passed_count", "total_count", "all_passed",
+    "max_execution_time", "total_execution_time",
+    *(f"p{p}_execution_time" for p in PERCENTILES),
+    "first_error",
+]
+
+
+def load_problem(path: Path, default_timeout: float) -> Dict:
+    """
+    Read and validate a problem definition
+
+    Raises:
+        ValueError: The file is not a valid problem definition
+    """
+    with open(path) as f:
+        problem = json.load(f)
+
+    if not problem.get("function_signature"):
+        raise ValueError("Problem is missing 'function_signature'")
+    if not problem.get("test_cases"):
+        raise ValueError("Problem has no 'test_cases'")
+
+    validator = TestCaseValidator(problem["function_signature"])
+    tests = []
+    for index, record in enumerate(problem["test_cases"], start=1):
+        try:
+            input_data, expected_output = validator.validate(record)
+        except ValueError as e:
+            raise ValueError(f"Test case {index}: {str(e)}")
+        tests.append({
+            "id": str(record.get("id", index)),
+            "input_data": input_data,
+            "expected_output": expected_output,
+            "timeout": record.get("time_limit") or record.get("timeout", default_timeout)
+        })
+
+    return {
+        "function_signature": problem["function_signature"],
+        "instruction_budget": problem.get("instruction_budget"),
+        "tests": tests
+    }
+
+
+def find_solutions(paths: List[str]) -> List[Path]:
+    """
+    Expand directories to the .py files they contain, in name order
+    """
+    solutions = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            solutions.extend(sorted(path.glob("*.py")))
+        else:
+            solutions.append(path)
+    return solutions
+
+
+def solution_row(solution: str, results: List[Dict]) -> Dict:
+    summary = summarize_results(results)
+    times = [result.get("execution_time") or 0.0 for result in results]
+    errors = [result["error"] for result in results if result.get("error")]
+    return {
+        "solution": solution,
+        **summary,
+        "all_passed": summary["passed_count"] == summary["total_count"],
+        **{f"p{p}_execution_time": percentile(times, p) for p in PERCENTILES},
+        "first_error": errors[0] if errors else None,
+        "test_results": results
+    }
+
+
+async def grade_solutions(
+    problem: Dict,
+    solutions: List[Path],
+    concurrency: int,
+    on_row: Callable[[Dict], None]
+) -> Dict:
+    """
+    Grade solution files on a local ExecutorPool, calling on_row as each finishes
+
+    Returns:
+        Totals: solutions graded, distinct programs executed and per-test
+        timing percentiles over every execution
+    """
+    # Equivalent code -> solution names that share it
+    classes: Dict[str, tuple] = {}
+    for path in solutions:
+        code = path.read_text()
+        key = normalized_hash(code)
+        if key not in classes:
+            classes[key] = (code, [])
+        classes[key][1].append(str(path))
+
+    # No interactive traffic offline, so every slot is available
+    pool = ExecutorPool(size=concurrency, lane_reserved={INTERACTIVE: 0}, shared_inputs=SharedInputStore())
+    await pool.warm_up()
+    # Keep enough solutions in flight to fill the pool, so rows stream out as they finish
+    in_flight = asyncio.Semaphore(concurrency)
+    times: List[float] = []
+
+    async def grade(code: str, names: List[str]) -> None:
+        async with in_flight:
+            results = await grade_tests(
+                pool,
+                code,
+                problem["tests"],
+                function_signature=problem["function_signature"],
+                instruction_budget=problem["instruction_budget"]
+            )
+        times.extend(result.get("execution_time") or 0.0 for result in results)
+        for name in names:
+            on_row(solution_row(name, results))
+
+    try:
+        await asyncio.gather(*(grade(code, names) for code, names in classes.values()))
+    finally:
+        pool.close()
+
+    return {
+        "solutions": len(solutions),
+        "executed": len(classes),
+        **{f"p{p}_execution_time": percentile(times, p) for p in PERCENTILES}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade solution files against a problem offline")
+    parser.add_argument("problem", help="Problem definition JSON (function_signature and test_cases)")
+    parser.add_argument("solutions", nargs="+", help="Solution .py files or directories of them")
+    parser.add_argument("--output", "-o", help="Results file (.jsonl or .csv); JSONL on stdout by default")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Output format (default: from --output's extension)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Tests run in parallel (one execution process each)"
+    )
+    parser.add_argument("--timeout", type=float, default=5, help="Seconds per test for test cases without a time_limit")
+    args = parser.parse_args()
+
+    try:
+        problem = load_problem(Path(args.problem), args.timeout)
+    except (OSError, ValueError) as e:
+        parser.error(f"{args.problem}: {str(e)}")
+    solutions = find_solutions(args.solutions)
+    if not solutions:
+        parser.error("No solution files found")
+
+    output_format = args.format
+    if output_format is None:
+        output_format = "csv" if args.output and args.output.endswith(".csv") else "jsonl"
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    if output_format == "csv":
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        on_row = writer.writerow
+    else:
+        def on_row(row: Dict) -> None:
+            out.write(json.dumps(row) + "\n")
+
+    start = time.monotonic()
+    try:
+        totals = asyncio.run(grade_solutions(problem, solutions, max(1, args.concurrency), on_row))
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(
+        f"Graded {totals['solutions']} solutions ({totals['executed']} distinct) "
+        f"x {len(problem['tests'])} tests in {time.monotonic() - start:.2f}s; per-test "
+        + ", ".join(
+            f"p{p} {totals[f'p{p}_execution_time'] or 0.0:.4f}s" for p in PERCENTILES
+        ),
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
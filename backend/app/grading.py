@@ -0,0 +1,144 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.scheduler import INTERACTIVE
+from app.tracing import span
+
+
+# Error of tests skipped by fail-fast grading
+SKIPPED_ERROR = "Not run: an earlier test failed"
+
+
+class JobCancelled(Exception):
+    """
+    The job was abandoned by whoever queued it, so its remaining tests were skipped
+    """
+
+
+def summarize_results(test_results: List[Any]) -> Dict:
+    """
+    Compute the materialized summary columns stored alongside test_results
+
+    Args:
+        test_results: List of test results (dicts or TestResult models)
+
+    Returns:
+        Dictionary with passed_count, total_count, max_execution_time and total_execution_time
+    """
+    passed_count = 0
+    max_execution_time = 0.0
+    total_execution_time = 0.0
+
+    for result in test_results:
+        if not isinstance(result, dict):
+            result = result.dict()
+
+        if result.get("passed"):
+            passed_count += 1
+
+        execution_time = result.get("execution_time") or 0.0
+        total_execution_time += execution_time
+        if execution_time > max_execution_time:
+            max_execution_time = execution_time
+
+    return {
+        "passed_count": passed_count,
+        "total_count": len(test_results),
+        "max_execution_time": max_execution_time,
+        "total_execution_time": total_execution_time
+    }
+
+
+def fail_fast_order(test_cases: List[Dict], default_time_limit: float) -> List[Dict]:
+    """
+    Order test cases so a failing solution is likely rejected early
+
+    Tests that have failed often relative to how long they may run come
+    first: sorting by (failure_count + 1) / time_limit, highest first, is the
+    order that minimizes the expected time to the first failure. Ties go to
+    the test with the smaller input.
+    """
+    def priority(test_case: Dict):
+        failures = (test_case.get("failure_count") or 0) + 1
+        time_limit = test_case.get("time_limit") or default_time_limit
+        return (-failures / time_limit, len(test_case["input_data"]))
+
+    return sorted(test_cases, key=priority)
+
+
+def failed_test_ids(test_results: List[Any]) -> List[str]:
+    """
+    Ids of tests that ran and failed (skipped tests are not counted)
+    """
+    failed = []
+    for result in test_results:
+        if not isinstance(result, dict):
+            result = result.dict()
+        if not result.get("passed") and not result.get("skipped"):
+            failed.append(result["test_case_id"])
+    return failed
+
+
+async def grade_tests(
+    pool,
+    code: str,
+    tests: List[Dict],
+    function_signature: str = None,
+    instruction_budget: int = None,
+    measure_cost: bool = False,
+    lane: str = INTERACTIVE,
+    is_cancelled: Optional[Callable[[], Awaitable[bool]]] = None,
+    fail_fast: bool = False
+) -> List[Dict]:
+    """
+    Run a solution against test cases on an ExecutorPool
+
+    Args:
+        pool: ExecutorPool to run each test on
+        code: Python code containing the user's function
+        tests: Test cases with id, input_data, expected_output and timeout
+        function_signature: Function signature the code must implement
+        instruction_budget: Per-test budget of line events (see executor.CostMeter)
+        measure_cost: Report each test's cost even without a budget
+        lane: Priority lane of the pool to run in
+        is_cancelled: Checked before each test after the first; once it
+            returns True the remaining tests are skipped
+        fail_fast: Skip the remaining tests after the first failure; they
+            are reported as failed with skipped=True
+
+    Returns:
+        List of execute_code result dicts, each with its test_case_id
+
+    Raises:
+        JobCancelled: is_cancelled returned True
+    """
+    results = []
+    for test in tests:
+        if results and is_cancelled is not None and await is_cancelled():
+            raise JobCancelled(f"Cancelled after {len(results)} of {len(tests)} tests")
+        with span("test", test_case_id=test["id"]) as test_span:
+            result = await pool.run({
+                "code": code,
+                "input_data": test["input_data"],
+                "expected_output": test["expected_output"],
+                "timeout": test["timeout"],
+                "function_signature": function_signature,
+                "instruction_budget": instruction_budget,
+                "measure_cost": measure_cost
+            }, lane=lane)
+            if test_span is not None:
+                test_span.attributes["passed"] = result["passed"]
+                test_span.attributes["execution_time"] = result.get("execution_time") or 0.0
+        results.append({"test_case_id": test["id"], **result})
+        if fail_fast and not result["passed"]:
+            results.extend(
+                {
+                    "test_case_id": skipped["id"],
+                    "passed": False,
+                    "error": SKIPPED_ERROR,
+                    "execution_time": 0.0,
+                    "skipped": True
+                }
+                for skipped in tests[len(results):]
+            )
+            break
+    return results
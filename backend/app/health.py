@@ -0,0 +1,145 @@
+import logging
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+from starlette.concurrency import run_in_threadpool
+from app.config import get_settings
+from app.database import get_supabase_client
+from app.cache import TTLCache
+from app.metrics import metrics
+from app import dispatch
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def get_database_status_cache() -> TTLCache:
+    """
+    Health checks are polled often; don't ping Supabase on every one
+    """
+    return TTLCache(ttl=get_settings().health_db_check_ttl, maxsize=1)
+
+
+class WarmUpState:
+    """
+    Tracks whether startup warm-up has finished, for the readiness endpoint
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.duration: Optional[float] = None
+
+
+warm_up_state = WarmUpState()
+
+
+async def warm_up() -> None:
+    """
+    Create the Supabase client and pre-warm the execution backend
+
+    Runs in the background after startup; /ready reports not-ready until it
+    has finished.
+    """
+    start = time.monotonic()
+    try:
+        await run_in_threadpool(get_supabase_client)
+        if get_settings().execution_mode == "remote":
+            await run_in_threadpool(dispatch.get_execution_broker)
+        else:
+            await dispatch.get_pool().warm_up()
+        warm_up_state.ready = True
+    except Exception as e:
+        logger.exception("Warm-up failed")
+        warm_up_state.error = str(e)
+    finally:
+        warm_up_state.duration = time.monotonic() - start
+        logger.info("Warm-up finished in %.2fs", warm_up_state.duration)
+
+
+def executor_status() -> Dict:
+    """
+    Utilization and queue depth of this node's executor pool
+
+    saturation is (running + queued) / pool size: 1.0 means every slot is
+    busy, above 1.0 jobs are waiting for a slot.
+    """
+    if get_settings().execution_mode == "remote":
+        return {"mode": "remote"}
+
+    pool = dispatch.get_pool()
+    autoscaler = dispatch.get_autoscaler()
+    return {
+        "mode": "local",
+        "size": pool.size,
+        "autoscale": autoscaler.status() if autoscaler is not None else None,
+        "busy": pool.busy,
+        "idle": pool.idle,
+        "queued": pool.waiting,
+        "utilization": pool.utilization,
+        "saturation": (pool.busy + pool.waiting) / pool.size if pool.size else 0.0,
+        "lanes": pool.scheduler.status(),
+        "shared_inputs": {
+            "segments": len(pool.shared_inputs),
+            "bytes": pool.shared_inputs.bytes
+        } if pool.shared_inputs is not None else None
+    }
+
+
+def latency_status() -> Dict:
+    window = metrics.window("execution_seconds", get_settings().latency_window_size)
+    return {
+        "samples": len(window),
+        "p50": window.percentile(50),
+        "p95": window.percentile(95)
+    }
+
+
+async def database_status() -> Dict:
+    status = get_database_status_cache().get("database")
+    if status is not None:
+        return status
+
+    start = time.monotonic()
+    try:
+        supabase = await run_in_threadpool(get_supabase_client)
+        await run_in_threadpool(
+            lambda: supabase.table("user_roles").select("id").limit(1).execute()
+        )
+        status = {"reachable": True, "latency_ms": round((time.monotonic() - start) * 1000, 1)}
+    except Exception as e:
+        status = {"reachable": False, "error": str(e)}
+
+    get_database_status_cache().set("database", status)
+    return status
+
+
+async def health_report() -> Dict:
+    database = await database_status()
+    return {
+        "status": "healthy" if database["reachable"] else "degraded",
+        "executor": executor_status(),
+        "latency": latency_status(),
+        "database": database
+    }
+
+
+def readiness() -> Dict:
+    """
+    Ready once warm-up has finished and while the executor pool is below the
+    saturation threshold, so the load balancer stops routing to a full node
+    """
+    executor = executor_status()
+    saturated = executor.get("saturation", 0.0) > get_settings().readiness_saturation_threshold
+
+    reason = None
+    if not warm_up_state.ready:
+        reason = "warming up" if warm_up_state.error is None else f"warm-up failed: {warm_up_state.error}"
+    elif saturated:
+        reason = "executor pool saturated"
+
+    return {
+        "ready": reason is None,
+        "reason": reason,
+        "warm_up_seconds": warm_up_state.duration,
+        "executor": executor
+    }
@@ -0,0 +1,186 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.executor import parse_function_signature, convert_type
+
+# Longest line (or CSV record) accepted by default
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Optional[str]]:
+    """
+    Split a stream of byte chunks into decoded lines without buffering the whole body
+
+    Only each new chunk is searched for line breaks, and the pieces of a
+    line are joined once it ends, so a long line costs time linear in its
+    length. A line longer than max_line_bytes is skipped, and yielded as None.
+    """
+    parts: List[bytes] = []
+    size = 0
+    skipping = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            if skipping or size + end - start > max_line_bytes:
+                yield None
+            else:
+                parts.append(chunk[start:end])
+                yield b"".join(parts).decode("utf-8").rstrip("\r")
+            parts = []
+            size = 0
+            skipping = False
+            start = end + 1
+
+        if start < len(chunk) and not skipping:
+            size += len(chunk) - start
+            if size > max_line_bytes:
+                # Drop what's buffered and skip to the next line break
+                parts = []
+                skipping = True
+            else:
+                parts.append(chunk[start:])
+
+    if skipping:
+        yield None
+    elif parts:
+        yield b"".join(parts).decode("utf-8").rstrip("\r")
+
+
+async def iter_jsonl_records(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Yield (row_number, record) for each non-blank JSONL line
+
+    A line that isn't a JSON object, or is longer than max_line_bytes, is
+    yielded as {"_error": message}.
+    """
+    row = 0
+    async for line in iter_lines(chunks, max_line_bytes):
+        row += 1
+        if line is None:
+            yield row, {"_error": f"Line longer than {max_line_bytes} bytes"}
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row, {"_error": f"Invalid JSON: {str(e)}"}
+            continue
+        if not isinstance(record, dict):
+            yield row, {"_error": "Each line must be a JSON object"}
+            continue
+        yield row, record
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Yield (row_number, record) for each CSV record, keyed by the header row
+
+    Quoted fields may span lines; a record is parsed once its quotes balance.
+    A record longer than max_line_bytes is yielded as {"_error": message}.
+    """
+    # The csv module rejects fields over 128 KiB by default
+    csv.field_size_limit(max(csv.field_size_limit(), max_line_bytes))
+
+    header = None
+    record_lines: List[str] = []
+    record_size = 0
+    quotes = 0
+    too_long = False
+    row = 0
+    async for line in iter_lines(chunks, max_line_bytes):
+        if line is None:
+            # Its quotes are unknown, so the record is taken to end with it
+            too_long = True
+            quotes = 0
+        else:
+            # Counted per line, so a long multi-line record is scanned once
+            quotes += line.count('"')
+            record_size += len(line) + 1
+            if record_size > max_line_bytes:
+                too_long = True
+                record_lines = []
+            elif not too_long:
+                record_lines.append(line)
+        if quotes % 2:
+            continue
+
+        text = "\n".join(record_lines)
+        record_lines = []
+        record_size = 0
+        if too_long:
+            too_long = False
+            row += 1
+            yield row, {"_error": f"Record longer than {max_line_bytes} bytes"}
+            continue
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, {"_error": f"Expected {len(header)} columns, got {len(values)}"}
+            continue
+        yield row, dict(zip(header, values))
+
+    if record_lines or too_long:
+        yield row + 1, {"_error": "Unterminated quoted field"}
+
+
+class TestCaseValidator:
+    """
+    Check test case rows against a problem's function signature
+    """
+
+    def __init__(self, function_signature: str):
+        self.function_signature = function_signature
+        _, self.params, _ = parse_function_signature(function_signature)
+
+    def validate(self, record: Dict) -> Tuple[str, str]:
+        """
+        Validate one row and return its (input_data, expected_output) as JSON text
+
+        Raises:
+            ValueError: The row can never be executed against this signature
+        """
+        if "_error" in record:
+            raise ValueError(record["_error"])
+
+        for field in ("input_data", "expected_output"):
+            if field not in record:
+                raise ValueError(f"Missing field '{field}'")
+
+        input_data = self._json_text(record["input_data"], "input_data")
+        expected_output = self._json_text(record["expected_output"], "expected_output")
+
+        args = json.loads(input_data)
+        if not isinstance(args, list):
+            args = [args]
+        if len(args) != len(self.params):
+            raise ValueError(f"Expected {len(self.params)} arguments, got {len(args)}")
+
+        for arg, (param_name, param_type) in zip(args, self.params):
+            try:
+                convert_type(arg, param_type)
+            except Exception as e:
+                raise ValueError(f"Type conversion error for parameter '{param_name}': {str(e)}")
+
+        return input_data, expected_output
+
+    def _json_text(self, value, field: str) -> str:
+        # JSONL rows may hold the JSON value itself; strings are JSON text, as in the API
+        if not isinstance(value, str):
+            return json.dumps(value)
+        try:
+            json.loads(value)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in '{field}': {str(e)}")
+        return value
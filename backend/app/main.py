@@ -1,23 +1,70 @@
-from fastapi import FastAPI
+import asyncio
+from typing import Optional
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.config import settings
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from app.config import get_settings
+from app import dispatch, health
+from app.tracing import Exporter, TracingMiddleware, get_sink
+from app.metrics import metrics
+from app.quotas import CPU_QUOTA_HEADERS
 from app.routers import auth, problems, solutions, test_cases, execute, submissions, admin
 
-app = FastAPI(title="Code Execution Platform API")
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        settings.frontend_url,
-        "http://localhost:5173",
-        "http://localhost:3000",
-        "http://localhost:5174",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+try:
+    # Brotli is optional; without it responses are gzip-compressed only
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+app = FastAPI(title="Code Execution Platform API", default_response_class=ORJSONResponse)
+
+# Middleware is added as factories, which Starlette calls when the app
+# starts serving, so importing this module doesn't build the settings
+trace_exporter: Optional[Exporter] = None
+
+
+def cors(app):
+    return CORSMiddleware(
+        app,
+        allow_origins=[
+            get_settings().frontend_url,
+            "http://localhost:5173",
+            "http://localhost:3000",
+            "http://localhost:5174",
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "Server-Timing", *CPU_QUOTA_HEADERS],
+    )
+
+
+def compression(app):
+    # Brotli when the client accepts it, gzip otherwise
+    minimum_size = get_settings().compression_minimum_size
+    if BrotliMiddleware is not None:
+        return BrotliMiddleware(app, minimum_size=minimum_size, gzip_fallback=True)
+    return GZipMiddleware(app, minimum_size=minimum_size)
+
+
+def tracing(app):
+    global trace_exporter
+    settings = get_settings()
+    if settings.trace_sink:
+        trace_exporter = Exporter(get_sink(settings.trace_sink), settings.trace_queue_size)
+    return TracingMiddleware(
+        app,
+        sample_rate=settings.trace_sample_rate,
+        exporter=trace_exporter,
+        trust_traceparent=settings.trace_trust_traceparent
+    )
+
+
+app.add_middleware(cors)
+app.add_middleware(compression)
+# Added last so the trace covers the other middleware
+app.add_middleware(tracing)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -29,6 +76,25 @@ app.include_router(submissions.router, prefix="/api/submissions", tags=["submiss
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 
+@app.on_event("startup")
+async def startup():
+    if get_settings().warm_up_on_startup:
+        # Warm up in the background so /health answers immediately
+        app.state.warm_up_task = asyncio.create_task(health.warm_up())
+    else:
+        health.warm_up_state.ready = True
+    autoscaler = dispatch.get_autoscaler()
+    if autoscaler is not None:
+        app.state.autoscale_task = asyncio.create_task(autoscaler.run())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    dispatch.shutdown()
+    if trace_exporter is not None:
+        trace_exporter.close()
+
+
 @app.get("/")
 async def root():
     return {"message": "Code Execution Platform API"}
@@ -36,5 +102,26 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    """
+    Report executor pool utilization, queue depth, recent execution latency
+    and database connectivity
+    """
+    return await health.health_report()
+
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Report ready once startup warm-up has finished, and not-ready while the
+    executor pool is saturated
+    """
+    readiness = health.readiness()
+    if not readiness["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return {**metrics.snapshot(), "executor": health.executor_status()}
 
@@ -0,0 +1,103 @@
+import math
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional, Sequence
+
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """
+    Nearest-rank percentile (p in 0-100) of values, or None if there are none
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+class Counter:
+    """
+    Monotonically increasing count
+    """
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class LatencyWindow:
+    """
+    The most recent observations of a duration, for rolling percentiles
+    """
+
+    def __init__(self, size: int = 1000):
+        self._values = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._values.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Nearest-rank percentile (p in 0-100) of the window, or None if empty
+        """
+        with self._lock:
+            values = list(self._values)
+        return percentile(values, p)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class Registry:
+    """
+    In-process metrics, exposed as JSON by the /metrics endpoint
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {}
+        self._windows: Dict[str, LatencyWindow] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str) -> Counter:
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = Counter()
+            return self._counters[name]
+
+    def window(self, name: str, size: int = 1000) -> LatencyWindow:
+        with self._lock:
+            if name not in self._windows:
+                self._windows[name] = LatencyWindow(size)
+            return self._windows[name]
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """
+        Register a value that is read when a snapshot is taken
+        """
+        with self._lock:
+            self._gauges[name] = read
+
+    def snapshot(self) -> Dict:
+        return {
+            "counters": {name: counter.value for name, counter in self._counters.items()},
+            "gauges": {name: read() for name, read in self._gauges.items()},
+            "latencies": {
+                name: {
+                    "count": len(window),
+                    "p50": window.percentile(50),
+                    "p95": window.percentile(95),
+                    "p99": window.percentile(99)
+                }
+                for name, window in self._windows.items()
+            }
+        }
+
+
+metrics = Registry()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 
@@ -28,6 +28,7 @@ class ProblemCreate(BaseModel):
     example_input: str
     example_output: str
     function_signature: str
+    instruction_budget: Optional[int] = None
 
 
 class ProblemResponse(BaseModel):
@@ -38,6 +39,7 @@ class ProblemResponse(BaseModel):
     example_input: str
     example_output: str
     function_signature: str
+    instruction_budget: Optional[int] = None
     created_at: str
 
 
@@ -58,6 +60,25 @@ class SolutionResponse(BaseModel):
     solution_code: str
     created_at: str
     updated_at: str
+    version: Optional[str] = None
+
+
+class TextPatch(BaseModel):
+    start: int
+    end: int
+    text: str
+
+
+class SolutionAutosave(BaseModel):
+    problem_id: str
+    base_version: Optional[str] = None
+    patches: List[TextPatch]
+
+
+class SolutionAutosaveResponse(BaseModel):
+    id: str
+    version: str
+    updated_at: str
 
 
 # Test case models
@@ -77,16 +98,58 @@ class TestCaseResponse(BaseModel):
     problem_id: str
     input_data: str
     expected_output: str
+    time_limit: Optional[float] = None
+    failure_count: int = 0
     created_at: str
 
 
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
+
+class StressTestRequest(BaseModel):
+    problem_id: str
+    solution_code: str
+    size: int = 1000
+    samples: int = 5
+    keep: int = 2
+    seed: Optional[int] = None
+    int_min: int = -10**9
+    int_max: int = 10**9
+    alphabet: str = "abcdefghijklmnopqrstuvwxyz"
+
+
+class StressRun(BaseModel):
+    execution_time: Optional[float] = None
+    error: Optional[str] = None
+    timed_out: bool = False
+    input_bytes: int
+    saved: bool
+
+
+class StressTestResponse(BaseModel):
+    runs: List[StressRun]
+    created: List[TestCaseResponse]
+
+
 # Execution models
 class TestResult(BaseModel):
     test_case_id: str
     passed: bool
     actual_output: Optional[str] = None
+    actual_json: Optional[str] = None  # JSON of a string return value, which actual_output shows unquoted
     error: Optional[str] = None
     execution_time: Optional[float] = None
+    cost: Optional[int] = None
+    cpu_time: Optional[float] = None  # CPU seconds used by the execution process
+    skipped: bool = False  # Not run: fail-fast stopped at an earlier failure, or the code failed pre-flight
 
 
 class ExecuteRequest(BaseModel):
@@ -99,6 +162,39 @@ class ExecuteResponse(BaseModel):
     all_passed: bool
 
 
+class CalibrationRequest(BaseModel):
+    reference_solution: str
+    runs: Optional[int] = None  # Default: settings.calibration_runs
+    multiplier: Optional[float] = None  # Default: settings.calibration_multiplier
+
+
+class TestTimeLimit(BaseModel):
+    test_case_id: str
+    median_time: float
+    time_limit: float
+
+
+class CalibrationResponse(BaseModel):
+    problem_id: str
+    runs: int
+    multiplier: float
+    limits: List[TestTimeLimit]
+
+
+class RegradeFailure(BaseModel):
+    submission_id: str
+    error: str
+
+
+class RegradeResponse(BaseModel):
+    problem_id: str
+    regraded: int
+    executed: int  # Distinct programs run after normalization
+    dedup_ratio: float  # regraded / executed
+    all_passed: int
+    failures: List[RegradeFailure] = []  # Submissions left unchanged because their run or update failed
+
+
 # Submission models
 class SubmissionCreate(BaseModel):
     problem_id: str
@@ -124,4 +220,57 @@ class SubmissionResponse(BaseModel):
     reviewed_by: Optional[str] = None
     problem_title: Optional[str] = None
     solution_code: Optional[str] = None
+    passed_count: Optional[int] = None
+    total_count: Optional[int] = None
+    max_execution_time: Optional[float] = None
+    total_execution_time: Optional[float] = None
+
+
+
+# Admin statistics models
+class ProblemStats(BaseModel):
+    problem_id: str
+    problem_title: Optional[str] = None
+    submissions: int
+    passing: int
+    pass_rate: float
+
+
+class ExecutionTimePercentiles(BaseModel):
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    max: Optional[float] = None
+
+
+class TimingPercentiles(BaseModel):
+    executions: int = 0
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    max: Optional[float] = None
+
+
+class TestCaseTimings(TimingPercentiles):
+    test_case_id: str
+
+
+class DeployTimings(TimingPercentiles):
+    deploy_id: str
+    first_seen: str
+    last_seen: str
+
+
+class TimingReport(BaseModel):
+    problem_id: str
+    overall: TimingPercentiles
+    test_cases: List[TestCaseTimings]  # Slowest p95 first
+    deploys: List[DeployTimings]  # Most recent first
+
 
+class AdminStats(BaseModel):
+    total_submissions: int
+    status_counts: Dict[str, int]
+    problems: List[ProblemStats]
+    execution_time: ExecutionTimePercentiles
@@ -0,0 +1,166 @@
+import ast
+import hashlib
+from typing import Callable, Dict, List, Set
+
+
+class _Canonicalizer(ast.NodeTransformer):
+    """
+    Strip docstrings and rename function-local names in order of first binding
+
+    Renamed names aren't valid identifiers, so they can't collide with a
+    global the code refers to. Module-level names (including the function
+    the signature asks for), attributes and keywords are left alone, since
+    they are part of the code's behaviour, and so are parameters whose name
+    a call could bind by keyword.
+    """
+
+    def __init__(self, tree: ast.Module):
+        self.scopes: List[Dict[str, str]] = []
+        self.keep_params: Set[str] = set()
+        self.keep_all_params = False
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call):
+                for keyword in node.keywords:
+                    if keyword.arg is None:
+                        # f(**kwargs) can bind any parameter by name
+                        self.keep_all_params = True
+                    else:
+                        self.keep_params.add(keyword.arg)
+
+    def _renamed_param(self, name: str) -> bool:
+        return not self.keep_all_params and name not in self.keep_params
+
+    def _lookup(self, name: str) -> str:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return name
+
+    def _strip_docstring(self, node) -> None:
+        body = node.body
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            node.body = body[1:] or [ast.Pass()]
+
+    def visit_Module(self, node):
+        self._strip_docstring(node)
+        self.generic_visit(node)
+        return node
+
+    def visit_ClassDef(self, node):
+        self._strip_docstring(node)
+        if self.scopes:
+            node.name = self._lookup(node.name)
+        self.generic_visit(node)
+        return node
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            node.name = self._lookup(node.name)
+        self.generic_visit(node)
+        return node
+
+    def _visit_function(self, node):
+        self._strip_docstring(node)
+        # Decorators, defaults and annotations are evaluated in the enclosing scope
+        node.decorator_list = [self.visit(d) for d in node.decorator_list]
+        node.args.defaults = [self.visit(d) for d in node.args.defaults]
+        node.args.kw_defaults = [self.visit(d) if d is not None else None for d in node.args.kw_defaults]
+        if node.returns is not None:
+            node.returns = self.visit(node.returns)
+
+        if self.scopes:
+            node.name = self._lookup(node.name)
+
+        scope: Dict[str, str] = {}
+        for name in _local_names(node, self._renamed_param):
+            scope[name] = f"%{len(self.scopes)}.{len(scope)}"
+        self.scopes.append(scope)
+
+        for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs + [node.args.vararg, node.args.kwarg]:
+            if arg is not None:
+                arg.arg = self._lookup(arg.arg)
+                if arg.annotation is not None:
+                    arg.annotation = self.visit(arg.annotation)
+        node.body = [self.visit(statement) for statement in node.body]
+
+        self.scopes.pop()
+        return node
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_Lambda(self, node):
+        node.args.defaults = [self.visit(d) for d in node.args.defaults]
+        scope = {}
+        for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs + [node.args.vararg, node.args.kwarg]:
+            if arg is not None and self._renamed_param(arg.arg):
+                scope[arg.arg] = f"%{len(self.scopes)}.{len(scope)}"
+                arg.arg = scope[arg.arg]
+        self.scopes.append(scope)
+        node.body = self.visit(node.body)
+        self.scopes.pop()
+        return node
+
+    def visit_Name(self, node):
+        node.id = self._lookup(node.id)
+        return node
+
+
+def _local_names(function, renamed_param: Callable[[str], bool]) -> List[str]:
+    """
+    Names bound in a function's own scope that can be renamed, in order of first binding
+    """
+    declared_outside: Set[str] = set()
+    names: List[str] = []
+
+    def bind(name: str) -> None:
+        if name not in names:
+            names.append(name)
+
+    args = function.args
+    for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+        if arg is not None:
+            if renamed_param(arg.arg):
+                bind(arg.arg)
+            else:
+                declared_outside.add(arg.arg)
+
+    stack = list(reversed(function.body))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Global, ast.Nonlocal)):
+            declared_outside.update(node.names)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bind(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bind(node.name)
+            # Their bodies are separate scopes
+            continue
+        elif isinstance(node, ast.Lambda):
+            continue
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                bind(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bind(node.name)
+        stack.extend(reversed(list(ast.iter_child_nodes(node))))
+
+    return [name for name in names if name not in declared_outside]
+
+
+def normalized_hash(code: str) -> str:
+    """
+    Hash of code that is equal for programs differing only in whitespace,
+    comments, docstrings and the names of function-local variables
+
+    Code that doesn't parse is hashed as is.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return hashlib.blake2b(code.encode(), digest_size=16).hexdigest()
+
+    tree = _Canonicalizer(tree).visit(tree)
+    canonical = ast.dump(tree, annotate_fields=False, include_attributes=False)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
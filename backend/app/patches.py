@@ -0,0 +1,43 @@
+import hashlib
+from typing import Dict, List
+
+
+def code_version(code: str) -> str:
+    """
+    Version hash of a piece of code, matching autosave_solution() in the database
+    """
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def apply_patches(text: str, patches: List[Dict]) -> str:
+    """
+    Apply text patches made against `text`
+
+    Each patch replaces text[start:end] with its text. Offsets are in UTF-16
+    code units, as reported by the browser editor, and all refer to the
+    original text, so patches must not overlap.
+
+    Raises:
+        ValueError: A patch is out of range or overlaps another
+    """
+    # Work on UTF-16 code units so offsets agree with JavaScript strings
+    units = text.encode("utf-16-le")
+    length = len(units) // 2
+
+    result = []
+    position = 0
+    for patch in sorted(patches, key=lambda p: (p["start"], p["end"])):
+        start, end = patch["start"], patch["end"]
+        if not 0 <= start <= end <= length:
+            raise ValueError(f"Patch range {start}-{end} is outside the text (length {length})")
+        if start < position:
+            raise ValueError(f"Patch at {start} overlaps the previous patch")
+        result.append(units[position * 2:start * 2])
+        result.append(patch["text"].encode("utf-16-le"))
+        position = end
+    result.append(units[position * 2:])
+
+    try:
+        return b"".join(result).decode("utf-16-le")
+    except UnicodeDecodeError:
+        raise ValueError("Patch splits a surrogate pair")
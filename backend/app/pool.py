@@ -0,0 +1,406 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from app.executor import execute_code
+from app.scheduler import INTERACTIVE, LaneScheduler
+from app.shared_inputs import SharedInputStore, load_shared_input
+from app.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Trivial job that makes a fresh worker compile and call a user function once
+WARM_UP_JOB = {
+    "code": "def identity(x):\n    return x\n",
+    "input_data": "[1]",
+    "expected_output": "1",
+    "timeout": 5,
+    "function_signature": "def identity(x: int) -> int:"
+}
+
+# Seconds a new worker process may take to start; not counted against job timeouts
+STARTUP_TIMEOUT = 30.0
+
+
+def _worker_main(conn) -> None:
+    """
+    Entry point of an execution worker process: run jobs received on the pipe
+    """
+    # Tell the parent startup is done, so it can start the job's clock
+    conn.send("ready")
+    attached = {}
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        if job is None:
+            break
+
+        # CPU time of this process covers everything the job did, not just the function call
+        cpu_start = time.process_time()
+        try:
+            shared_input = job.pop("shared_input", None)
+            if shared_input is not None:
+                job["input_args"] = load_shared_input(*shared_input, attached)
+            result = execute_code(**job)
+        except BaseException as e:
+            # SystemExit/KeyboardInterrupt raised by user code must not kill the worker
+            result = {
+                "passed": False,
+                "error": f"Execution error: {type(e).__name__}: {str(e)}",
+                "execution_time": 0.0
+            }
+
+        result["cpu_time"] = time.process_time() - cpu_start
+        conn.send(result)
+
+
+class CpuMeter:
+    """
+    CPU seconds used by the jobs of one run, including jobs cut short
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.seconds += seconds
+
+
+_cpu_meter: ContextVar[Optional[CpuMeter]] = ContextVar("cpu_meter", default=None)
+
+
+@contextmanager
+def metering_cpu():
+    """
+    Add the CPU time of every job run in this context (and tasks started from it) to a CpuMeter
+
+    Jobs that finish report their process's CPU time. A timed-out job is
+    charged its whole timeout, and a job whose process is killed before it
+    reports (cancelled or crashed) the wall time it ran, which bounds its
+    CPU time.
+    """
+    meter = CpuMeter()
+    token = _cpu_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _cpu_meter.reset(token)
+
+
+def current_cpu_meter() -> Optional[CpuMeter]:
+    return _cpu_meter.get()
+
+
+def _get_context():
+    # Forking the API process (threads, sockets) is unsafe; forkserver forks
+    # from a clean server with the executor preloaded, and falls back to
+    # spawn where it isn't available
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["app.pool"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+class _Worker:
+    """
+    A single execution process and the parent end of its pipe
+    """
+
+    def __init__(self, ctx):
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.last_used = time.monotonic()
+        self.retired = False
+        self.started = False
+        # Whether a thread is in run(); terminate() leaves the pipe to it then
+        self._reading = False
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return not self.retired and self.process.is_alive()
+
+    def run(self, job: Dict, hard_timeout: float) -> Dict:
+        """
+        Send a job and block until its result arrives (called from a thread)
+
+        Raises:
+            TimeoutError: The job did not finish within hard_timeout seconds
+            EOFError: The worker process died or did not start
+        """
+        with self._lock:
+            if self.retired:
+                raise EOFError("Worker was terminated")
+            self._reading = True
+        try:
+            if not self.started:
+                if not self.conn.poll(STARTUP_TIMEOUT):
+                    raise EOFError(f"Worker did not start within {STARTUP_TIMEOUT} seconds")
+                self.conn.recv()
+                self.started = True
+
+            self.conn.send(job)
+            if not self.conn.poll(hard_timeout):
+                raise TimeoutError(f"Job did not finish within {hard_timeout} seconds")
+            result = self.conn.recv()
+            self.last_used = time.monotonic()
+            return result
+        finally:
+            with self._lock:
+                self._reading = False
+                terminated = self.retired
+            if terminated:
+                self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self) -> None:
+        self.retired = True
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def terminate(self) -> None:
+        """
+        Kill the process while a thread may still be reading its pipe
+
+        That thread sees EOF and closes the pipe on its way out; if no thread
+        is reading it, the pipe is closed here.
+        """
+        with self._lock:
+            self.retired = True
+            reading = self._reading
+        self.process.kill()
+        self.process.join()
+        if not reading:
+            self.conn.close()
+
+
+class ExecutorPool:
+    """
+    Pool of execution worker processes running app.executor.execute_code
+
+    Each job runs in a separate process, so a runaway solution is killed once
+    it exceeds its timeout (plus a grace period) instead of blocking the API,
+    and the process is replaced by a fresh one. Slots are shared between
+    priority lanes by a LaneScheduler (see app.scheduler). Large inputs are
+    passed through a SharedInputStore instead of the pipe. The pool can be
+    resized up to max_size while running (see app.autoscale).
+    """
+
+    def __init__(
+        self,
+        size: int,
+        kill_grace: float = 1.0,
+        lane_caps: Optional[Dict[str, Optional[int]]] = None,
+        lane_reserved: Optional[Dict[str, int]] = None,
+        shared_inputs: Optional[SharedInputStore] = None,
+        max_size: Optional[int] = None
+    ):
+        self.size = size
+        self.max_size = max(size, max_size or size)
+        self.kill_grace = kill_grace
+        self._ctx = _get_context()
+        self._idle: List[_Worker] = []
+        self._busy = 0
+        self.scheduler = LaneScheduler(size, caps=lane_caps, reserved=lane_reserved)
+        self._threads = ThreadPoolExecutor(max_workers=self.max_size, thread_name_prefix="executor-pool")
+        self.shared_inputs = shared_inputs
+        self._closed = False
+        # Processes being stopped in the background
+        self._retiring = set()
+
+    @property
+    def busy(self) -> int:
+        return self._busy
+
+    @property
+    def waiting(self) -> int:
+        return self.scheduler.waiting()
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @property
+    def utilization(self) -> float:
+        return self._busy / self.size if self.size else 1.0
+
+    def start(self) -> None:
+        """
+        Spawn all worker processes up front instead of on first use
+
+        Blocks while the processes start; call it before jobs run, or use
+        spawn() from the event loop.
+        """
+        while len(self._idle) + self._busy < self.size:
+            self._idle.append(_Worker(self._ctx))
+
+    async def spawn(self) -> None:
+        """
+        Spawn processes for every empty slot without blocking the event loop
+
+        The processes are started on a thread, but the pool's state is only
+        changed on the event loop, after checking again how many slots are
+        still empty: jobs may have taken or returned processes, or the pool
+        may have been resized, in the meantime. Surplus processes are retired.
+        """
+        missing = self.size - len(self._idle) - self._busy
+        if missing <= 0:
+            return
+
+        workers = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: [_Worker(self._ctx) for _ in range(missing)]
+        )
+        for worker in workers:
+            if not self._closed and len(self._idle) + self._busy < self.size:
+                self._idle.append(worker)
+            else:
+                self._retire(worker)
+
+    def resize(self, size: int) -> None:
+        """
+        Change the number of execution processes (between 1 and max_size)
+
+        New slots are usable at once; call spawn() to start their processes
+        ahead of use. When shrinking, idle processes are retired (least
+        recently used first) to release their memory, and busy ones are
+        retired as their jobs finish.
+        """
+        self.size = max(1, min(size, self.max_size))
+        self.scheduler.resize(self.size)
+        self._idle.sort(key=lambda worker: worker.last_used)
+        while self._idle and len(self._idle) + self._busy > self.size:
+            self._retire(self._idle.pop(0))
+
+    def _retire(self, worker: "_Worker") -> None:
+        # Joining the process may block briefly; keep it off the event loop
+        future = asyncio.get_running_loop().run_in_executor(None, worker.stop)
+        self._retiring.add(future)
+        future.add_done_callback(self._retired)
+
+    def _retired(self, future: asyncio.Future) -> None:
+        self._retiring.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("Could not stop a retired execution process", exc_info=future.exception())
+
+    async def warm_up(self) -> None:
+        """
+        Spawn every worker and run a trivial job on each, so the first real
+        request doesn't pay for process startup
+        """
+        await self.spawn()
+        await asyncio.gather(*(self.run(WARM_UP_JOB) for _ in range(self.size)))
+
+    async def run(self, job: Dict, lane: str = INTERACTIVE) -> Dict:
+        """
+        Run one execute_code job on a worker process
+
+        Args:
+            job: Keyword arguments for execute_code
+            lane: Priority lane to queue the job in (see app.scheduler)
+
+        Returns:
+            Dictionary with execution results
+        """
+        if self._closed:
+            raise RuntimeError("Executor pool is closed")
+
+        loop = asyncio.get_running_loop()
+        segment = None
+        if self.shared_inputs is not None and job.get("input_data"):
+            # Decoding happens before taking a slot, and only once per distinct input
+            segment = await loop.run_in_executor(None, self.shared_inputs.acquire, job["input_data"])
+            if segment is not None:
+                job = {**job, "input_data": None, "shared_input": (segment.name, segment.size)}
+
+        try:
+            with span("queue", lane=lane):
+                await self.scheduler.acquire(lane)
+            return await self._run_on_worker(job, lane)
+        finally:
+            if segment is not None:
+                self.shared_inputs.release(segment)
+
+    async def _run_on_worker(self, job: Dict, lane: str) -> Dict:
+        self._busy += 1
+        worker = self._idle.pop() if self._idle else _Worker(self._ctx)
+        timeout = job.get("timeout", 5)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = None
+
+        try:
+            with span("exec"):
+                result = await loop.run_in_executor(
+                    self._threads, worker.run, job, timeout + self.kill_grace
+                )
+            return result
+        except TimeoutError:
+            worker.kill()
+            result = {
+                "passed": False,
+                "error": f"Execution timed out after {timeout} seconds",
+                "execution_time": float(timeout),
+                # The process was killed before reporting; charge it the whole limit
+                "cpu_time": float(timeout)
+            }
+            return result
+        except (EOFError, OSError) as e:
+            worker.kill()
+            result = {
+                "passed": False,
+                "error": f"Execution worker crashed: {str(e) or type(e).__name__}",
+                "execution_time": 0.0,
+                "cpu_time": loop.time() - started
+            }
+            return result
+        except asyncio.CancelledError:
+            # The caller gave up on this job; don't let it keep a process busy
+            worker.terminate()
+            raise
+        finally:
+            meter = _cpu_meter.get()
+            if meter is not None:
+                if result is not None:
+                    meter.add(result.get("cpu_time") or 0.0)
+                else:
+                    # A cancelled job never reported; charge the time its process ran
+                    meter.add(loop.time() - started)
+            self._busy -= 1
+            if worker.alive and not self._closed:
+                if len(self._idle) + self._busy < self.size:
+                    self._idle.append(worker)
+                else:
+                    # The pool shrank while this job ran
+                    self._retire(worker)
+            self.scheduler.release(lane)
+
+    def close(self) -> None:
+        self._closed = True
+        for worker in self._idle:
+            worker.stop()
+        self._idle.clear()
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self.shared_inputs is not None:
+            self.shared_inputs.close()
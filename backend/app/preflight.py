@@ -0,0 +1,146 @@
+import ast
+import hashlib
+from functools import lru_cache
+from typing import Optional
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.executor import parse_function_signature
+
+@lru_cache(maxsize=1)
+def get_preflight_cache() -> TTLCache:
+    """
+    Results by hash of (code, signature); the editor re-runs unchanged code a lot
+    """
+    settings = get_settings()
+    return TTLCache(ttl=settings.preflight_cache_ttl, maxsize=settings.preflight_cache_size)
+
+# Calls that end or hijack the worker process if run while the module loads
+UNSAFE_CALLS = {
+    "exit", "quit", "input", "breakpoint",
+    "os._exit", "os.system", "os.fork", "os.kill", "os.abort", "os.execv", "os.execvp",
+    "sys.exit",
+    "subprocess.run", "subprocess.call", "subprocess.Popen",
+    "subprocess.check_call", "subprocess.check_output",
+}
+
+
+def check_code(code: str, function_signature: Optional[str]) -> Optional[str]:
+    """
+    Statically check code before it is sent to an execution process
+
+    Parses the code once (results are cached by hash) and checks that the
+    function named in the signature is defined at the top level and can be
+    called with the signature's number of arguments, and that no obviously
+    unsafe call runs at import time.
+
+    Returns:
+        An error message with line and column, or None if the code may run
+    """
+    key = hashlib.blake2b(f"{function_signature}\0{code}".encode(), digest_size=16).digest()
+    cached = get_preflight_cache().get(key)
+    if cached is not None:
+        return cached or None
+
+    error = _check(code, function_signature)
+    get_preflight_cache().set(key, error or "")
+    return error
+
+
+def _check(code: str, function_signature: Optional[str]) -> Optional[str]:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return f"Syntax error at line {e.lineno}, column {e.offset}: {e.msg}"
+
+    for node in _load_time_nodes(tree):
+        if isinstance(node, ast.Call):
+            name = _call_name(node.func)
+            if name in UNSAFE_CALLS:
+                return f"Call to {name}() at line {node.lineno}, column {node.col_offset + 1} is not allowed outside a function"
+
+    if not function_signature:
+        return None
+
+    try:
+        func_name, params, _ = parse_function_signature(function_signature)
+    except ValueError as e:
+        return str(e)
+
+    definition = None
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == func_name:
+            definition = node
+        elif _binds(node, func_name):
+            # Assigned or imported; only a def can be checked statically
+            definition = node
+
+    if definition is None:
+        return f"Function '{func_name}' not found. Please define: {function_signature}"
+
+    if isinstance(definition, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        args = definition.args
+        positional = len(args.posonlyargs) + len(args.args)
+        required = positional - len(args.defaults)
+        where = f"line {definition.lineno}, column {definition.col_offset + 1}"
+        if any(default is None for default in args.kw_defaults):
+            return f"Function '{func_name}' at {where} has keyword-only parameters without defaults"
+        if len(params) < required or (len(params) > positional and args.vararg is None):
+            return f"Function '{func_name}' at {where} takes {positional} arguments, expected {len(params)}"
+
+    return None
+
+
+def _load_time_nodes(tree: ast.Module):
+    """
+    Walk the nodes that run when the module is executed, skipping function bodies
+
+    The body of an `if __name__ == "__main__":` guard is skipped too: the code
+    is executed with __name__ resolving to "builtins", so it never runs.
+    """
+    stack = list(tree.body)
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, ast.If) and _is_main_guard(node.test):
+            stack.append(node.test)
+            stack.extend(node.orelse)
+            continue
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            # Decorators and defaults are evaluated at definition time
+            stack.extend(getattr(node, "decorator_list", []))
+            stack.extend(node.args.defaults)
+            stack.extend(default for default in node.args.kw_defaults if default is not None)
+            continue
+        stack.extend(ast.iter_child_nodes(node))
+
+
+def _is_main_guard(test) -> bool:
+    if not (isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq)):
+        return False
+    sides = [test.left, test.comparators[0]]
+    return (
+        any(isinstance(side, ast.Name) and side.id == "__name__" for side in sides)
+        and any(isinstance(side, ast.Constant) and side.value == "__main__" for side in sides)
+    )
+
+
+def _call_name(func) -> Optional[str]:
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+        return f"{func.value.id}.{func.attr}"
+    return None
+
+
+def _binds(node, name: str) -> bool:
+    if isinstance(node, ast.ClassDef):
+        return node.name == name
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return any((alias.asname or alias.name.split(".")[0]) == name for alias in node.names)
+    targets = []
+    if isinstance(node, ast.Assign):
+        targets = node.targets
+    elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+        targets = [node.target]
+    return any(isinstance(target, ast.Name) and target.id == name for target in targets)
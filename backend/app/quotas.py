@@ -0,0 +1,257 @@
+"""
+Per-user CPU-second accounting and quotas
+
+Each run's CPU seconds (measured in the execution processes) are added to
+an in-memory counter per user and time bucket, and a background thread
+flushes the counters to the cpu_usage table (database/migrate_cpu_usage.sql)
+every CPU_USAGE_FLUSH_INTERVAL seconds. A user's usage is the sum of the
+buckets in the quota window: what all API nodes have flushed (re-read from
+the database at most every CPU_USAGE_REFRESH_INTERVAL seconds) plus what
+this node hasn't flushed yet.
+
+With CPU_QUOTA_ROLLING=false the window is the current period (a UTC day by
+default); otherwise it is the last CPU_QUOTA_PERIOD seconds, tracked in 24
+buckets.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Response, status as http_status
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.database import get_supabase_client
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Buckets per period in rolling mode
+ROLLING_BUCKETS = 24
+
+CPU_QUOTA_HEADERS = ["X-CPU-Quota-Limit", "X-CPU-Quota-Used", "X-CPU-Quota-Remaining", "X-CPU-Quota-Reset"]
+
+
+class QuotaStatus:
+    __slots__ = ("limit", "used", "reset")
+
+    def __init__(self, limit: float, used: float, reset: float):
+        self.limit = limit
+        self.used = used
+        self.reset = reset  # Unix time by which usage will have dropped
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.limit - self.used)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.limit > 0 and self.used >= self.limit
+
+    def headers(self) -> Dict[str, str]:
+        values = [f"{self.limit:.3f}", f"{self.used:.3f}", f"{self.remaining:.3f}", str(int(self.reset))]
+        return dict(zip(CPU_QUOTA_HEADERS, values))
+
+
+class QuotaTracker:
+    """
+    CPU seconds used per user, counted in memory and flushed in batches
+
+    Args:
+        load: Reads a user's flushed usage: (user_id, since bucket start) -> {bucket start: seconds}
+        flush: Adds usage to the database: [{"user_id", "bucket_start", "cpu_seconds"}]
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str, float], Dict[float, float]],
+        flush: Callable[[List[Dict]], None],
+        limit: float,
+        period: float = 86400,
+        rolling: bool = False,
+        flush_interval: float = 10.0,
+        refresh_interval: float = 30.0
+    ):
+        self.load = load
+        self.write = flush
+        self.limit = limit
+        self.period = period
+        self.rolling = rolling
+        self.bucket_seconds = period / ROLLING_BUCKETS if rolling else period
+        self.refresh_interval = refresh_interval
+        self.flush_interval = flush_interval
+        # user_id -> (loaded at, {bucket start: seconds flushed by any node})
+        self._flushed: Dict[str, tuple] = {}
+        # user_id -> {bucket start: seconds not yet flushed by this node}
+        self._pending: Dict[str, Dict[float, float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cpu-usage-flush", daemon=True)
+        self._thread.start()
+
+    def _bucket(self, now: float) -> float:
+        return now // self.bucket_seconds * self.bucket_seconds
+
+    def _window_start(self, now: float) -> float:
+        current = self._bucket(now)
+        if self.rolling:
+            return current - self.bucket_seconds * (ROLLING_BUCKETS - 1)
+        return current
+
+    def status(self, user_id: str) -> QuotaStatus:
+        """
+        A user's usage in the current window (may read the database; call from a thread)
+        """
+        now = time.time()
+        start = self._window_start(now)
+        with self._lock:
+            cached = self._flushed.get(user_id)
+        if cached is None or now - cached[0] > self.refresh_interval:
+            try:
+                buckets = self.load(user_id, start)
+            except Exception:
+                # Keep serving with what's known; usage is still counted locally
+                logger.warning("Could not load CPU usage of user %s", user_id, exc_info=True)
+                buckets = cached[1] if cached is not None else {}
+            with self._lock:
+                self._flushed[user_id] = (now, buckets)
+            cached = (now, buckets)
+
+        with self._lock:
+            pending = dict(self._pending.get(user_id, {}))
+        used = sum(seconds for bucket, seconds in cached[1].items() if bucket >= start)
+        used += sum(seconds for bucket, seconds in pending.items() if bucket >= start)
+
+        # In rolling mode the oldest bucket leaves the window then
+        return QuotaStatus(self.limit, used, self._bucket(now) + self.bucket_seconds)
+
+    def charge(self, user_id: str, cpu_seconds: float) -> None:
+        if cpu_seconds <= 0:
+            return
+        bucket = self._bucket(time.time())
+        with self._lock:
+            buckets = self._pending.setdefault(user_id, {})
+            buckets[bucket] = buckets.get(bucket, 0.0) + cpu_seconds
+        metrics.counter("cpu_milliseconds_charged").inc(round(cpu_seconds * 1000))
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        rows = [
+            {
+                "user_id": user_id,
+                "bucket_start": datetime.fromtimestamp(bucket, timezone.utc).isoformat(),
+                "cpu_seconds": seconds
+            }
+            for user_id, buckets in pending.items()
+            for bucket, seconds in buckets.items()
+        ]
+        started = time.time()
+        try:
+            self.write(rows)
+            flushed = True
+        except Exception:
+            metrics.counter("cpu_usage_flush_failures").inc()
+            logger.warning("Could not flush CPU usage of %d users; retrying later", len(pending), exc_info=True)
+            flushed = False
+
+        with self._lock:
+            for user_id, buckets in pending.items():
+                if flushed:
+                    # Count it as loaded, unless a later refresh may already have read it back
+                    cached = self._flushed.get(user_id)
+                    target = cached[1] if cached is not None and cached[0] < started else None
+                else:
+                    # Retried with the next flush
+                    target = self._pending.setdefault(user_id, {})
+                if target is not None:
+                    for bucket, seconds in buckets.items():
+                        target[bucket] = target.get(bucket, 0.0) + seconds
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self.flush()
+
+
+_tracker: Optional[QuotaTracker] = None
+
+
+def get_quota_tracker() -> QuotaTracker:
+    """
+    Get the process-wide tracker, backed by Supabase
+    """
+    global _tracker
+    settings = get_settings()
+    if _tracker is None:
+        def load(user_id: str, since: float) -> Dict[float, float]:
+            result = get_supabase_client().table("cpu_usage").select("bucket_start, cpu_seconds").eq(
+                "user_id", user_id
+            ).gte("bucket_start", datetime.fromtimestamp(since, timezone.utc).isoformat()).execute()
+            return {
+                datetime.fromisoformat(row["bucket_start"]).timestamp(): row["cpu_seconds"]
+                for row in result.data
+            }
+
+        def flush(rows: List[Dict]) -> None:
+            get_supabase_client().rpc("add_cpu_usage", {"p_usage": rows}).execute()
+
+        _tracker = QuotaTracker(
+            load,
+            flush,
+            limit=settings.cpu_quota_seconds,
+            period=settings.cpu_quota_period,
+            rolling=settings.cpu_quota_rolling,
+            flush_interval=settings.cpu_usage_flush_interval,
+            refresh_interval=settings.cpu_usage_refresh_interval
+        )
+    return _tracker
+
+
+async def check_quota(user_id: str) -> QuotaStatus:
+    """
+    The user's quota before a run
+
+    Raises:
+        HTTPException: 429 with Retry-After once the quota is used up
+    """
+    tracker = get_quota_tracker()
+    if tracker.limit <= 0:
+        # Accounting only; no need to read usage back
+        return QuotaStatus(0.0, 0.0, 0.0)
+
+    quota = await run_in_threadpool(tracker.status, user_id)
+    if quota.exhausted:
+        metrics.counter("cpu_quota_rejections").inc()
+        raise HTTPException(
+            status_code=http_status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"CPU quota of {quota.limit:g} seconds used up",
+            headers={**quota.headers(), "Retry-After": str(max(1, int(quota.reset - time.time())))}
+        )
+    return quota
+
+
+def charge_run(user_id: str, quota: QuotaStatus, seconds: float, response: Response) -> None:
+    """
+    Charge a run's CPU seconds (see app.pool.metering_cpu) to the user and
+    report the quota in the response headers
+    """
+    get_quota_tracker().charge(user_id, seconds)
+    if quota.limit > 0:
+        response.headers.update(QuotaStatus(quota.limit, quota.used + seconds, quota.reset).headers())
+
+
+def shutdown() -> None:
+    global _tracker
+    if _tracker is not None:
+        _tracker.close()
+        _tracker = None
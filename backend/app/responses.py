@@ -0,0 +1,100 @@
+import hashlib
+from typing import Dict, List, Optional, Type
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# Clients may keep a copy but must revalidate it with If-None-Match every time
+CACHE_CONTROL = "private, no-cache"
+
+
+def row_version_etag(rows: List[Dict], version_field: str = "updated_at") -> str:
+    """
+    Compute a strong ETag from the id and version of each row
+
+    Versions of embedded rows (e.g. problems(...) or solutions(...) joins)
+    are included, so editing a joined row also changes the ETag.
+
+    Args:
+        rows: Rows as returned by Supabase
+        version_field: Column that changes whenever a row is written
+
+    Returns:
+        Quoted ETag value
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update(str(row.get("id")).encode())
+        digest.update(b"\0")
+        digest.update(str(row.get(version_field) or row.get("created_at")).encode())
+        for value in row.values():
+            if isinstance(value, dict):
+                digest.update(b"\0")
+                digest.update(str(value.get(version_field)).encode())
+        digest.update(b"\n")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check whether the request's If-None-Match header matches the ETag
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Compression proxies may weaken the tag, so compare the opaque part only
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Return a 304 response if the client already has this version, otherwise
+    set the validator headers on the outgoing response and return None
+    """
+    if etag_matches(request, etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        )
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
+
+
+def project_rows(rows: List[Dict], model: Type[BaseModel]) -> List[Dict]:
+    """
+    Keep only the model's fields of each row, filling in defaults of missing ones
+
+    This is the filtering response_model validation would have done, so
+    columns the model doesn't expose never reach the client.
+    """
+    fields = [
+        (name, None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items()
+    ]
+    return [{name: row.get(name, default) for name, default in fields} for row in rows]
+
+
+def trusted_response(rows: List[Dict], response: Response, model: Type[BaseModel]) -> ORJSONResponse:
+    """
+    Serialize rows that come straight from the database with orjson
+
+    Skips FastAPI's response_model re-validation, which dominates CPU for
+    long lists with nested test_results, but still projects each row onto
+    the model's fields (see project_rows). Only use this for data read from
+    Supabase; the response_model stays on the route for the API docs.
+    Headers already set on the injected response (e.g. the ETag) are kept.
+    """
+    headers = {
+        key: value for key, value in response.headers.items()
+        if key.lower() != "content-length"
+    }
+    return ORJSONResponse(
+        content=project_rows(rows, model),
+        status_code=response.status_code or 200,
+        headers=headers
+    )
@@ -1,34 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from supabase import Client
 from app.database import get_supabase_client
 from app.auth import require_admin
-from app.models import SubmissionResponse, SubmissionReview, TestCaseUpdate, ExecuteResponse
-from typing import List, Optional
+from app.models import (
+    SubmissionResponse, SubmissionReview, TestCaseUpdate, ExecuteResponse, AdminStats, RegradeResponse,
+    RegradeFailure, CalibrationRequest, CalibrationResponse, TestTimeLimit, TimingReport
+)
+from typing import Iterator, List, Optional
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import logging
+import statistics
 from datetime import datetime
-from app.executor import execute_code
-from app.models import TestResult
+from functools import lru_cache
+from app.dispatch import run_tests, run_until_disconnected, record_test_failures
+from app.scheduler import BULK
+from app.grading import summarize_results
+from app.normalize import normalized_hash
+from app.metrics import metrics
+from app.cache import TTLCache
+from app.responses import row_version_etag, conditional_response, trusted_response
+from app.config import get_settings
+import orjson
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Columns get_all_submissions can sort by, all indexed in the database
+SUBMISSION_SORT_COLUMNS = [
+    "submitted_at",
+    "passed_count",
+    "total_count",
+    "max_execution_time",
+    "total_execution_time",
+]
+
+@lru_cache(maxsize=1)
+def get_stats_cache() -> TTLCache:
+    """
+    Aggregates are shared by every admin, so one short-lived entry is enough
+    """
+    return TTLCache(ttl=get_settings().stats_cache_ttl, maxsize=1)
 
 
 @router.get("/submissions", response_model=List[SubmissionResponse])
 async def get_all_submissions(
+    request: Request,
+    response: Response,
     status_filter: Optional[str] = None,
+    all_passed: Optional[bool] = None,
+    min_passed: Optional[int] = None,
+    max_passed: Optional[int] = None,
+    min_execution_time: Optional[float] = None,
+    sort_by: str = "submitted_at",
+    descending: bool = True,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    include_code: bool = True,
     admin = Depends(require_admin),
     supabase: Client = Depends(get_supabase_client)
 ):
     """
     Get all submissions (admin only)
+
+    Filtering and sorting on the summary columns is evaluated in the database,
+    e.g. failing submissions, slowest first:
+    ?all_passed=false&sort_by=max_execution_time
+
+    Pass limit/offset to page through the results and include_code=false
+    to leave out solution_code when only the list is needed.
     """
     try:
-        query = supabase.table("submissions").select(
-            "*, problems(title, user_id), solutions(solution_code)"
-        )
+        if sort_by not in SUBMISSION_SORT_COLUMNS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"sort_by must be one of: {', '.join(SUBMISSION_SORT_COLUMNS)}"
+            )
+        
+        columns = "*, problems(title, user_id, updated_at)"
+        if include_code:
+            columns += ", solutions(solution_code, updated_at)"
+        
+        query = supabase.table("submissions").select(columns)
         
         if status_filter:
             query = query.eq("status", status_filter)
+        if all_passed is not None:
+            query = query.eq("all_passed", all_passed)
+        if min_passed is not None:
+            query = query.gte("passed_count", min_passed)
+        if max_passed is not None:
+            query = query.lte("passed_count", max_passed)
+        if min_execution_time is not None:
+            query = query.gte("max_execution_time", min_execution_time)
+        
+        query = query.order(sort_by, desc=descending)
+        if sort_by != "submitted_at":
+            query = query.order("submitted_at", desc=True)
+        if limit is not None:
+            query = query.range(offset, offset + limit - 1)
         
-        result = query.order("submitted_at", desc=True).execute()
+        result = query.execute()
+        
+        not_modified = conditional_response(request, response, row_version_etag(result.data))
+        if not_modified:
+            return not_modified
         
         # Format the response
         submissions = []
@@ -42,7 +119,9 @@ async def get_all_submissions(
             submission.pop("solutions", None)
             submissions.append(submission)
         
-        return submissions
+        return trusted_response(submissions, response, SubmissionResponse)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -50,6 +129,116 @@ async def get_all_submissions(
         )
 
 
+@router.get("/stats", response_model=AdminStats)
+async def get_stats(
+    admin = Depends(require_admin),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    Get aggregate submission statistics computed in the database (admin only)
+    """
+    try:
+        stats = get_stats_cache().get("stats")
+        if stats is None:
+            result = supabase.rpc("submission_stats", {}).execute()
+            stats = result.data
+            get_stats_cache().set("stats", stats)
+        
+        return stats
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/timings/{problem_id}", response_model=TimingReport)
+async def get_execution_timings(
+    problem_id: str,
+    since: Optional[datetime] = None,
+    admin = Depends(require_admin),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    Execution time percentiles of a problem from the timing history (admin only)
+
+    Reports p50/p95/p99 over all executions, per test case (slowest first,
+    to find tests that hog capacity) and per deploy (to spot executor
+    regressions), computed in the database.
+    """
+    try:
+        result = supabase.rpc("execution_timing_report", {
+            "p_problem_id": problem_id,
+            "p_since": since.isoformat() if since else None
+        }).execute()
+        
+        return {"problem_id": problem_id, **result.data}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def _iter_submission_export(query_builder, chunk_size: int) -> Iterator[bytes]:
+    """
+    Yield submissions as NDJSON lines, reading one keyset-paginated chunk at a time
+
+    Chunks are ordered by id and resume after the last id seen, so every
+    read is an index range scan no matter how deep into the export it is.
+    """
+    last_id = None
+    while True:
+        query = query_builder()
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(chunk_size).execute().data
+        
+        for item in rows:
+            item["problem_title"] = item["problems"]["title"] if item.get("problems") else None
+            item.pop("problems", None)
+            yield orjson.dumps(item) + b"\n"
+        
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+@router.get("/submissions/export")
+async def export_submissions(
+    problem_id: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    submitted_after: Optional[datetime] = None,
+    submitted_before: Optional[datetime] = None,
+    admin = Depends(require_admin),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    Stream submissions with their test results as NDJSON (admin only)
+
+    One JSON object per line. Rows are read from the database in chunks of
+    EXPORT_CHUNK_SIZE as the client consumes the response, so memory use
+    does not grow with the size of the export.
+    """
+    def query_builder():
+        query = supabase.table("submissions").select("*, problems(title)")
+        if problem_id:
+            query = query.eq("problem_id", problem_id)
+        if status_filter:
+            query = query.eq("status", status_filter)
+        if submitted_after:
+            query = query.gte("submitted_at", submitted_after.isoformat())
+        if submitted_before:
+            query = query.lt("submitted_at", submitted_before.isoformat())
+        return query
+    
+    return StreamingResponse(
+        _iter_submission_export(query_builder, get_settings().export_chunk_size),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="submissions.ndjson"'}
+    )
+
+
 @router.get("/submissions/{submission_id}", response_model=SubmissionResponse)
 async def get_submission_detail(
     submission_id: str,
@@ -121,6 +310,7 @@ async def review_submission(
                 detail="Submission not found"
             )
         
+        get_stats_cache().pop("stats")
         return result.data[0]
     except HTTPException:
         raise
@@ -144,7 +334,9 @@ async def update_test_case(
     try:
         update_data = {
             "input_data": test_case_update.input_data,
-            "expected_output": test_case_update.expected_output
+            "expected_output": test_case_update.expected_output,
+            # A limit calibrated on the old input no longer applies
+            "time_limit": None
         }
         
         result = supabase.table("test_cases").update(update_data).eq("id", test_case_id).execute()
@@ -168,16 +360,21 @@ async def update_test_case(
 @router.post("/rerun/{submission_id}", response_model=ExecuteResponse)
 async def rerun_submission(
     submission_id: str,
+    request: Request,
+    fail_fast: bool = False,
     admin = Depends(require_admin),
     supabase: Client = Depends(get_supabase_client)
 ):
     """
     Rerun a submission with current test cases (admin only)
+
+    With fail_fast the run stops at the first failing test, trying the
+    tests that fail most often first; the rest are reported as skipped.
     """
     try:
         # Get submission details including function signature
         submission = supabase.table("submissions").select(
-            "*, solutions(solution_code), problems(id, function_signature)"
+            "*, solutions(solution_code), problems(id, function_signature, instruction_budget)"
         ).eq("id", submission_id).execute()
         
         if not submission.data:
@@ -190,6 +387,7 @@ async def rerun_submission(
         solution_code = submission_data["solutions"]["solution_code"]
         problem_id = submission_data["problems"]["id"]
         function_signature = submission_data["problems"].get("function_signature")
+        instruction_budget = submission_data["problems"].get("instruction_budget")
         
         # Get current test cases
         test_cases = supabase.table("test_cases").select("*").eq("problem_id", problem_id).execute()
@@ -201,36 +399,26 @@ async def rerun_submission(
             )
         
         # Execute code against test cases
-        results = []
-        all_passed = True
-        
-        for test_case in test_cases.data:
-            result = execute_code(
-                code=solution_code,
-                input_data=test_case["input_data"],
-                expected_output=test_case["expected_output"],
-                timeout=5,
-                function_signature=function_signature
-            )
-            
-            test_result = TestResult(
-                test_case_id=test_case["id"],
-                passed=result["passed"],
-                actual_output=result.get("actual_output"),
-                error=result.get("error"),
-                execution_time=result.get("execution_time")
-            )
-            
-            results.append(test_result)
-            
-            if not result["passed"]:
-                all_passed = False
+        results = await run_until_disconnected(request, run_tests(
+            code=solution_code,
+            test_cases=test_cases.data,
+            function_signature=function_signature,
+            instruction_budget=instruction_budget,
+            lane=BULK,
+            fail_fast=fail_fast,
+            problem_id=problem_id
+        ))
+        
+        all_passed = all(result.passed for result in results)
         
         # Update submission with new test results
         test_results_data = [r.dict() for r in results]
         supabase.table("submissions").update({
-            "test_results": test_results_data
+            "test_results": test_results_data,
+            **summarize_results(test_results_data)
         }).eq("id", submission_id).execute()
+        await run_in_threadpool(record_test_failures, supabase, results)
+        get_stats_cache().pop("stats")
         
         return ExecuteResponse(results=results, all_passed=all_passed)
     except HTTPException:
@@ -241,3 +429,231 @@ async def rerun_submission(
             detail=f"Rerun failed: {str(e)}"
         )
 
+
+@router.post("/calibrate/{problem_id}", response_model=CalibrationResponse)
+async def calibrate_time_limits(
+    problem_id: str,
+    calibration: CalibrationRequest,
+    request: Request,
+    admin = Depends(require_admin),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    Set each test case's time limit from a reference solution (admin only)
+
+    Runs the reference solution `runs` times in the bulk lane and sets each
+    test's time_limit to `multiplier` times its median execution time,
+    clamped to settings.time_limit_min..time_limit_max. The reference
+    must pass every test.
+    """
+    settings = get_settings()
+    runs = calibration.runs or settings.calibration_runs
+    multiplier = calibration.multiplier or settings.calibration_multiplier
+    try:
+        if not 1 <= runs <= 50:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="runs must be between 1 and 50"
+            )
+        if multiplier < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="multiplier must be at least 1"
+            )
+        
+        problem = supabase.table("problems").select("function_signature, instruction_budget").eq("id", problem_id).execute()
+        
+        if not problem.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Problem not found"
+            )
+        
+        test_cases = supabase.table("test_cases").select("id, input_data, expected_output").eq("problem_id", problem_id).execute()
+        
+        if not test_cases.data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No test cases found for this problem"
+            )
+        
+        # Runs are sequential so they don't compete with each other for CPU
+        times = {test_case["id"]: [] for test_case in test_cases.data}
+        for _ in range(runs):
+            results = await run_until_disconnected(request, run_tests(
+                code=calibration.reference_solution,
+                test_cases=test_cases.data,
+                function_signature=problem.data[0].get("function_signature"),
+                timeout=settings.time_limit_max,
+                instruction_budget=problem.data[0].get("instruction_budget"),
+                lane=BULK
+            ))
+            failed = [result for result in results if not result.passed]
+            if failed:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Reference solution failed test case {failed[0].test_case_id}: "
+                           f"{failed[0].error or 'wrong answer'}"
+                )
+            for result in results:
+                times[result.test_case_id].append(result.execution_time or 0.0)
+        
+        limits = []
+        for test_case_id, test_times in times.items():
+            median_time = statistics.median(test_times)
+            time_limit = min(max(median_time * multiplier, settings.time_limit_min), settings.time_limit_max)
+            await run_in_threadpool(
+                supabase.table("test_cases").update({"time_limit": round(time_limit, 3)}).eq("id", test_case_id).execute
+            )
+            limits.append(TestTimeLimit(
+                test_case_id=test_case_id,
+                median_time=median_time,
+                time_limit=round(time_limit, 3)
+            ))
+        
+        return CalibrationResponse(problem_id=problem_id, runs=runs, multiplier=multiplier, limits=limits)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Calibration failed: {str(e)}"
+        )
+
+
+@router.post("/regrade/{problem_id}", response_model=RegradeResponse)
+async def regrade_problem(
+    problem_id: str,
+    fail_fast: bool = False,
+    admin = Depends(require_admin),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    Rerun every submission of a problem against its current test cases (admin only)
+
+    Runs in the bulk lane of the executor, so interactive runs keep their
+    reserved capacity while the re-grade is in progress. Submissions whose
+    code differs only in whitespace, comments, docstrings or local variable
+    names are executed once and the results are written to all of them.
+    With fail_fast each run stops at its first failing test.
+
+    A failed run or update doesn't stop the others; the submissions it left
+    unchanged are listed in `failures` with the error.
+    """
+    try:
+        problem = supabase.table("problems").select("function_signature, instruction_budget").eq("id", problem_id).execute()
+        
+        if not problem.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Problem not found"
+            )
+        
+        test_cases = supabase.table("test_cases").select("*").eq("problem_id", problem_id).execute()
+        
+        if not test_cases.data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No test cases found for this problem"
+            )
+        
+        submissions = supabase.table("submissions").select(
+            "id, solutions(solution_code)"
+        ).eq("problem_id", problem_id).execute()
+        
+        # Equivalent code -> ids of the submissions that share it
+        classes = {}
+        for submission in submissions.data:
+            if not submission.get("solutions"):
+                continue
+            code = submission["solutions"]["solution_code"]
+            key = normalized_hash(code)
+            if key not in classes:
+                classes[key] = (code, [])
+            classes[key][1].append(submission["id"])
+        
+        # Keep enough classes in flight to fill the bulk lane, no more
+        in_flight = asyncio.Semaphore(get_settings().executor_pool_size)
+        
+        failures: List[RegradeFailure] = []
+        
+        async def regrade(code: str, submission_ids: List[str]) -> int:
+            """
+            Run one class and write its results; returns how many submissions now pass
+            """
+            try:
+                async with in_flight:
+                    results = await run_tests(
+                        code=code,
+                        test_cases=test_cases.data,
+                        function_signature=problem.data[0].get("function_signature"),
+                        instruction_budget=problem.data[0].get("instruction_budget"),
+                        lane=BULK,
+                        fail_fast=fail_fast,
+                        problem_id=problem_id
+                    )
+            except Exception as e:
+                failures.extend(
+                    RegradeFailure(submission_id=submission_id, error=f"Run failed: {str(e)}")
+                    for submission_id in submission_ids
+                )
+                return 0
+            
+            test_results_data = [r.dict() for r in results]
+            update = {"test_results": test_results_data, **summarize_results(test_results_data)}
+            updated = 0
+            # Ids go in the query string, so large classes are updated in batches
+            for start in range(0, len(submission_ids), 100):
+                batch = submission_ids[start:start + 100]
+                try:
+                    await run_in_threadpool(
+                        supabase.table("submissions").update(update).in_("id", batch).execute
+                    )
+                    updated += len(batch)
+                except Exception as e:
+                    failures.extend(
+                        RegradeFailure(submission_id=submission_id, error=f"Update failed: {str(e)}")
+                        for submission_id in batch
+                    )
+            if updated:
+                try:
+                    await run_in_threadpool(record_test_failures, supabase, results, updated)
+                except Exception:
+                    # The submissions are already regraded; only the failure counts are behind
+                    logger.warning("Could not record test failures of problem %s", problem_id, exc_info=True)
+            return updated if all(result.passed for result in results) else 0
+        
+        outcomes = await asyncio.gather(*(
+            regrade(code, submission_ids)
+            for code, submission_ids in classes.values()
+        ), return_exceptions=True)
+        get_stats_cache().pop("stats")
+        
+        # Anything regrade() didn't catch leaves the rest of its class unreported
+        reported = {failure.submission_id for failure in failures}
+        for outcome, (_, submission_ids) in zip(outcomes, classes.values()):
+            if isinstance(outcome, Exception):
+                failures.extend(
+                    RegradeFailure(submission_id=submission_id, error=f"Regrade failed: {str(outcome)}")
+                    for submission_id in submission_ids if submission_id not in reported
+                )
+        
+        regraded = sum(len(submission_ids) for _, submission_ids in classes.values()) - len(failures)
+        metrics.counter("regrade_submissions").inc(regraded)
+        metrics.counter("regrade_executions").inc(len(classes))
+        
+        return RegradeResponse(
+            problem_id=problem_id,
+            regraded=regraded,
+            executed=len(classes),
+            dedup_ratio=round(regraded / len(classes), 2) if classes else 1.0,
+            all_passed=sum(outcome for outcome in outcomes if not isinstance(outcome, Exception)),
+            failures=failures
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Regrade failed: {str(e)}"
+        )
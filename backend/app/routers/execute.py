@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from supabase import Client
 from app.auth import get_current_user
-from app.models import ExecuteRequest, ExecuteResponse, TestResult
-from app.executor import execute_code
-from typing import List, Optional
+from app.database import get_supabase_client
+from app.models import ExecuteRequest, ExecuteResponse
+from app.dispatch import run_tests, run_until_disconnected, record_test_failures, stored_test_cases
+from app.quotas import check_quota, charge_run
+from app.pool import metering_cpu
+from typing import Optional
 
 router = APIRouter()
 
@@ -10,39 +15,64 @@ router = APIRouter()
 @router.post("", response_model=ExecuteResponse)
 async def execute_solution(
     request: ExecuteRequest,
+    http_request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
     function_signature: Optional[str] = None,
-    user = Depends(get_current_user)
+    instruction_budget: Optional[int] = None,
+    fail_fast: bool = False,
+    user = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase_client)
 ):
     """
     Execute Python code against test cases
+
+    With an instruction_budget the verdict is load-independent: each test
+    fails once it executes more line events than the budget allows.
+    If the client disconnects, the run is cancelled. With fail_fast the
+    run stops at the first failing test, trying the tests that fail most
+    often first; the rest are reported as skipped. Tests run with the time
+    limit calibrated for the stored test case, or the default limit for
+    test cases that don't match one.
+
+    The run's CPU seconds count towards the user's quota; once it is used
+    up, runs are refused with 429 until the quota window moves on.
     """
     try:
-        results: List[TestResult] = []
-        all_passed = True
+        quota = await check_quota(user.id)
+        test_cases = [test_case.dict() for test_case in request.test_cases]
+        stored = await run_in_threadpool(stored_test_cases, supabase, test_cases)
+        # The client's time limits are ignored; only stored test cases have one
+        test_cases = [stored.get(test_case["id"]) or {**test_case, "time_limit": None} for test_case in test_cases]
+        # Timings go into the problem's history only if every test case is a stored one of that problem
+        problems = {row["problem_id"] for row in stored.values()}
+        problem_id = problems.pop() if len(problems) == 1 and all(
+            test_case["id"] in stored for test_case in test_cases
+        ) else None
+        # Cancelled and failed runs are charged too, for what they used before stopping
+        with metering_cpu() as cpu:
+            try:
+                results = await run_until_disconnected(http_request, run_tests(
+                    code=request.solution_code,
+                    test_cases=test_cases,
+                    function_signature=function_signature,
+                    instruction_budget=instruction_budget,
+                    fail_fast=fail_fast,
+                    problem_id=problem_id
+                ))
+            finally:
+                charge_run(user.id, quota, cpu.seconds, response)
+        # Failure counts order everyone's fail-fast runs, so only stored test cases count;
+        # updating them needn't delay the response
+        background_tasks.add_task(
+            record_test_failures, supabase, [result for result in results if result.test_case_id in stored]
+        )
         
-        for test_case in request.test_cases:
-            result = execute_code(
-                code=request.solution_code,
-                input_data=test_case.input_data,
-                expected_output=test_case.expected_output,
-                timeout=5,
-                function_signature=function_signature
-            )
-            
-            test_result = TestResult(
-                test_case_id=test_case.id,
-                passed=result["passed"],
-                actual_output=result.get("actual_output"),
-                error=result.get("error"),
-                execution_time=result.get("execution_time")
-            )
-            
-            results.append(test_result)
-            
-            if not result["passed"]:
-                all_passed = False
+        all_passed = all(result.passed for result in results)
         
         return ExecuteResponse(results=results, all_passed=all_passed)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
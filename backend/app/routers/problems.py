@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from supabase import Client
 from app.database import get_supabase_client
 from app.auth import get_current_user
 from app.models import ProblemCreate, ProblemResponse
+from app.responses import row_version_etag, conditional_response, trusted_response
 from typing import List
 import uuid
 
@@ -26,7 +27,8 @@ async def create_problem(
             "description": problem.description,
             "example_input": problem.example_input,
             "example_output": problem.example_output,
-            "function_signature": problem.function_signature
+            "function_signature": problem.function_signature,
+            "instruction_budget": problem.instruction_budget
         }
         
         result = supabase.table("problems").insert(problem_data).execute()
@@ -47,6 +49,8 @@ async def create_problem(
 
 @router.get("", response_model=List[ProblemResponse])
 async def get_problems(
+    request: Request,
+    response: Response,
     user = Depends(get_current_user),
     supabase: Client = Depends(get_supabase_client)
 ):
@@ -55,7 +59,12 @@ async def get_problems(
     """
     try:
         result = supabase.table("problems").select("*").eq("user_id", user.id).order("created_at", desc=True).execute()
-        return result.data
+        
+        not_modified = conditional_response(request, response, row_version_etag(result.data))
+        if not_modified:
+            return not_modified
+        
+        return trusted_response(result.data, response, ProblemResponse)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
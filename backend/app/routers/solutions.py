@@ -2,12 +2,31 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from supabase import Client
 from app.database import get_supabase_client
 from app.auth import get_current_user
-from app.models import SolutionCreate, SolutionUpdate, SolutionResponse
+from app.models import SolutionCreate, SolutionUpdate, SolutionResponse, SolutionAutosave, SolutionAutosaveResponse
+from app.patches import apply_patches, code_version
+from app.cache import TTLCache
+from app.config import get_settings
+from functools import lru_cache
 import uuid
 from datetime import datetime
 
 router = APIRouter()
 
+@lru_cache(maxsize=1)
+def get_code_cache() -> TTLCache:
+    """
+    Last saved (version, code) per (user_id, problem_id), so an autosave whose
+    base version matches can be written without reading the solution first
+    """
+    settings = get_settings()
+    return TTLCache(ttl=settings.autosave_cache_ttl, maxsize=settings.autosave_cache_size)
+
+
+def _remember(solution: dict) -> dict:
+    version = code_version(solution["solution_code"])
+    get_code_cache().set((solution["user_id"], solution["problem_id"]), (version, solution["solution_code"]))
+    return {**solution, "version": version}
+
 
 @router.post("", response_model=SolutionResponse, status_code=status.HTTP_201_CREATED)
 async def create_solution(
@@ -29,7 +48,7 @@ async def create_solution(
                 "updated_at": datetime.utcnow().isoformat()
             }
             result = supabase.table("solutions").update(updated_data).eq("id", existing.data[0]["id"]).execute()
-            return result.data[0]
+            return _remember(result.data[0])
         else:
             # Create new solution
             solution_data = {
@@ -39,7 +58,70 @@ async def create_solution(
                 "solution_code": solution.solution_code
             }
             result = supabase.table("solutions").insert(solution_data).execute()
-            return result.data[0]
+            return _remember(result.data[0])
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.patch("/autosave", response_model=SolutionAutosaveResponse)
+async def autosave_solution(
+    autosave: SolutionAutosave,
+    user = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    Apply editor patches to the saved solution
+
+    Patches are made against the code with version base_version (as returned
+    by the last save or GET); leave base_version unset to start a new solution
+    from empty text. The write is a single conditional upsert that only
+    succeeds if the stored code still has that version, otherwise 409 is
+    returned and the editor should reload the solution.
+    """
+    try:
+        key = (user.id, autosave.problem_id)
+        base_code = ""
+        if autosave.base_version is not None:
+            cached = get_code_cache().get(key)
+            if cached is not None and cached[0] == autosave.base_version:
+                base_code = cached[1]
+            else:
+                existing = supabase.table("solutions").select("solution_code").eq("problem_id", autosave.problem_id).eq("user_id", user.id).execute()
+                if not existing.data or code_version(existing.data[0]["solution_code"]) != autosave.base_version:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Solution has changed since base_version; reload it"
+                    )
+                base_code = existing.data[0]["solution_code"]
+        
+        code = apply_patches(base_code, [patch.model_dump() for patch in autosave.patches])
+        
+        result = supabase.rpc("autosave_solution", {
+            "p_problem_id": autosave.problem_id,
+            "p_user_id": user.id,
+            "p_base_version": autosave.base_version,
+            "p_solution_code": code
+        }).execute()
+        
+        if not result.data:
+            get_code_cache().pop(key)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Solution has changed since base_version; reload it"
+            )
+        
+        version = code_version(code)
+        get_code_cache().set(key, (version, code))
+        return {
+            "id": result.data[0]["id"],
+            "version": version,
+            "updated_at": result.data[0]["updated_at"]
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -65,7 +147,7 @@ async def get_solution(
                 detail="Solution not found"
             )
         
-        return result.data[0]
+        return _remember(result.data[0])
     except HTTPException:
         raise
     except Exception as e:
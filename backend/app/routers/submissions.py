@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from supabase import Client
 from app.database import get_supabase_client
 from app.auth import get_current_user
 from app.models import SubmissionCreate, SubmissionResponse
+from app.grading import summarize_results
+from app.responses import row_version_etag, conditional_response, trusted_response
 from typing import List
 import uuid
 
@@ -35,7 +37,8 @@ async def create_submission(
             "solution_id": submission.solution_id,
             "user_id": user.id,
             "status": "pending",
-            "test_results": submission.test_results
+            "test_results": submission.test_results,
+            **summarize_results(submission.test_results)
         }
         
         result = supabase.table("submissions").insert(submission_data).execute()
@@ -51,6 +54,8 @@ async def create_submission(
 
 @router.get("/my", response_model=List[SubmissionResponse])
 async def get_my_submissions(
+    request: Request,
+    response: Response,
     user = Depends(get_current_user),
     supabase: Client = Depends(get_supabase_client)
 ):
@@ -59,9 +64,13 @@ async def get_my_submissions(
     """
     try:
         result = supabase.table("submissions").select(
-            "*, problems(title), solutions(solution_code)"
+            "*, problems(title, updated_at), solutions(solution_code, updated_at)"
         ).eq("user_id", user.id).order("submitted_at", desc=True).execute()
         
+        not_modified = conditional_response(request, response, row_version_etag(result.data))
+        if not_modified:
+            return not_modified
+        
         # Format the response
         submissions = []
         for item in result.data:
@@ -75,7 +84,7 @@ async def get_my_submissions(
             submission.pop("solutions", None)
             submissions.append(submission)
         
-        return submissions
+        return trusted_response(submissions, response, SubmissionResponse)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,9 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from supabase import Client
 from app.database import get_supabase_client
 from app.auth import get_current_user, get_current_user_role
-from app.models import TestCaseCreate, TestCaseResponse
-from typing import List
+from app.models import TestCaseCreate, TestCaseResponse, StressTestRequest, StressTestResponse, BulkImportResponse
+from app.responses import row_version_etag, conditional_response, trusted_response
+from app.config import get_settings
+from app.dispatch import run_tests, run_until_disconnected
+from app.quotas import check_quota, charge_run
+from app.pool import metering_cpu
+from app.scheduler import BULK
+from app.stress import InputGenerator, expected_output_for, is_timeout, pick_slowest
+from app.importer import iter_jsonl_records, iter_csv_records, TestCaseValidator
+from typing import List, Optional
+import json
 import uuid
 
 router = APIRouter()
@@ -50,14 +59,259 @@ async def create_test_case(
         )
 
 
+@router.post("/{problem_id}/import", response_model=BulkImportResponse)
+async def import_test_cases(
+    problem_id: str,
+    request: Request,
+    file_format: Optional[str] = Query(None, alias="format"),
+    user = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    Bulk-import test cases from a streamed JSONL or CSV request body
+
+    Each JSONL line (or CSV row under an input_data,expected_output header)
+    is validated against the problem's function signature as it arrives.
+    Valid rows are inserted in batches; invalid ones are reported per row.
+    The format comes from ?format=jsonl|csv, or the Content-Type header.
+    If a batch fails to insert, its rows are reported as failed and the
+    import goes on; batches already inserted stay imported.
+    """
+    settings = get_settings()
+    try:
+        if file_format is None:
+            file_format = "csv" if "csv" in request.headers.get("content-type", "") else "jsonl"
+        if file_format not in ("jsonl", "csv"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="format must be 'jsonl' or 'csv'"
+            )
+        
+        # Verify user owns the problem (admins can skip this check), once for the whole upload
+        role = await get_current_user_role(user, supabase)
+        query = supabase.table("problems").select("id, function_signature").eq("id", problem_id)
+        if role != "admin":
+            query = query.eq("user_id", user.id)
+        problem = query.execute()
+        
+        if not problem.data:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have permission to add test cases to this problem"
+            )
+        
+        validator = TestCaseValidator(problem.data[0]["function_signature"])
+        if file_format == "csv":
+            records = iter_csv_records(request.stream(), settings.import_max_line_bytes)
+        else:
+            records = iter_jsonl_records(request.stream(), settings.import_max_line_bytes)
+        
+        imported = 0
+        errors = []
+        # (row number, test case) pairs waiting to be inserted
+        batch = []
+        
+        def flush() -> None:
+            nonlocal imported
+            try:
+                supabase.table("test_cases").insert([test_case for _, test_case in batch]).execute()
+                imported += len(batch)
+            except Exception as e:
+                errors.extend({"row": row, "error": f"Insert failed: {str(e)}"} for row, _ in batch)
+            batch.clear()
+        
+        async for row, record in records:
+            if imported + len(batch) + len(errors) >= settings.import_max_rows:
+                errors.append({"row": row, "error": f"Import limit of {settings.import_max_rows} rows reached"})
+                break
+            
+            try:
+                input_data, expected_output = validator.validate(record)
+            except ValueError as e:
+                errors.append({"row": row, "error": str(e)})
+                continue
+            
+            batch.append((row, {
+                "id": str(uuid.uuid4()),
+                "problem_id": problem_id,
+                "input_data": input_data,
+                "expected_output": expected_output
+            }))
+            if len(batch) >= settings.import_batch_size:
+                flush()
+        
+        if batch:
+            flush()
+        
+        return {"imported": imported, "failed": len(errors), "errors": errors}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/stress", response_model=StressTestResponse, status_code=status.HTTP_201_CREATED)
+async def generate_stress_tests(
+    request: StressTestRequest,
+    http_request: Request,
+    response: Response,
+    user = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    Generate large random inputs from the problem's function signature, run
+    the solution on them and save the slowest ones as new test cases
+
+    The solution is treated as the reference: its outputs become the
+    expected outputs. Inputs it can't finish within the default time limit
+    are run again with up to TIME_LIMIT_MAX; those are the slow inputs this
+    is meant to find, so if kept they are saved with a time limit calibrated
+    from that run. Inputs that error, or time out even then, are reported
+    but not saved, since there is no expected output for them.
+    """
+    settings = get_settings()
+    try:
+        if not 1 <= request.size <= settings.stress_max_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"size must be between 1 and {settings.stress_max_size}"
+            )
+        if not 1 <= request.samples <= settings.stress_max_samples:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"samples must be between 1 and {settings.stress_max_samples}"
+            )
+        
+        # Verify user owns the problem (admins can skip this check)
+        role = await get_current_user_role(user, supabase)
+        query = supabase.table("problems").select("id, function_signature").eq("id", request.problem_id)
+        if role != "admin":
+            query = query.eq("user_id", user.id)
+        problem = query.execute()
+        
+        if not problem.data:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have permission to add test cases to this problem"
+            )
+        
+        function_signature = problem.data[0]["function_signature"]
+        generator = InputGenerator(
+            size=request.size,
+            seed=request.seed,
+            int_min=request.int_min,
+            int_max=request.int_max,
+            alphabet=request.alphabet
+        )
+        
+        try:
+            inputs = [json.dumps(generator.generate_args(function_signature)) for _ in range(request.samples)]
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        quota = await check_quota(user.id)
+        test_cases = [
+            {"id": str(index), "input_data": input_data, "expected_output": "null"}
+            for index, input_data in enumerate(inputs)
+        ]
+        with metering_cpu() as cpu:
+            try:
+                results = await run_until_disconnected(http_request, run_tests(
+                    code=request.solution_code,
+                    test_cases=test_cases,
+                    function_signature=function_signature,
+                    lane=BULK
+                ))
+                slow = {result.test_case_id for result in results if is_timeout(result.error)}
+                if slow:
+                    rerun = await run_until_disconnected(http_request, run_tests(
+                        code=request.solution_code,
+                        test_cases=[test_case for test_case in test_cases if test_case["id"] in slow],
+                        function_signature=function_signature,
+                        timeout=settings.time_limit_max,
+                        lane=BULK
+                    ))
+                    rerun_results = {result.test_case_id: result for result in rerun}
+                    results = [rerun_results.get(result.test_case_id, result) for result in results]
+            finally:
+                charge_run(user.id, quota, cpu.seconds, response)
+        
+        runs = [
+            {
+                "index": index,
+                "execution_time": result.execution_time,
+                "error": result.error,
+                "actual_output": result.actual_output,
+                "actual_json": result.actual_json,
+                "slow": result.test_case_id in slow
+            }
+            for index, result in enumerate(results)
+        ]
+        slowest = pick_slowest(runs, request.keep)
+        
+        created = []
+        for run in slowest:
+            test_case = await create_test_case(
+                TestCaseCreate(
+                    problem_id=request.problem_id,
+                    input_data=inputs[run["index"]],
+                    expected_output=expected_output_for(run)
+                ),
+                user,
+                supabase
+            )
+            if run["slow"]:
+                # Without its own limit, the input would time out for every solution, the reference included
+                time_limit = min(
+                    max(run["execution_time"] * settings.calibration_multiplier, settings.time_limit_min),
+                    settings.time_limit_max
+                )
+                supabase.table("test_cases").update({"time_limit": time_limit}).eq("id", test_case["id"]).execute()
+                test_case = {**test_case, "time_limit": time_limit}
+            created.append(test_case)
+        
+        saved = {run["index"] for run in slowest}
+        return {
+            "runs": [
+                {
+                    "execution_time": run["execution_time"],
+                    "error": run["error"],
+                    "timed_out": is_timeout(run["error"]),
+                    "input_bytes": len(inputs[run["index"]]),
+                    "saved": run["index"] in saved
+                }
+                for run in runs
+            ],
+            "created": created
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.get("/{problem_id}", response_model=List[TestCaseResponse])
 async def get_test_cases(
     problem_id: str,
+    request: Request,
+    response: Response,
     user = Depends(get_current_user),
     supabase: Client = Depends(get_supabase_client)
 ):
     """
     Get all test cases for a problem
+
+    Inputs can be large, so row versions are fetched first and the full
+    rows are only loaded when the client's ETag is stale.
     """
     try:
         # Check if user is admin
@@ -73,8 +327,14 @@ async def get_test_cases(
                     detail="You don't have permission to view test cases for this problem"
                 )
         
+        versions = supabase.table("test_cases").select("id, created_at, updated_at").eq("problem_id", problem_id).order("created_at").execute()
+        
+        not_modified = conditional_response(request, response, row_version_etag(versions.data))
+        if not_modified:
+            return not_modified
+        
         result = supabase.table("test_cases").select("*").eq("problem_id", problem_id).order("created_at").execute()
-        return result.data
+        return trusted_response(result.data, response, TestCaseResponse)
     except HTTPException:
         raise
     except Exception as e:
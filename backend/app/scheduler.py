@@ -0,0 +1,136 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from app.metrics import metrics
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Highest priority first
+LANES = (INTERACTIVE, BULK)
+
+
+class LaneScheduler:
+    """
+    Hands out execution slots to priority lanes
+
+    A free slot goes to the highest-priority lane that has a queued job and
+    is below its cap, so queued bulk jobs never hold up an interactive one.
+    Slots reserved for a lane can't be taken by lower-priority lanes: with
+    one slot reserved for interactive runs, bulk grading fills at most
+    size - 1 slots and a Run always finds a free one. Reservations are
+    clamped so the lowest lane can always get at least one slot.
+
+    The number of slots can change at runtime (see resize()); caps and
+    reservations are re-clamped to the new size.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        caps: Optional[Dict[str, Optional[int]]] = None,
+        reserved: Optional[Dict[str, int]] = None
+    ):
+        self._requested_caps = dict(caps or {})
+        self._requested_reserved = dict(reserved or {})
+        self.running = {lane: 0 for lane in LANES}
+        # Waiters with the time they started waiting
+        self._queues: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {lane: deque() for lane in LANES}
+        self.resize(size)
+
+    def resize(self, size: int) -> None:
+        """
+        Change the number of slots
+
+        Growing starts queued jobs right away. After shrinking, running jobs
+        finish normally and no new ones start until the lanes are back
+        within their limits.
+        """
+        self.size = size
+        self.caps = {lane: size for lane in LANES}
+        for lane, cap in self._requested_caps.items():
+            self.caps[lane] = size if cap is None else min(cap, size)
+        self.reserved = {lane: 0 for lane in LANES}
+        available = max(0, size - 1)
+        for lane in LANES[:-1]:
+            self.reserved[lane] = min(self._requested_reserved.get(lane, 0), available)
+            available -= self.reserved[lane]
+        self._dispatch()
+
+    def waiting(self, lane: Optional[str] = None) -> int:
+        lanes = LANES if lane is None else (lane,)
+        return sum(
+            sum(1 for waiter, _ in self._queues[name] if not waiter.done())
+            for name in lanes
+        )
+
+    def oldest_wait(self) -> float:
+        """
+        Seconds the longest-waiting queued job has been waiting, 0.0 if none
+        """
+        now = time.monotonic()
+        return max(
+            (now - since for queue in self._queues.values() for waiter, since in queue if not waiter.done()),
+            default=0.0
+        )
+
+    def status(self) -> Dict:
+        return {
+            lane: {
+                "running": self.running[lane],
+                "queued": self.waiting(lane),
+                "cap": self.caps[lane],
+                "reserved": self.reserved[lane]
+            }
+            for lane in LANES
+        }
+
+    def _can_start(self, lane: str) -> bool:
+        if self.running[lane] >= self.caps[lane]:
+            return False
+        free = self.size - sum(self.running.values())
+        # Unused reservations of higher-priority lanes aren't available to this one
+        held_back = sum(
+            max(0, self.reserved[higher] - self.running[higher])
+            for higher in LANES[:LANES.index(lane)]
+        )
+        return free - held_back > 0
+
+    async def acquire(self, lane: str = INTERACTIVE) -> None:
+        """
+        Wait for a slot in a lane and record how long the wait took
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane '{lane}', expected one of: {', '.join(LANES)}")
+
+        start = time.monotonic()
+        ahead = any(self.waiting(other) for other in LANES[:LANES.index(lane) + 1])
+        if not ahead and self._can_start(lane):
+            self.running[lane] += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._queues[lane].append((waiter, start))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted just as the caller gave up; hand the slot on
+                    self.release(lane)
+                raise
+        metrics.window(f"queue_wait_seconds.{lane}").observe(time.monotonic() - start)
+
+    def release(self, lane: str = INTERACTIVE) -> None:
+        self.running[lane] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue and self._can_start(lane):
+                waiter, _ = queue.popleft()
+                if waiter.done():
+                    continue
+                self.running[lane] += 1
+                waiter.set_result(None)
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+
+class SharedInput:
+    """
+    A decoded test input pickled into a shared memory segment
+    """
+
+    def __init__(self, key: bytes, shm: shared_memory.SharedMemory, size: int):
+        self.key = key
+        self.shm = shm
+        self.size = size
+        self.pins = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+
+class SharedInputStore:
+    """
+    Large test inputs, decoded once and kept in shared memory for execution processes
+
+    A test's input_data is JSON text that every execution process would
+    otherwise receive through its pipe and decode again for every test of
+    every submission. Inputs of at least min_bytes are instead decoded once
+    in this process and pickled (protocol 5) into a shared memory segment.
+    Jobs then only carry the segment's name, and execution processes
+    unpickle the arguments directly from the mapped segment.
+
+    Unpickling still builds a fresh copy of the arguments for every test.
+    Decoded JSON is all lists, dicts and scalars, which pickle can't keep
+    out-of-band, and user code may modify its arguments, so each test
+    needs its own objects anyway. What is saved is the JSON decoding and
+    the copy through the pipe.
+
+    Segments are keyed by a hash of the JSON text, so every submission for
+    the same problem reuses them. The least recently used unpinned segments
+    are unlinked once the store holds more than max_bytes.
+    """
+
+    def __init__(self, min_bytes: int = 64 * 1024, max_bytes: int = 256 * 1024 * 1024):
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self._segments: "OrderedDict[bytes, SharedInput]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def acquire(self, input_data: str) -> Optional[SharedInput]:
+        """
+        Get the shared segment for an input and pin it until release()
+
+        Returns:
+            The segment, or None if the input is small, invalid JSON or too
+            large for the store (the caller then sends input_data as is)
+        """
+        if len(input_data) < self.min_bytes:
+            return None
+
+        key = hashlib.blake2b(input_data.encode(), digest_size=16).digest()
+        with self._lock:
+            segment = self._segments.get(key)
+            if segment is not None:
+                self._segments.move_to_end(key)
+                segment.pins += 1
+                return segment
+
+        try:
+            args = json.loads(input_data)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(args, list):
+            args = [args]
+        payload = pickle.dumps(args, protocol=5)
+        if len(payload) > self.max_bytes:
+            return None
+
+        shm = shared_memory.SharedMemory(create=True, size=len(payload))
+        shm.buf[:len(payload)] = payload
+
+        with self._lock:
+            existing = self._segments.get(key)
+            if existing is not None:
+                # Another thread decoded the same input first
+                _unlink(shm)
+                existing.pins += 1
+                return existing
+
+            segment = SharedInput(key, shm, len(payload))
+            segment.pins = 1
+            self._segments[key] = segment
+            self._bytes += segment.size
+            self._evict()
+            return segment
+
+    def release(self, segment: SharedInput) -> None:
+        with self._lock:
+            segment.pins -= 1
+            self._evict()
+
+    def _evict(self) -> None:
+        for key in list(self._segments):
+            if self._bytes <= self.max_bytes:
+                break
+            segment = self._segments[key]
+            if segment.pins:
+                continue
+            del self._segments[key]
+            self._bytes -= segment.size
+            _unlink(segment.shm)
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments.values():
+                _unlink(segment.shm)
+            self._segments.clear()
+            self._bytes = 0
+
+
+def _unlink(shm: shared_memory.SharedMemory) -> None:
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def load_shared_input(name: str, size: int, attached: Dict[str, shared_memory.SharedMemory], keep: int = 16) -> List:
+    """
+    Rebuild the arguments stored in a shared segment (called in execution processes)
+
+    Segments stay attached (up to `keep`) so later tests using the same
+    input only pay for unpickling, which reads straight from the mapping.
+    The result is a new copy each time (see SharedInputStore).
+    """
+    shm = attached.pop(name, None)
+    if shm is None:
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # Execution processes share the pool's resource tracker, where the
+            # segment is already registered, so attaching here adds nothing to clean up
+            shm = shared_memory.SharedMemory(name=name)
+    attached[name] = shm
+    while len(attached) > keep:
+        attached.pop(next(iter(attached))).close()
+
+    view = shm.buf[:size]
+    try:
+        return pickle.loads(view)
+    finally:
+        view.release()
@@ -0,0 +1,161 @@
+import ast
+import math
+import random
+import string
+from typing import Any, Dict, List, Optional
+
+from app.executor import parse_function_signature
+
+# Types whose generated size is controlled by the size budget
+_SIZED = {
+    "list", "List", "Sequence", "tuple", "Tuple", "set", "Set", "dict", "Dict", "Mapping", "str",
+    "ListNode", "TreeNode"
+}
+
+
+class InputGenerator:
+    """
+    Build random function arguments of a configurable size from type annotations
+
+    Supports int, float, str, bool, list/List/Sequence, tuple/Tuple, set,
+    dict/Dict/Mapping, ListNode/TreeNode (as their JSON arrays of ints),
+    Optional and Any (treated as int). `size` is the
+    total number of scalars per argument: list[int] gets `size` elements,
+    list[list[int]] gets about sqrt(size) lists of sqrt(size) elements.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        seed: Optional[int] = None,
+        int_min: int = -10**9,
+        int_max: int = 10**9,
+        alphabet: str = string.ascii_lowercase
+    ):
+        self.size = size
+        self.rng = random.Random(seed)
+        self.int_min = int_min
+        self.int_max = int_max
+        self.alphabet = alphabet
+
+    def generate_args(self, function_signature: str) -> List[Any]:
+        _, params, _ = parse_function_signature(function_signature)
+        return [self.generate(param_type) for _, param_type in params]
+
+    def generate(self, type_str: str, size: Optional[int] = None) -> Any:
+        try:
+            node = ast.parse(type_str, mode="eval").body
+        except SyntaxError:
+            raise ValueError(f"Cannot parse type '{type_str}'")
+        return self._build(node, self.size if size is None else size)
+
+    def _name(self, node) -> str:
+        if isinstance(node, ast.Name):
+            return node.id
+        if isinstance(node, ast.Attribute):
+            return node.attr
+        if isinstance(node, ast.Constant) and node.value is None:
+            return "None"
+        raise ValueError(f"Cannot generate inputs for type '{ast.unparse(node)}'")
+
+    def _build(self, node, size: int) -> Any:
+        if isinstance(node, ast.Subscript):
+            container = self._name(node.value)
+            args = list(node.slice.elts) if isinstance(node.slice, ast.Tuple) else [node.slice]
+
+            if container == "Optional":
+                return self._build(args[0], size)
+            if container == "Union":
+                return self._build(args[0], size)
+            if container in ("list", "List", "Sequence", "set", "Set"):
+                element = args[0]
+                length, element_size = self._split(size, element)
+                if container in ("set", "Set"):
+                    return list({self._hashable(self._build(element, element_size)) for _ in range(length)})
+                return [self._build(element, element_size) for _ in range(length)]
+            if container in ("tuple", "Tuple"):
+                if len(args) == 2 and isinstance(args[1], ast.Constant) and args[1].value is Ellipsis:
+                    length, element_size = self._split(size, args[0])
+                    return [self._build(args[0], element_size) for _ in range(length)]
+                return [self._build(arg, max(1, size // len(args))) for arg in args]
+            if container in ("dict", "Dict", "Mapping"):
+                key_type, value_type = (args + args)[:2]
+                length, value_size = self._split(size, value_type)
+                return {
+                    self._key(key_type, i): self._build(value_type, value_size)
+                    for i in range(length)
+                }
+            raise ValueError(f"Cannot generate inputs for type '{ast.unparse(node)}'")
+
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+            # X | None
+            return self._build(node.left, size)
+
+        name = self._name(node)
+        if name in ("int", "Any", "object"):
+            return self.rng.randint(self.int_min, self.int_max)
+        if name == "float":
+            return self.rng.uniform(self.int_min, self.int_max)
+        if name == "bool":
+            return self.rng.random() < 0.5
+        if name == "str":
+            return "".join(self.rng.choices(self.alphabet, k=size))
+        if name in ("list", "List", "ListNode", "TreeNode"):
+            # A TreeNode array without nulls is a complete tree of `size` nodes
+            return [self.rng.randint(self.int_min, self.int_max) for _ in range(size)]
+        if name in ("dict", "Dict"):
+            return {str(i): self.rng.randint(self.int_min, self.int_max) for i in range(size)}
+        raise ValueError(f"Cannot generate inputs for type '{name}'")
+
+    def _split(self, size: int, element) -> tuple:
+        """
+        Split a size budget into (length, per-element size)
+        """
+        if self._is_sized(element):
+            length = max(1, math.isqrt(size))
+            return length, max(1, size // length)
+        return size, 1
+
+    def _is_sized(self, node) -> bool:
+        if isinstance(node, ast.Subscript):
+            name = self._name(node.value)
+            if name in ("Optional", "Union"):
+                return self._is_sized(node.slice.elts[0] if isinstance(node.slice, ast.Tuple) else node.slice)
+            return name in _SIZED
+        try:
+            return self._name(node) in _SIZED
+        except ValueError:
+            return False
+
+    def _key(self, node, index: int) -> str:
+        # JSON object keys are always strings; the index keeps them unique
+        if self._name(node) == "str":
+            return "".join(self.rng.choices(self.alphabet, k=4)) + str(index)
+        return str(index)
+
+    def _hashable(self, value: Any) -> Any:
+        return tuple(value) if isinstance(value, list) else value
+
+
+def expected_output_for(result: Dict) -> str:
+    """
+    The JSON expected_output of a test case, from a run's result
+
+    execute_code reports string return values unquoted in actual_output, and
+    their JSON in actual_json; everything else is JSON already. Which one
+    applies depends on the value returned, not on the return annotation.
+    """
+    return result.get("actual_json") or result["actual_output"]
+
+
+def is_timeout(error: Optional[str]) -> bool:
+    return bool(error) and error.startswith("Execution timed out")
+
+
+def pick_slowest(runs: List[Dict], keep: int) -> List[Dict]:
+    """
+    Choose the slowest successful runs to keep as test cases
+    """
+    successful = [run for run in runs if not run["error"] and run["actual_output"] is not None]
+    successful.sort(key=lambda run: run["execution_time"] or 0.0, reverse=True)
+    return successful[:keep]
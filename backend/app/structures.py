@@ -0,0 +1,157 @@
+"""
+Linked structures that problems can use as parameter and return types
+
+Each registered type has a builder, which makes the structure from its JSON
+form in a test case, and a serializer, which turns a returned structure
+back into JSON for comparison. Both are iterative and O(n), so deep lists
+and trees hit neither the recursion limit nor the test's time budget.
+"""
+import re
+import typing
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ListNode:
+    __slots__ = ("val", "next")
+
+    def __init__(self, val=0, next=None):
+        self.val = val
+        self.next = next
+
+    def __repr__(self) -> str:
+        return f"ListNode({self.val!r})"
+
+
+class TreeNode:
+    __slots__ = ("val", "left", "right")
+
+    def __init__(self, val=0, left=None, right=None):
+        self.val = val
+        self.left = left
+        self.right = right
+
+    def __repr__(self) -> str:
+        return f"TreeNode({self.val!r})"
+
+
+def build_linked_list(values: Optional[List]) -> Optional[ListNode]:
+    """
+    Build a linked list from an array: [1, 2, 3] -> 1 -> 2 -> 3
+    """
+    if values is None:
+        return None
+    if not isinstance(values, list):
+        raise ValueError(f"Expected list for ListNode, got {type(values).__name__}")
+
+    head = None
+    for value in reversed(values):
+        head = ListNode(value, head)
+    return head
+
+
+def serialize_linked_list(head: Optional[ListNode]) -> List:
+    values = []
+    seen = set()
+    node = head
+    while node is not None:
+        if id(node) in seen:
+            raise ValueError("Returned linked list contains a cycle")
+        seen.add(id(node))
+        values.append(node.val)
+        node = node.next
+    return values
+
+
+def build_tree(values: Optional[List]) -> Optional[TreeNode]:
+    """
+    Build a binary tree from level-order values with nulls for missing
+    children, e.g. [3, 9, 20, null, null, 15, 7]
+    """
+    if values is None:
+        return None
+    if not isinstance(values, list):
+        raise ValueError(f"Expected list for TreeNode, got {type(values).__name__}")
+    if not values or values[0] is None:
+        return None
+
+    root = TreeNode(values[0])
+    parents = deque([root])
+    index = 1
+    while index < len(values):
+        parent = parents.popleft()
+        if values[index] is not None:
+            parent.left = TreeNode(values[index])
+            parents.append(parent.left)
+        index += 1
+        if index < len(values) and values[index] is not None:
+            parent.right = TreeNode(values[index])
+            parents.append(parent.right)
+        index += 1
+    return root
+
+
+def serialize_tree(root: Optional[TreeNode]) -> List:
+    """
+    Level-order values with nulls for missing children, trailing nulls removed
+    """
+    values = []
+    seen = set()
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        if node is None:
+            values.append(None)
+            continue
+        if id(node) in seen:
+            raise ValueError("Returned tree contains a cycle")
+        seen.add(id(node))
+        values.append(node.val)
+        queue.append(node.left)
+        queue.append(node.right)
+
+    while values and values[-1] is None:
+        values.pop()
+    return values
+
+
+# Type name -> (class, builder, serializer)
+STRUCTURED_TYPES: Dict[str, Tuple[type, Callable[[Any], Any], Callable[[Any], Any]]] = {}
+
+
+def register_type(cls: type, build: Callable[[Any], Any], serialize: Callable[[Any], Any]) -> None:
+    STRUCTURED_TYPES[cls.__name__] = (cls, build, serialize)
+
+
+register_type(ListNode, build_linked_list, serialize_linked_list)
+register_type(TreeNode, build_tree, serialize_tree)
+
+_OPTIONAL = re.compile(r"^(?:typing\.)?Optional\[(.+)\]$")
+_UNION_NONE = re.compile(r"^(.+?)\s*\|\s*None$|^None\s*\|\s*(.+)$")
+
+
+def structured_type(type_str: str) -> Optional[str]:
+    """
+    The registered type a parameter or return annotation refers to, if any
+
+    Accepts "TreeNode", "Optional[TreeNode]", "TreeNode | None" and quoted forms.
+    """
+    name = type_str.strip().strip("'\"")
+    match = _OPTIONAL.match(name)
+    if match:
+        name = match.group(1).strip().strip("'\"")
+    else:
+        match = _UNION_NONE.match(name)
+        if match:
+            name = (match.group(1) or match.group(2)).strip().strip("'\"")
+    return name if name in STRUCTURED_TYPES else None
+
+
+def namespace() -> Dict[str, Any]:
+    """
+    The names predefined for user code: the registered classes and, as if by
+    `from typing import *`, the typing names that signatures use (Optional, List, ...)
+    """
+    names: Dict[str, Any] = {name: getattr(typing, name) for name in typing.__all__}
+    names.update((name, cls) for name, (cls, _, _) in STRUCTURED_TYPES.items())
+    return names
@@ -0,0 +1,170 @@
+"""
+Execution timing history
+
+Every executed test's time is appended to the execution_timings table
+(database/migrate_execution_timings.sql) along with the problem, test case,
+a normalized hash of the code, the node that ran it and the deploy that
+served it. Percentiles per problem, test case and deploy are computed in the
+database by GET /api/admin/timings/{problem_id}.
+
+Rows are buffered and inserted in batches from a background thread, so
+recording adds no database round trip to a run.
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.database import get_supabase_client
+from app.metrics import metrics
+from app.normalize import normalized_hash
+
+logger = logging.getLogger(__name__)
+
+# Node that runs tests in local execution mode; remote workers report their own
+NODE = socket.gethostname()
+
+
+def deploy_id(configured: str = "") -> str:
+    """
+    The running deploy: DEPLOY_ID if set, else Railway's commit SHA
+    """
+    return configured or os.environ.get("RAILWAY_GIT_COMMIT_SHA", "")[:12] or "unknown"
+
+
+class TimingRecorder:
+    """
+    Buffers runs and writes their per-test timings in batches
+
+    A batch is written once batch_size rows are waiting or flush_interval
+    seconds have passed. Rows of a failed write, and new rows while
+    max_buffered are already waiting, are dropped and counted as
+    timings_dropped rather than held in memory.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[Dict]], None],
+        deploy: str,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        max_buffered: int = 50000
+    ):
+        self.write = write
+        self.deploy = deploy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        # (recorded_at, problem_id, code, results) per run; rows are built on the writer thread
+        self._runs: List[Tuple[str, str, str, List[Dict]]] = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="timing-recorder", daemon=True)
+        self._thread.start()
+
+    def record(self, problem_id: str, code: str, results: List[Dict]) -> None:
+        """
+        Queue the timings of a run's executed tests (skipped tests are left out)
+        """
+        executed = [result for result in results if not result.get("skipped")]
+        if not executed:
+            return
+        with self._lock:
+            if self._buffered + len(executed) > self.max_buffered:
+                metrics.counter("timings_dropped").inc(len(executed))
+                return
+            self._runs.append((datetime.now(timezone.utc).isoformat(), problem_id, code, executed))
+            self._buffered += len(executed)
+            if self._buffered >= self.batch_size:
+                self._wake.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            runs, self._runs = self._runs, []
+            self._buffered = 0
+        if not runs:
+            return
+
+        rows = []
+        for recorded_at, problem_id, code, results in runs:
+            if not _is_uuid(problem_id):
+                continue
+            code_hash = normalized_hash(code)
+            rows.extend(
+                {
+                    "recorded_at": recorded_at,
+                    "problem_id": problem_id,
+                    "test_case_id": result["test_case_id"],
+                    "code_hash": code_hash,
+                    "node": result.get("node") or NODE,
+                    "deploy_id": self.deploy,
+                    "execution_time": result.get("execution_time") or 0.0,
+                    "passed": bool(result.get("passed"))
+                }
+                for result in results
+                # Ids from POST /api/execute come from the client; one bad id would fail the batch
+                if _is_uuid(result["test_case_id"])
+            )
+
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            try:
+                self.write(batch)
+            except Exception:
+                metrics.counter("timings_dropped").inc(len(batch))
+                logger.warning("Could not write %d execution timings", len(batch), exc_info=True)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(timeout=self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=10)
+        self.flush()
+
+
+def _is_uuid(value) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+_recorder: Optional[TimingRecorder] = None
+
+
+def get_timing_recorder() -> TimingRecorder:
+    """
+    Get the process-wide recorder, writing to Supabase
+    """
+    global _recorder
+    settings = get_settings()
+    if _recorder is None:
+        def write(rows: List[Dict]) -> None:
+            get_supabase_client().table("execution_timings").insert(rows).execute()
+
+        _recorder = TimingRecorder(
+            write,
+            deploy_id(settings.deploy_id),
+            batch_size=settings.timing_batch_size,
+            flush_interval=settings.timing_flush_interval
+        )
+    return _recorder
+
+
+def shutdown() -> None:
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
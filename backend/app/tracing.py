@@ -0,0 +1,373 @@
+"""
+Request-scoped tracing
+
+A sampled request gets a Trace that spans are added to as it moves through
+authentication, Supabase queries, pre-flight checks, queueing and each test
+case's execution. When the response starts, the timings so far are sent in a
+Server-Timing header (one entry per stage, durations summed); once it
+finishes, the whole trace is handed to the configured sink on a background
+thread.
+
+Requests that aren't sampled carry no trace, and span() then costs one
+context variable lookup, so tracing can stay enabled in production with a
+small TRACE_SAMPLE_RATE. A sampled request with a W3C traceparent header
+is traced under the caller's trace id. Only with TRACE_TRUST_TRACEPARENT
+(for deployments where every caller is trusted, e.g. behind a gateway that
+strips the header) does the header's sampled flag force a trace; otherwise
+any client could bypass the sample rate.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from app.metrics import metrics
+
+# Only the standard library is imported at module level: app.pool uses
+# span(), and execution processes shouldn't pay for importing httpx
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], start: float, attributes: Dict):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = start
+        self.end = start
+        self.attributes = attributes
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Trace:
+    """
+    The spans of one request; times are time.perf_counter() values
+    """
+
+    def __init__(self, trace_id: Optional[str] = None, parent_id: Optional[str] = None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.parent_id = parent_id
+        self.spans: List[Span] = []
+        self.start_ns = time.time_ns()
+        self.start = time.perf_counter()
+
+    def unix_nanos(self, perf_time: float) -> int:
+        return self.start_ns + int((perf_time - self.start) * 1e9)
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value: each stage's total duration and span count
+        """
+        totals: Dict[str, List[float]] = {}
+        for span in self.spans:
+            if span.parent_id == self.parent_id:
+                # The root span is reported as "total" below
+                continue
+            total = totals.setdefault(span.name, [0.0, 0])
+            total[0] += span.duration
+            total[1] += 1
+
+        entries = [
+            f'{name};dur={duration * 1000:.2f};desc="{count}x"' if count > 1 else f"{name};dur={duration * 1000:.2f}"
+            for name, (duration, count) in totals.items()
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_span_id: ContextVar[Optional[str]] = ContextVar("span_id", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block as a child of the current span, if the request is sampled
+
+    Yields the Span (None when not sampled), so attributes can be added
+    once they are known.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = Span(name, _span_id.get(), time.perf_counter(), attributes)
+    trace.spans.append(current)
+    token = _span_id.set(current.span_id)
+    try:
+        yield current
+    finally:
+        _span_id.reset(token)
+        current.end = time.perf_counter()
+
+
+def record_span(name: str, start: float, end: float, **attributes) -> None:
+    """
+    Add a span timed elsewhere (e.g. in an httpx event hook) to the current trace
+    """
+    trace = _trace.get()
+    if trace is None:
+        return
+    recorded = Span(name, _span_id.get(), start, attributes)
+    recorded.end = end
+    trace.spans.append(recorded)
+
+
+def trace_database_client(session: "httpx.Client") -> None:
+    """
+    Record every request made with an httpx client (Supabase's PostgREST session) as a "db" span
+    """
+    def on_request(request: "httpx.Request") -> None:
+        if _trace.get() is not None:
+            request.extensions["trace_start"] = time.perf_counter()
+
+    def on_response(response: "httpx.Response") -> None:
+        start = response.request.extensions.get("trace_start")
+        if start is None:
+            return
+        # Include the body download, which the caller would otherwise do after this hook
+        response.read()
+        record_span(
+            "db",
+            start,
+            time.perf_counter(),
+            method=response.request.method,
+            path=response.request.url.path,
+            status=response.status_code
+        )
+
+    session.event_hooks["request"].append(on_request)
+    session.event_hooks["response"].append(on_response)
+
+
+def to_dict(trace: Trace) -> Dict:
+    return {
+        "trace_id": trace.trace_id,
+        "start": trace.start_ns / 1e9,
+        "spans": [
+            {
+                "name": s.name,
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "offset_ms": round((s.start - trace.start) * 1000, 3),
+                "duration_ms": round(s.duration * 1000, 3),
+                "attributes": s.attributes
+            }
+            for s in trace.spans
+        ]
+    }
+
+
+def to_otlp(trace: Trace, service_name: str) -> Dict:
+    """
+    The trace as an OTLP/JSON ExportTraceServiceRequest
+    """
+    def attributes(values: Dict) -> List[Dict]:
+        converted = []
+        for key, value in values.items():
+            if isinstance(value, bool):
+                converted.append({"key": key, "value": {"boolValue": value}})
+            elif isinstance(value, int):
+                converted.append({"key": key, "value": {"intValue": str(value)}})
+            elif isinstance(value, float):
+                converted.append({"key": key, "value": {"doubleValue": value}})
+            else:
+                converted.append({"key": key, "value": {"stringValue": str(value)}})
+        return converted
+
+    spans = []
+    for s in trace.spans:
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            # SERVER for the request itself, INTERNAL for its stages
+            "kind": 2 if s.parent_id == trace.parent_id else 1,
+            "startTimeUnixNano": str(trace.unix_nanos(s.start)),
+            "endTimeUnixNano": str(trace.unix_nanos(s.end)),
+            "attributes": attributes(s.attributes)
+        }
+        if s.parent_id:
+            otlp_span["parentSpanId"] = s.parent_id
+        spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": attributes({"service.name": service_name})},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}]
+        }]
+    }
+
+
+class JsonFileSink:
+    """
+    Append each trace as one JSON line to a file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, trace: Trace) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(to_dict(trace)) + "\n")
+
+    def close(self) -> None:
+        pass
+
+
+class OTLPHttpSink:
+    """
+    POST each trace as OTLP/JSON to a collector (e.g. http://localhost:4318/v1/traces)
+    """
+
+    def __init__(self, url: str, service_name: str = "codeexecutor-api", timeout: float = 5.0):
+        import httpx
+
+        self.url = url
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, trace: Trace) -> None:
+        self._client.post(self.url, json=to_otlp(trace, self.service_name)).raise_for_status()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+# URL scheme -> factory taking the URL
+SINKS: Dict[str, Callable[[str], object]] = {
+    "file": lambda url: JsonFileSink(url[len("file://"):]),
+    "http": OTLPHttpSink,
+    "https": OTLPHttpSink,
+}
+
+
+def register_sink(scheme: str, factory: Callable[[str], object]) -> None:
+    SINKS[scheme] = factory
+
+
+def get_sink(url: str):
+    """
+    Create a sink from a URL: "file:///var/log/traces.jsonl" or an OTLP/HTTP traces endpoint
+    """
+    scheme = url.split("://", 1)[0] if "://" in url else ""
+    if scheme not in SINKS:
+        raise ValueError(f"Unsupported trace sink URL: {url}")
+    return SINKS[scheme](url)
+
+
+class Exporter:
+    """
+    Hands finished traces to a sink on a background thread
+
+    Traces are dropped (and counted as traces_dropped) rather than queued
+    without bound when the sink can't keep up.
+    """
+
+    def __init__(self, sink, max_queued: int = 1000):
+        self.sink = sink
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=max_queued)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            metrics.counter("traces_dropped").inc()
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                break
+            try:
+                self.sink.export(trace)
+            except Exception:
+                metrics.counter("traces_dropped").inc()
+                logger.warning("Could not export trace %s", trace.trace_id, exc_info=True)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self.sink.close()
+
+
+class TracingMiddleware:
+    """
+    Start a trace for sampled HTTP requests and report it in Server-Timing
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = 0.0,
+        exporter: Optional[Exporter] = None,
+        trust_traceparent: bool = False
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.trust_traceparent = trust_traceparent
+
+    def _start_trace(self, scope) -> Optional[Trace]:
+        traceparent = next((value for name, value in scope["headers"] if name == b"traceparent"), b"")
+        match = _TRACEPARENT.match(traceparent.decode("latin-1").strip())
+        if match and self.trust_traceparent and int(match.group(3), 16) & 1:
+            return Trace(match.group(1), match.group(2))
+        if self.sample_rate and random.random() < self.sample_rate:
+            return Trace(match.group(1), match.group(2)) if match else Trace()
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = self._start_trace(scope)
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                request_span.attributes["status"] = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", trace.server_timing().encode("latin-1"))
+                ]
+            await send(message)
+
+        trace_token = _trace.set(trace)
+        span_token = _span_id.set(trace.parent_id)
+        try:
+            with span("request", method=scope["method"], path=scope["path"]) as request_span:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            _span_id.reset(span_token)
+            _trace.reset(trace_token)
+            metrics.counter("traces_sampled").inc()
+            if self.exporter is not None:
+                self.exporter.submit(trace)
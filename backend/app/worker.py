@@ -0,0 +1,208 @@
+"""
+Standalone execution worker
+
+Pulls execution jobs from the shared queue, runs them with app.executor on a
+local ExecutorPool and posts the results back. Run one or more of these on
+CPU-optimized nodes and set EXECUTION_MODE=remote on the API nodes:
+
+    python -m app.worker --broker sqlite:///execution_jobs.db --concurrency 4
+    python -m app.worker --broker supabase
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Optional
+
+from app.broker import get_broker
+from app.grading import JobCancelled, grade_tests
+from app.pool import ExecutorPool
+from app.scheduler import INTERACTIVE, LANES
+from app.shared_inputs import SharedInputStore
+
+logger = logging.getLogger("app.worker")
+
+
+async def _heartbeat(broker, job_id: str, worker_id: str, interval: float, lost: asyncio.Event) -> None:
+    """
+    Renew the claim on a job every interval seconds until cancelled
+
+    Sets `lost` once the job is no longer held by this worker, e.g. because
+    a missed heartbeat got it requeued and another worker may be running it.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            held = await asyncio.to_thread(broker.heartbeat, job_id, worker_id)
+        except Exception:
+            logger.warning("Job %s: heartbeat failed", job_id, exc_info=True)
+            continue
+        if not held:
+            lost.set()
+            return
+
+
+async def _consume(
+    broker,
+    pool: ExecutorPool,
+    worker_id: str,
+    poll_interval: float,
+    stop: asyncio.Event,
+    heartbeat_interval: float,
+    max_priority: Optional[int] = None,
+    cancel_check_interval: float = 0.5
+) -> None:
+    while not stop.is_set():
+        job = await asyncio.to_thread(broker.claim, worker_id, max_priority)
+        if job is None:
+            await asyncio.sleep(poll_interval)
+            continue
+
+        job_id, payload = job
+        start = time.monotonic()
+        last_check = start
+        lost = asyncio.Event()
+        heartbeat = asyncio.create_task(_heartbeat(broker, job_id, worker_id, heartbeat_interval, lost))
+
+        async def is_cancelled() -> bool:
+            # The API discards jobs it stops waiting for; look at most every cancel_check_interval
+            nonlocal last_check
+            if lost.is_set():
+                return True
+            if time.monotonic() - last_check < cancel_check_interval:
+                return False
+            last_check = time.monotonic()
+            return not await asyncio.to_thread(broker.exists, job_id)
+
+        try:
+            results = await grade_tests(
+                pool,
+                payload["code"],
+                payload["tests"],
+                function_signature=payload.get("function_signature"),
+                instruction_budget=payload.get("instruction_budget"),
+                measure_cost=payload.get("measure_cost", False),
+                lane=payload.get("lane", INTERACTIVE),
+                is_cancelled=is_cancelled,
+                fail_fast=payload.get("fail_fast", False)
+            )
+            # The API records which node ran each test (see app.timings)
+            node = socket.gethostname()
+            results = [{**result, "node": node} for result in results]
+            await asyncio.to_thread(broker.complete, job_id, {"results": results})
+            logger.info("Job %s: %d tests in %.3fs", job_id, len(results), time.monotonic() - start)
+        except JobCancelled as e:
+            logger.info("Job %s: %s", job_id, e)
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            await asyncio.to_thread(broker.fail, job_id, str(e))
+        finally:
+            heartbeat.cancel()
+
+
+async def _requeue_stale(broker, stale_after: float, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        requeued = await asyncio.to_thread(broker.requeue_stale, stale_after)
+        if requeued:
+            logger.warning("Requeued %d stale jobs", requeued)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=stale_after / 2)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_worker(
+    broker_url: str,
+    concurrency: int,
+    poll_interval: float,
+    stale_after: float,
+    interactive_reserved: int = 1
+) -> None:
+    """
+    Consume jobs until cancelled
+
+    Running jobs are heartbeated every stale_after / 4 seconds, and jobs
+    whose heartbeat is older than stale_after are requeued, so a job runs
+    as long as it needs while its worker is alive, and is picked up again
+    soon after a worker dies.
+    """
+    broker = get_broker(broker_url)
+    pool = ExecutorPool(
+        size=concurrency,
+        lane_reserved={INTERACTIVE: interactive_reserved},
+        shared_inputs=SharedInputStore()
+    )
+    pool.start()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    stop = asyncio.Event()
+    heartbeat_interval = stale_after / 4
+
+    logger.info("Worker %s consuming from %s with %d slots", worker_id, broker_url, concurrency)
+    tasks = [
+        asyncio.create_task(_consume(broker, pool, worker_id, poll_interval, stop, heartbeat_interval))
+        for _ in range(concurrency)
+    ]
+    # Consumers that only claim interactive jobs, so they can't all end up
+    # holding bulk jobs while an interactive one waits in the queue
+    tasks += [
+        asyncio.create_task(_consume(
+            broker, pool, worker_id, poll_interval, stop, heartbeat_interval,
+            max_priority=LANES.index(INTERACTIVE)
+        ))
+        for _ in range(pool.scheduler.reserved[INTERACTIVE])
+    ]
+    tasks.append(asyncio.create_task(_requeue_stale(broker, stale_after, stop)))
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        stop.set()
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an execution worker")
+    parser.add_argument(
+        "--broker",
+        default=os.environ.get("EXECUTION_BROKER_URL", "sqlite:///execution_jobs.db"),
+        help='Broker URL: "sqlite:///path/to/jobs.db" or "supabase"'
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.environ.get("EXECUTOR_POOL_SIZE", os.cpu_count() or 1)),
+        help="Jobs run in parallel (one execution process each)"
+    )
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between polls of an empty queue")
+    parser.add_argument(
+        "--stale-after",
+        type=float,
+        default=60.0,
+        help="Seconds without a heartbeat after which a running job is requeued (its worker is presumed dead)"
+    )
+    parser.add_argument(
+        "--interactive-reserved",
+        type=int,
+        default=int(os.environ.get("INTERACTIVE_RESERVED_SLOTS", 1)),
+        help="Slots bulk grading jobs may not use, kept free for interactive runs"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(run_worker(
+            args.broker,
+            args.concurrency,
+            args.poll_interval,
+            args.stale_after,
+            args.interactive_reserved
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare response serialization paths for the submission list endpoints
+
+Run from the backend directory:
+    python -m benchmarks.serialization --rows 2000 --tests 20
+
+"validated" is FastAPI's default path: re-validate every row against
+response_model=List[SubmissionResponse], then JSON-encode it. "trusted" is
+app.responses.trusted_response, which hands the database rows to orjson.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Callable, Dict, List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models import SubmissionResponse
+from app.responses import trusted_response
+
+
+def make_submission(tests: int, include_code: bool) -> Dict:
+    test_results = [
+        {
+            "test_case_id": str(uuid.uuid4()),
+            "passed": random.random() > 0.2,
+            "actual_output": str(random.randint(0, 10**6)),
+            "error": None,
+            "execution_time": random.random() / 100
+        }
+        for _ in range(tests)
+    ]
+    submission = {
+        "id": str(uuid.uuid4()),
+        "problem_id": str(uuid.uuid4()),
+        "solution_id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "status": random.choice(["pending", "approved", "rejected"]),
+        "test_results": test_results,
+        "admin_notes": None,
+        "submitted_at": "2024-01-01T00:00:00+00:00",
+        "reviewed_at": None,
+        "reviewed_by": None,
+        "problem_title": "Two Sum",
+        "passed_count": sum(r["passed"] for r in test_results),
+        "total_count": tests,
+        "max_execution_time": max(r["execution_time"] for r in test_results),
+        "total_execution_time": sum(r["execution_time"] for r in test_results),
+    }
+    if include_code:
+        submission["solution_code"] = "def two_sum(nums, target):\n" + "    pass\n" * 20
+    return submission
+
+
+def validated_path(rows: List[Dict]) -> bytes:
+    field = create_response_field(name="Response_submissions", type_=List[SubmissionResponse], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=rows))
+    return JSONResponse(content=content).body
+
+
+def trusted_path(rows: List[Dict]) -> bytes:
+    response = Response()
+    del response.headers["content-length"]
+    response.status_code = None
+    return trusted_response(rows, response).body
+
+
+def measure(path: Callable[[List[Dict]], bytes], rows: List[Dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        path(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="Submissions per response")
+    parser.add_argument("--tests", type=int, default=20, help="Test results per submission")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path (best is reported)")
+    args = parser.parse_args()
+
+    random.seed(0)
+    endpoints = {
+        # get_my_submissions always embeds solution_code
+        "get_my_submissions": [make_submission(args.tests, include_code=True) for _ in range(args.rows)],
+        # the admin dashboard lists submissions with include_code=false
+        "get_all_submissions": [make_submission(args.tests, include_code=False) for _ in range(args.rows)],
+    }
+
+    print(f"{args.rows} rows x {args.tests} test results, best of {args.repeat}")
+    print(f"{'endpoint':<22} {'validated':>12} {'trusted':>12} {'speedup':>9}")
+    for name, rows in endpoints.items():
+        validated = measure(validated_path, rows, args.repeat)
+        trusted = measure(trusted_path, rows, args.repeat)
+        print(f"{name:<22} {validated * 1000:>10.1f}ms {trusted * 1000:>10.1f}ms {validated / trusted:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+
+# Settings are read on first use; give the required ones values so modules
+# that look them up can be tested without a .env or a Supabase project
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
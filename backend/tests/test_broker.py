@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from app.broker import SQLiteBroker
+
+
+@pytest.fixture
+def broker(tmp_path):
+    return SQLiteBroker(str(tmp_path / "jobs.db"))
+
+
+def test_jobs_are_claimed_by_priority_then_age(broker):
+    bulk = broker.enqueue({"n": 1}, priority=1)
+    interactive = broker.enqueue({"n": 2}, priority=0)
+    assert broker.claim("w") == (interactive, {"n": 2})
+    assert broker.claim("w", max_priority=0) is None
+    assert broker.claim("w") == (bulk, {"n": 1})
+    assert broker.claim("w") is None
+
+
+def test_complete_and_fail(broker):
+    done, failed = broker.enqueue({}), broker.enqueue({})
+    broker.claim("w"), broker.claim("w")
+    assert broker.get_result(done) is None
+    broker.complete(done, {"results": []})
+    broker.fail(failed, "boom")
+    assert broker.get_result(done) == {"status": "done", "result": {"results": []}, "error": None}
+    assert broker.get_result(failed)["error"] == "boom"
+
+
+def test_heartbeat_keeps_long_running_job_claimed(broker):
+    job_id = broker.enqueue({})
+    broker.claim("w")
+    time.sleep(0.2)
+    assert broker.heartbeat(job_id, "w")
+    assert broker.requeue_stale(0.1) == 0
+    time.sleep(0.2)
+    assert broker.requeue_stale(0.1) == 1
+    assert broker.claim("other")[0] == job_id
+
+
+def test_heartbeat_reports_lost_claim(broker):
+    job_id = broker.enqueue({})
+    broker.claim("w")
+    assert not broker.heartbeat(job_id, "someone-else")
+    time.sleep(0.05)
+    broker.requeue_stale(0.01)
+    broker.claim("other")
+    assert not broker.heartbeat(job_id, "w")
+    broker.discard(job_id)
+    assert not broker.exists(job_id)
+    assert not broker.heartbeat(job_id, "other")
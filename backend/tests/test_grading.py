@@ -0,0 +1,86 @@
+import asyncio
+
+from app.grading import fail_fast_order, failed_test_ids, grade_tests, summarize_results, SKIPPED_ERROR
+
+
+def test_often_failing_tests_come_first():
+    tests = [
+        {"id": "a", "input_data": "[1]", "failure_count": 0},
+        {"id": "b", "input_data": "[1]", "failure_count": 5},
+        {"id": "c", "input_data": "[1]", "failure_count": 2},
+    ]
+    assert [t["id"] for t in fail_fast_order(tests, 5.0)] == ["b", "c", "a"]
+
+
+def test_failures_are_weighed_against_time_limit():
+    tests = [
+        # (3 + 1) / 10 = 0.4
+        {"id": "slow", "input_data": "[1]", "failure_count": 3, "time_limit": 10.0},
+        # (0 + 1) / 1 = 1.0
+        {"id": "fast", "input_data": "[1]", "failure_count": 0, "time_limit": 1.0},
+        # (1 + 1) / 5 (default) = 0.4, smaller input than "slow"
+        {"id": "default", "input_data": "1", "failure_count": 1, "time_limit": None},
+    ]
+    assert [t["id"] for t in fail_fast_order(tests, 5.0)] == ["fast", "default", "slow"]
+
+
+def test_ties_go_to_smaller_input():
+    tests = [
+        {"id": "big", "input_data": "[1, 2, 3, 4]"},
+        {"id": "small", "input_data": "[1]"},
+    ]
+    assert [t["id"] for t in fail_fast_order(tests, 5.0)] == ["small", "big"]
+
+
+def test_failed_test_ids_skip_passed_and_skipped():
+    results = [
+        {"test_case_id": "a", "passed": True},
+        {"test_case_id": "b", "passed": False},
+        {"test_case_id": "c", "passed": False, "skipped": True},
+    ]
+    assert failed_test_ids(results) == ["b"]
+
+
+def test_summarize_results():
+    summary = summarize_results([
+        {"passed": True, "execution_time": 0.5},
+        {"passed": False, "execution_time": 1.5},
+        {"passed": False, "execution_time": None},
+    ])
+    assert summary == {"passed_count": 1, "total_count": 3, "max_execution_time": 1.5, "total_execution_time": 2.0}
+
+
+class FakePool:
+    """
+    Passes a test when its expected output is "ok"
+    """
+
+    def __init__(self):
+        self.ran = []
+
+    async def run(self, job, lane):
+        self.ran.append(job["input_data"])
+        return {"passed": job["expected_output"] == "ok", "execution_time": 0.1}
+
+
+TESTS = [
+    {"id": "1", "input_data": "1", "expected_output": "ok", "timeout": 1},
+    {"id": "2", "input_data": "2", "expected_output": "bad", "timeout": 1},
+    {"id": "3", "input_data": "3", "expected_output": "ok", "timeout": 1},
+]
+
+
+def test_grade_tests_runs_everything_by_default():
+    pool = FakePool()
+    results = asyncio.run(grade_tests(pool, "code", TESTS))
+    assert pool.ran == ["1", "2", "3"]
+    assert [r["passed"] for r in results] == [True, False, True]
+
+
+def test_fail_fast_skips_remaining_tests():
+    pool = FakePool()
+    results = asyncio.run(grade_tests(pool, "code", TESTS, fail_fast=True))
+    assert pool.ran == ["1", "2"]
+    assert [r["test_case_id"] for r in results] == ["1", "2", "3"]
+    assert results[2]["skipped"] and results[2]["error"] == SKIPPED_ERROR
+    assert failed_test_ids(results) == ["2"]
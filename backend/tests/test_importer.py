@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+
+from app import importer
+from app.importer import iter_lines, iter_jsonl_records, iter_csv_records
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def collect(generator):
+    async def run():
+        return [item async for item in generator]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 3, 1024])
+def test_lines_split_across_chunks(size):
+    data = "first\r\nsecond\n\nthird é".encode()
+    assert collect(iter_lines(_chunks(data, size))) == ["first", "second", "", "third é"]
+
+
+def test_trailing_newline_adds_no_line():
+    assert collect(iter_lines(_chunks(b"a\nb\n", 2))) == ["a", "b"]
+
+
+@pytest.mark.parametrize("size", [1, 4, 100])
+def test_overlong_line_is_yielded_as_none(size):
+    data = b"ok\n" + b"x" * 20 + b"\nafter\n" + b"y" * 20
+    assert collect(iter_lines(_chunks(data, size), max_line_bytes=10)) == ["ok", None, "after", None]
+
+
+def test_jsonl_records_and_errors():
+    data = b'{"input_data": "[1]"}\n\n[1, 2]\n{bad\n' + b'{"a": "' + b"x" * 50 + b'"}\n'
+    records = collect(iter_jsonl_records(_chunks(data, 7), max_line_bytes=40))
+    assert records[0] == (1, {"input_data": "[1]"})
+    # Blank lines count towards row numbers but yield nothing
+    assert records[1] == (3, {"_error": "Each line must be a JSON object"})
+    assert records[2][0] == 4 and records[2][1]["_error"].startswith("Invalid JSON")
+    assert records[3] == (5, {"_error": "Line longer than 40 bytes"})
+
+
+def test_csv_records_with_multiline_quoted_fields():
+    data = b'input_data,expected_output\n"[1, 2]",3\n"[""a\nb""]","""ab"""\n'
+    records = collect(iter_csv_records(_chunks(data, 5)))
+    assert records == [
+        (1, {"input_data": "[1, 2]", "expected_output": "3"}),
+        (2, {"input_data": '["a\nb"]', "expected_output": '"ab"'}),
+    ]
+
+
+def test_csv_column_count_mismatch():
+    data = b"input_data,expected_output\n[1],2,3\n"
+    assert collect(iter_csv_records(_chunks(data, 64))) == [(1, {"_error": "Expected 2 columns, got 3"})]
+
+
+def test_csv_overlong_record_does_not_swallow_following_rows():
+    long_field = '"' + "\n".join(["x" * 10] * 5) + '"'
+    data = f"input_data,expected_output\n{long_field},1\n[1],2\n".encode()
+    records = collect(iter_csv_records(_chunks(data, 8), max_line_bytes=30))
+    assert records == [
+        (1, {"_error": "Record longer than 30 bytes"}),
+        (2, {"input_data": "[1]", "expected_output": "2"}),
+    ]
+
+
+def test_csv_unterminated_quote():
+    data = b'input_data,expected_output\n"[1],2\n'
+    assert collect(iter_csv_records(_chunks(data, 64))) == [(1, {"_error": "Unterminated quoted field"})]
+
+
+def test_csv_large_field_is_accepted():
+    field = "[" + ",".join(["1"] * 100000) + "]"
+    data = f"input_data,expected_output\n\"{field}\",1\n".encode()
+    records = collect(iter_csv_records(_chunks(data, 4096)))
+    assert records == [(1, {"input_data": field, "expected_output": "1"})]
+
+
+def test_iter_lines_is_linear_in_line_length():
+    # A quadratic splitter takes minutes on this; the linear one well under a second
+    data = b"x" * (4 * 1024 * 1024) + b"\n"
+    assert collect(iter_lines(_chunks(data, 1024))) == ["x" * (4 * 1024 * 1024)]
+
+
+class TestValidator:
+    validator = importer.TestCaseValidator("def two_sum(nums: list[int], target: int) -> list[int]:")
+
+    def test_accepts_json_text_and_json_values(self):
+        assert self.validator.validate({"input_data": "[[1, 2], 3]", "expected_output": "[0, 1]"}) == (
+            "[[1, 2], 3]", "[0, 1]"
+        )
+        input_data, expected_output = self.validator.validate({"input_data": [[1, 2], 3], "expected_output": [0, 1]})
+        assert json.loads(input_data) == [[1, 2], 3]
+        assert json.loads(expected_output) == [0, 1]
+
+    @pytest.mark.parametrize("record, message", [
+        ({"_error": "Invalid JSON: x"}, "Invalid JSON: x"),
+        ({"input_data": "[[1], 2]"}, "Missing field 'expected_output'"),
+        ({"input_data": "[[1]]", "expected_output": "[]"}, "Expected 2 arguments, got 1"),
+        ({"input_data": "[1", "expected_output": "[]"}, "Invalid JSON in 'input_data'"),
+        ({"input_data": "[5, 2]", "expected_output": "[]"}, "Type conversion error for parameter 'nums'"),
+    ])
+    def test_rejects_invalid_rows(self, record, message):
+        with pytest.raises(ValueError, match=message.replace("[", r"\[")):
+            self.validator.validate(record)
@@ -0,0 +1,84 @@
+from app.normalize import normalized_hash
+
+
+def same(a: str, b: str) -> bool:
+    return normalized_hash(a) == normalized_hash(b)
+
+
+BASE = '''
+def two_sum(nums, target):
+    seen = {}
+    for i, num in enumerate(nums):
+        if target - num in seen:
+            return [seen[target - num], i]
+        seen[num] = i
+'''
+
+
+def test_whitespace_comments_and_docstrings_are_ignored():
+    variant = '''
+def two_sum(nums, target):
+    """Find two indices."""
+    seen = {}   # value -> index
+    for i, num in enumerate(nums):
+
+        if target - num in seen:
+            return [seen[target - num],
+                    i]
+        seen[num] = i
+'''
+    assert same(BASE, variant)
+
+
+def test_local_variables_and_parameters_may_be_renamed():
+    variant = '''
+def two_sum(values, goal):
+    index_of = {}
+    for j, value in enumerate(values):
+        if goal - value in index_of:
+            return [index_of[goal - value], j]
+        index_of[value] = j
+'''
+    assert same(BASE, variant)
+
+
+def test_function_name_and_globals_are_kept():
+    assert not same(BASE, BASE.replace("def two_sum", "def twoSum"))
+    assert not same("def f(x):\n    return len(x)\n", "def f(x):\n    return sum(x)\n")
+
+
+def test_different_behaviour_differs():
+    assert not same(BASE, BASE.replace("[seen[target - num], i]", "[i, seen[target - num]]"))
+
+
+def test_renamed_locals_do_not_collide_with_globals():
+    a = "total = 1\ndef f(x):\n    y = x\n    return y + total\n"
+    b = "total = 1\ndef f(x):\n    total2 = x\n    return total2 + total\n"
+    c = "total = 1\ndef f(x):\n    total = x\n    return total + total\n"
+    assert same(a, b)
+    assert not same(a, c)
+
+
+def test_parameters_bound_by_keyword_keep_their_names():
+    a = "def f(n, memo=None):\n    return f(n - 1, memo=memo) if n else 0\n"
+    b = "def f(k, memo=None):\n    return f(k - 1, memo=memo) if k else 0\n"
+    c = "def f(n, cache=None):\n    return f(n - 1, cache=cache) if n else 0\n"
+    assert same(a, b)
+    assert not same(a, c)
+
+
+def test_global_and_nonlocal_names_keep_their_names():
+    a = "count = 0\ndef f():\n    global count\n    count += 1\n"
+    b = "counter = 0\ndef f():\n    global counter\n    counter += 1\n"
+    assert not same(a, b)
+
+
+def test_nested_functions_and_lambdas():
+    a = "def f(xs):\n    def key(v):\n        return -v\n    return sorted(xs, key=lambda v: key(v))\n"
+    b = "def f(items):\n    def order(w):\n        return -w\n    return sorted(items, key=lambda u: order(u))\n"
+    assert same(a, b)
+
+
+def test_code_that_does_not_parse_is_hashed_as_is():
+    assert same("def f(:\n", "def f(:\n")
+    assert not same("def f(:\n", "def f( :\n")
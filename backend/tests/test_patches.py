@@ -0,0 +1,54 @@
+import hashlib
+
+import pytest
+
+from app.patches import apply_patches, code_version
+
+
+def test_code_version_is_sha256_of_utf8():
+    assert code_version("é") == hashlib.sha256("é".encode("utf-8")).hexdigest()
+
+
+def test_insert_replace_and_delete():
+    assert apply_patches("hello world", [{"start": 5, "end": 5, "text": ","}]) == "hello, world"
+    assert apply_patches("hello world", [{"start": 6, "end": 11, "text": "there"}]) == "hello there"
+    assert apply_patches("hello world", [{"start": 0, "end": 6, "text": ""}]) == "world"
+
+
+def test_patches_refer_to_the_original_text_in_any_order():
+    patches = [
+        {"start": 6, "end": 11, "text": "there"},
+        {"start": 0, "end": 5, "text": "hi"},
+    ]
+    assert apply_patches("hello world", patches) == "hi there"
+
+
+def test_empty_base_and_no_patches():
+    assert apply_patches("", [{"start": 0, "end": 0, "text": "def f():\n    pass\n"}]) == "def f():\n    pass\n"
+    assert apply_patches("unchanged", []) == "unchanged"
+
+
+def test_offsets_are_utf16_code_units():
+    # The emoji is two UTF-16 code units, as in a JavaScript string
+    text = "a😀b"
+    assert apply_patches(text, [{"start": 3, "end": 4, "text": "c"}]) == "a😀c"
+    assert apply_patches(text, [{"start": 1, "end": 3, "text": "é"}]) == "aéb"
+
+
+def test_splitting_a_surrogate_pair_is_rejected():
+    with pytest.raises(ValueError, match="surrogate pair"):
+        apply_patches("a😀b", [{"start": 2, "end": 2, "text": "x"}])
+
+
+@pytest.mark.parametrize("start, end", [(-1, 0), (3, 2), (0, 6)])
+def test_out_of_range_patches_are_rejected(start, end):
+    with pytest.raises(ValueError, match="outside the text"):
+        apply_patches("hello", [{"start": start, "end": end, "text": ""}])
+
+
+def test_overlapping_patches_are_rejected():
+    with pytest.raises(ValueError, match="overlaps"):
+        apply_patches("hello world", [
+            {"start": 0, "end": 5, "text": "a"},
+            {"start": 3, "end": 7, "text": "b"},
+        ])
@@ -0,0 +1,95 @@
+import pytest
+
+from app.executor import execute_code
+from app.preflight import check_code
+
+SIGNATURE = "def add(a: int, b: int) -> int:"
+
+
+def test_valid_code_passes():
+    assert check_code("def add(a, b):\n    return a + b\n", SIGNATURE) is None
+
+
+def test_syntax_error_reports_position():
+    error = check_code("def add(a, b)\n    return a + b\n", SIGNATURE)
+    assert error.startswith("Syntax error at line 1")
+
+
+def test_missing_function():
+    error = check_code("def sub(a, b):\n    return a - b\n", SIGNATURE)
+    assert error == f"Function 'add' not found. Please define: {SIGNATURE}"
+
+
+@pytest.mark.parametrize("definition", [
+    "def add(a):\n    return a\n",
+    "def add(a, b, c):\n    return a\n",
+])
+def test_wrong_arity(definition):
+    assert "takes" in check_code(definition, SIGNATURE)
+
+
+@pytest.mark.parametrize("definition", [
+    "def add(a, b, c=0):\n    return a + b\n",
+    "def add(*args):\n    return sum(args)\n",
+    "def add(a, b, *, scale=1):\n    return a + b\n",
+    "add = lambda a, b: a + b\n",
+    "from operator import add\n",
+    "class Solution:\n    pass\nadd = Solution\n",
+])
+def test_compatible_definitions_pass(definition):
+    assert check_code(definition, SIGNATURE) is None
+
+
+def test_keyword_only_parameter_without_default():
+    assert "keyword-only" in check_code("def add(a, b, *, c):\n    return a\n", SIGNATURE)
+
+
+@pytest.mark.parametrize("code, call", [
+    ("import sys\nsys.exit(1)\n", "sys.exit"),
+    ("x = input()\n", "input"),
+    ("import os\nif True:\n    os.system('ls')\n", "os.system"),
+    ("def f(x=exit()):\n    pass\n", "exit"),
+    ("@breakpoint()\ndef f():\n    pass\n", "breakpoint"),
+])
+def test_unsafe_load_time_calls_are_rejected(code, call):
+    error = check_code(code + "def add(a, b):\n    return a + b\n", SIGNATURE)
+    assert error.startswith(f"Call to {call}() at line")
+
+
+def test_unsafe_calls_inside_functions_are_allowed():
+    code = "import sys\ndef add(a, b):\n    if a < 0:\n        sys.exit(1)\n    return a + b\n"
+    assert check_code(code, SIGNATURE) is None
+
+
+def test_main_guard_body_is_not_load_time_code():
+    code = (
+        "def add(a, b):\n"
+        "    return a + b\n"
+        "\n"
+        "if __name__ == '__main__':\n"
+        "    import sys\n"
+        "    a, b = map(int, input().split())\n"
+        "    print(add(a, b))\n"
+        "    sys.exit(0)\n"
+    )
+    assert check_code(code, SIGNATURE) is None
+    # The executor doesn't run the guarded block either
+    result = execute_code(code, "[1, 2]", "3", function_signature=SIGNATURE)
+    assert result["passed"], result
+
+
+def test_main_guard_else_branch_is_still_checked():
+    code = (
+        "def add(a, b):\n"
+        "    return a + b\n"
+        "if '__main__' == __name__:\n"
+        "    pass\n"
+        "else:\n"
+        "    exit()\n"
+    )
+    assert check_code(code, SIGNATURE).startswith("Call to exit() at line 6")
+
+
+def test_no_signature_only_checks_load_time_calls():
+    assert check_code("x = 1\n", None) is None
+    assert check_code("quit()\n", None).startswith("Call to quit()")
@@ -0,0 +1,149 @@
+import pytest
+
+from app import quotas
+from app.quotas import QuotaTracker, QuotaStatus, ROLLING_BUCKETS
+
+DAY = 86400.0
+# Midnight UTC
+T0 = 1_700_006_400.0
+
+
+class Database:
+    """
+    In-memory cpu_usage table shared by trackers, like API nodes sharing Supabase
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.loads = 0
+        self.fail_writes = False
+
+    def load(self, user_id, since):
+        self.loads += 1
+        return {bucket: seconds for (user, bucket), seconds in self.rows.items() if user == user_id and bucket >= since}
+
+    def write(self, rows):
+        if self.fail_writes:
+            raise ConnectionError("database unavailable")
+        for row in rows:
+            bucket = quotas.datetime.fromisoformat(row["bucket_start"]).timestamp()
+            key = (row["user_id"], bucket)
+            self.rows[key] = self.rows.get(key, 0.0) + row["cpu_seconds"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [T0 + 3600]
+    monkeypatch.setattr(quotas.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def database():
+    return Database()
+
+
+@pytest.fixture
+def make_tracker(database):
+    trackers = []
+
+    def make(**options):
+        options.setdefault("limit", 10.0)
+        options.setdefault("flush_interval", 3600.0)
+        options.setdefault("refresh_interval", 0.0)
+        tracker = QuotaTracker(database.load, database.write, **options)
+        trackers.append(tracker)
+        return tracker
+
+    yield make
+    for tracker in trackers:
+        tracker.close()
+
+
+def test_quota_status_headers_and_exhaustion():
+    status = QuotaStatus(10.0, 12.5, T0)
+    assert status.remaining == 0.0 and status.exhausted
+    assert status.headers()["X-CPU-Quota-Used"] == "12.500"
+    assert status.headers()["X-CPU-Quota-Reset"] == str(int(T0))
+    assert not QuotaStatus(0.0, 100.0, T0).exhausted
+
+
+def test_unflushed_charges_count_towards_usage(clock, make_tracker):
+    tracker = make_tracker()
+    tracker.charge("u", 4.0)
+    tracker.charge("u", 0.0)
+    tracker.charge("other", 3.0)
+    status = tracker.status("u")
+    assert status.used == 4.0 and not status.exhausted
+    tracker.charge("u", 6.0)
+    assert tracker.status("u").exhausted
+
+
+def test_flushed_usage_is_seen_by_other_nodes(clock, database, make_tracker):
+    first, second = make_tracker(), make_tracker()
+    first.charge("u", 3.0)
+    first.status("u")
+    clock[0] += 1
+    first.flush()
+    assert database.rows == {("u", T0): 3.0}
+    assert second.status("u").used == 3.0
+    # Not counted twice by the node that flushed it
+    assert first.status("u").used == 3.0
+
+
+def test_fixed_window_resets_at_the_next_period(clock, make_tracker):
+    tracker = make_tracker()
+    tracker.charge("u", 8.0)
+    status = tracker.status("u")
+    assert status.reset == T0 + DAY
+    clock[0] = T0 + DAY + 1
+    assert tracker.status("u").used == 0.0
+
+
+def test_rolling_window_drops_the_oldest_bucket(clock, make_tracker):
+    tracker = make_tracker(rolling=True)
+    bucket = DAY / ROLLING_BUCKETS
+    clock[0] = T0 + 10
+    tracker.charge("u", 5.0)
+    clock[0] = T0 + bucket + 10
+    tracker.charge("u", 2.0)
+    status = tracker.status("u")
+    assert status.used == 7.0
+    assert status.reset == T0 + 2 * bucket
+    # A period later the first bucket has left the window
+    clock[0] = T0 + DAY + 10
+    assert tracker.status("u").used == 2.0
+
+
+def test_failed_flush_is_retried(clock, database, make_tracker):
+    tracker = make_tracker()
+    tracker.charge("u", 2.0)
+    database.fail_writes = True
+    tracker.flush()
+    assert database.rows == {}
+    assert tracker.status("u").used == 2.0
+    database.fail_writes = False
+    clock[0] += 1
+    tracker.flush()
+    assert database.rows == {("u", T0): 2.0}
+    assert tracker.status("u").used == 2.0
+
+
+def test_usage_is_reloaded_only_after_refresh_interval(clock, database, make_tracker):
+    tracker = make_tracker(refresh_interval=30.0)
+    tracker.status("u")
+    tracker.status("u")
+    assert database.loads == 1
+    clock[0] += 31
+    tracker.status("u")
+    assert database.loads == 2
+
+
+def test_load_failure_keeps_local_usage(clock, make_tracker):
+    def broken_load(user_id, since):
+        raise ConnectionError("database unavailable")
+
+    tracker = make_tracker()
+    tracker.load = broken_load
+    tracker.charge("u", 1.5)
+    assert tracker.status("u").used == 1.5
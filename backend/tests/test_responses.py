@@ -0,0 +1,113 @@
+import orjson
+from fastapi import Request, Response
+
+from app.models import SubmissionResponse, TestCaseResponse
+from app.responses import row_version_etag, etag_matches, conditional_response, project_rows, trusted_response
+
+
+def make_request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+ROWS = [
+    {"id": 1, "updated_at": "2024-01-01T00:00:00", "title": "a"},
+    {"id": 2, "updated_at": "2024-01-02T00:00:00", "title": "b"},
+]
+
+
+def test_etag_is_quoted_and_stable():
+    etag = row_version_etag(ROWS)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == row_version_etag([dict(row) for row in ROWS])
+
+
+def test_etag_changes_with_version_but_not_other_columns():
+    etag = row_version_etag(ROWS)
+    edited = [dict(ROWS[0], title="changed"), ROWS[1]]
+    assert row_version_etag(edited) == etag
+    bumped = [dict(ROWS[0], updated_at="2024-02-01T00:00:00"), ROWS[1]]
+    assert row_version_etag(bumped) != etag
+
+
+def test_etag_changes_with_order_and_membership():
+    etag = row_version_etag(ROWS)
+    assert row_version_etag(ROWS[::-1]) != etag
+    assert row_version_etag(ROWS[:1]) != etag
+
+
+def test_etag_falls_back_to_created_at():
+    rows = [{"id": 1, "created_at": "2024-01-01T00:00:00"}]
+    later = [{"id": 1, "created_at": "2024-01-02T00:00:00"}]
+    assert row_version_etag(rows) != row_version_etag(later)
+
+
+def test_etag_includes_embedded_row_versions():
+    rows = [{"id": 1, "updated_at": "t1", "problems": {"title": "x", "updated_at": "p1"}}]
+    edited = [{"id": 1, "updated_at": "t1", "problems": {"title": "x", "updated_at": "p2"}}]
+    assert row_version_etag(rows) != row_version_etag(edited)
+
+
+def test_etag_matches_exact_list_weak_and_wildcard():
+    etag = row_version_etag(ROWS)
+    assert etag_matches(make_request(etag), etag)
+    assert etag_matches(make_request(f'"other", {etag}'), etag)
+    assert etag_matches(make_request(f"W/{etag}"), etag)
+    assert etag_matches(make_request("*"), etag)
+
+
+def test_etag_does_not_match_missing_or_different_header():
+    etag = row_version_etag(ROWS)
+    assert not etag_matches(make_request(), etag)
+    assert not etag_matches(make_request('"other"'), etag)
+    assert not etag_matches(make_request(etag.strip('"')), etag)
+
+
+def test_conditional_response_returns_304_on_match():
+    etag = row_version_etag(ROWS)
+    response = Response()
+    not_modified = conditional_response(make_request(etag), response, etag)
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+
+def test_conditional_response_sets_headers_on_miss():
+    etag = row_version_etag(ROWS)
+    response = Response()
+    assert conditional_response(make_request('"stale"'), response, etag) is None
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_trusted_response_keeps_only_model_fields():
+    row = {
+        "id": "t1",
+        "problem_id": "p1",
+        "input_data": "[1]",
+        "expected_output": "1",
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-02T00:00:00",
+        "internal_notes": "secret",
+    }
+    response = Response()
+    response.headers["ETag"] = '"abc"'
+    result = trusted_response([row], response, TestCaseResponse)
+    assert orjson.loads(result.body) == [{
+        "id": "t1",
+        "problem_id": "p1",
+        "input_data": "[1]",
+        "expected_output": "1",
+        "time_limit": None,
+        "failure_count": 0,
+        "created_at": "2024-01-01T00:00:00",
+    }]
+    assert result.headers["etag"] == '"abc"'
+
+
+def test_projection_matches_response_model_validation():
+    row = {
+        "id": "s1", "problem_id": "p1", "solution_id": "so1", "user_id": "u1", "status": "pending",
+        "test_results": [{"test_case_id": "t1", "passed": True}], "submitted_at": "2024-01-01T00:00:00",
+        "all_passed": True, "updated_at": "2024-01-02T00:00:00",
+    }
+    assert project_rows([row], SubmissionResponse) == [SubmissionResponse(**row).model_dump()]
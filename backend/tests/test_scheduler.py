@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.scheduler import LaneScheduler, INTERACTIVE, BULK
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_reservation_keeps_a_slot_free_for_interactive_runs():
+    async def scenario():
+        scheduler = LaneScheduler(3, reserved={INTERACTIVE: 1})
+        await scheduler.acquire(BULK)
+        await scheduler.acquire(BULK)
+        third_bulk = asyncio.ensure_future(scheduler.acquire(BULK))
+        await settle()
+        assert not third_bulk.done()
+        await asyncio.wait_for(scheduler.acquire(INTERACTIVE), 1)
+        assert scheduler.running == {INTERACTIVE: 1, BULK: 2}
+        third_bulk.cancel()
+    run(scenario())
+
+
+def test_freed_slot_goes_to_queued_interactive_before_bulk():
+    async def scenario():
+        scheduler = LaneScheduler(1)
+        await scheduler.acquire(BULK)
+        order = []
+
+        async def job(lane):
+            await scheduler.acquire(lane)
+            order.append(lane)
+            scheduler.release(lane)
+
+        bulk = asyncio.ensure_future(job(BULK))
+        await settle()
+        interactive = asyncio.ensure_future(job(INTERACTIVE))
+        await settle()
+        scheduler.release(BULK)
+        await asyncio.wait_for(asyncio.gather(bulk, interactive), 1)
+        assert order == [INTERACTIVE, BULK]
+    run(scenario())
+
+
+def test_lane_cap_limits_running_jobs():
+    async def scenario():
+        scheduler = LaneScheduler(4, caps={BULK: 2})
+        await scheduler.acquire(BULK)
+        await scheduler.acquire(BULK)
+        waiting = asyncio.ensure_future(scheduler.acquire(BULK))
+        await settle()
+        assert not waiting.done()
+        assert scheduler.status()[BULK] == {"running": 2, "queued": 1, "cap": 2, "reserved": 0}
+        scheduler.release(BULK)
+        await asyncio.wait_for(waiting, 1)
+        assert scheduler.running[BULK] == 2
+    run(scenario())
+
+
+def test_reservation_is_clamped_so_the_lowest_lane_gets_a_slot():
+    scheduler = LaneScheduler(2, reserved={INTERACTIVE: 5})
+    assert scheduler.reserved == {INTERACTIVE: 1, BULK: 0}
+    scheduler.resize(1)
+    assert scheduler.reserved == {INTERACTIVE: 0, BULK: 0}
+
+
+def test_growing_starts_queued_jobs():
+    async def scenario():
+        scheduler = LaneScheduler(1)
+        await scheduler.acquire(INTERACTIVE)
+        waiting = asyncio.ensure_future(scheduler.acquire(INTERACTIVE))
+        await settle()
+        assert scheduler.waiting() == 1 and scheduler.oldest_wait() > 0
+        scheduler.resize(2)
+        await asyncio.wait_for(waiting, 1)
+        assert scheduler.running[INTERACTIVE] == 2
+        assert scheduler.waiting() == 0 and scheduler.oldest_wait() == 0.0
+    run(scenario())
+
+
+def test_cancelled_waiter_does_not_take_a_slot():
+    async def scenario():
+        scheduler = LaneScheduler(1)
+        await scheduler.acquire(INTERACTIVE)
+        waiting = asyncio.ensure_future(scheduler.acquire(INTERACTIVE))
+        await settle()
+        waiting.cancel()
+        await settle()
+        scheduler.release(INTERACTIVE)
+        assert scheduler.running[INTERACTIVE] == 0
+        await asyncio.wait_for(scheduler.acquire(INTERACTIVE), 1)
+    run(scenario())
+
+
+def test_unknown_lane_is_rejected():
+    with pytest.raises(ValueError, match="Unknown lane"):
+        run(LaneScheduler(1).acquire("batch"))
@@ -0,0 +1,123 @@
+import sys
+
+import pytest
+
+from app.executor import execute_code
+from app.structures import (
+    ListNode, TreeNode, build_linked_list, serialize_linked_list, build_tree, serialize_tree,
+    structured_type, namespace
+)
+
+
+@pytest.mark.parametrize("values", [[], [1], [1, 2, 3], ["a", None, 2.5]])
+def test_linked_list_round_trip(values):
+    assert serialize_linked_list(build_linked_list(values)) == values
+
+
+def test_linked_list_none_and_invalid():
+    assert build_linked_list(None) is None
+    with pytest.raises(ValueError, match="Expected list for ListNode"):
+        build_linked_list(5)
+
+
+def test_linked_list_cycle_is_rejected():
+    head = build_linked_list([1, 2, 3])
+    head.next.next.next = head
+    with pytest.raises(ValueError, match="cycle"):
+        serialize_linked_list(head)
+
+
+@pytest.mark.parametrize("values", [
+    [],
+    [1],
+    [3, 9, 20, None, None, 15, 7],
+    [1, None, 2, None, 3],
+    [5, 4, 8, 11, None, 13, 4, 7, 2, None, None, None, 1],
+])
+def test_tree_round_trip(values):
+    assert serialize_tree(build_tree(values)) == values
+
+
+def test_tree_shape():
+    root = build_tree([3, 9, 20, None, None, 15, 7])
+    assert (root.val, root.left.val, root.right.val) == (3, 9, 20)
+    assert root.left.left is None and root.left.right is None
+    assert (root.right.left.val, root.right.right.val) == (15, 7)
+
+
+def test_tree_trailing_nulls_are_dropped_and_null_root_is_empty():
+    assert serialize_tree(build_tree([1, 2, None, None, None])) == [1, 2]
+    assert build_tree([None]) is None
+    assert serialize_tree(None) == []
+
+
+def test_tree_cycle_is_rejected():
+    root = build_tree([1, 2])
+    root.left.left = root
+    with pytest.raises(ValueError, match="cycle"):
+        serialize_tree(root)
+
+
+def test_deep_structures_do_not_recurse():
+    depth = sys.getrecursionlimit() * 10
+    assert len(serialize_linked_list(build_linked_list(list(range(depth))))) == depth
+    # A right spine: every node has a null left child
+    spine = [0]
+    for value in range(1, depth):
+        spine += [None, value]
+    assert serialize_tree(build_tree(spine)) == spine
+
+
+@pytest.mark.parametrize("annotation, expected", [
+    ("TreeNode", "TreeNode"),
+    ("Optional[ListNode]", "ListNode"),
+    ("typing.Optional[TreeNode]", "TreeNode"),
+    ("TreeNode | None", "TreeNode"),
+    ("None | ListNode", "ListNode"),
+    ("'TreeNode'", "TreeNode"),
+    ("Optional['ListNode']", "ListNode"),
+    ("List[int]", None),
+    ("int", None),
+])
+def test_structured_type(annotation, expected):
+    assert structured_type(annotation) == expected
+
+
+def test_namespace_predefines_classes_and_typing_names():
+    names = namespace()
+    assert names["ListNode"] is ListNode and names["TreeNode"] is TreeNode
+    for name in ("Optional", "List", "Dict", "Tuple", "Any"):
+        assert name in names
+
+
+def test_executor_builds_and_serializes_structures():
+    code = (
+        "def invert(root: Optional[TreeNode]) -> Optional[TreeNode]:\n"
+        "    stack = [root]\n"
+        "    while stack:\n"
+        "        node = stack.pop()\n"
+        "        if node:\n"
+        "            node.left, node.right = node.right, node.left\n"
+        "            stack += [node.left, node.right]\n"
+        "    return root\n"
+    )
+    result = execute_code(
+        code, "[[4, 2, 7, 1, 3, 6, 9]]", "[4, 7, 2, 9, 6, 3, 1]",
+        function_signature="def invert(root: Optional[TreeNode]) -> Optional[TreeNode]:"
+    )
+    assert result["passed"], result
+
+
+def test_executor_reverses_linked_list():
+    code = (
+        "def reverse(head: Optional[ListNode]) -> Optional[ListNode]:\n"
+        "    previous = None\n"
+        "    while head:\n"
+        "        head.next, previous, head = previous, head, head.next\n"
+        "    return previous\n"
+    )
+    result = execute_code(
+        code, "[[1, 2, 3]]", "[3, 2, 1]",
+        function_signature="def reverse(head: Optional[ListNode]) -> Optional[ListNode]:"
+    )
+    assert result["passed"], result
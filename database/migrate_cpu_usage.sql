@@ -0,0 +1,30 @@
+-- Migration: Per-user CPU-second accounting for execution quotas
+-- Run this in Supabase SQL Editor
+
+-- CPU seconds used per user and time bucket (a quota period, or 1/24 of it
+-- with CPU_QUOTA_ROLLING), added to in batches by the API (app/quotas.py)
+CREATE TABLE IF NOT EXISTS cpu_usage (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    cpu_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, bucket_start)
+);
+
+ALTER TABLE cpu_usage ENABLE ROW LEVEL SECURITY;
+
+-- Add a batch of usage ([{"user_id", "bucket_start", "cpu_seconds"}]) in one
+-- statement, so API nodes flushing at the same time never lose each other's counts
+CREATE OR REPLACE FUNCTION add_cpu_usage(p_usage JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO cpu_usage (user_id, bucket_start, cpu_seconds)
+    SELECT user_id, bucket_start, SUM(cpu_seconds)
+    FROM jsonb_to_recordset(p_usage) AS u(user_id UUID, bucket_start TIMESTAMPTZ, cpu_seconds DOUBLE PRECISION)
+    GROUP BY user_id, bucket_start
+    ON CONFLICT (user_id, bucket_start)
+    DO UPDATE SET cpu_seconds = cpu_usage.cpu_seconds + EXCLUDED.cpu_seconds;
+$$;
+
+-- Only the API (service role) may add usage
+REVOKE EXECUTE ON FUNCTION add_cpu_usage(JSONB) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,40 @@
+-- Migration: Shared queue for remote execution workers
+-- Run this in Supabase SQL Editor (only needed with EXECUTION_MODE=remote and EXECUTION_BROKER_URL=supabase)
+
+CREATE TABLE IF NOT EXISTS execution_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    payload JSONB NOT NULL,
+    result JSONB,
+    error TEXT,
+    worker_id TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    claimed_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_execution_jobs_queued ON execution_jobs(created_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_execution_jobs_running ON execution_jobs(claimed_at) WHERE status = 'running';
+
+-- Jobs are only touched by the backend and workers through the service role
+ALTER TABLE execution_jobs ENABLE ROW LEVEL SECURITY;
+
+-- Atomically hand the oldest queued job to a worker; SKIP LOCKED lets
+-- concurrent workers claim different jobs without blocking each other
+CREATE OR REPLACE FUNCTION claim_execution_job(p_worker_id TEXT)
+RETURNS SETOF execution_jobs
+LANGUAGE sql
+AS $$
+    UPDATE execution_jobs
+    SET status = 'running', worker_id = p_worker_id, claimed_at = NOW()
+    WHERE id = (
+        SELECT id FROM execution_jobs
+        WHERE status = 'queued'
+        ORDER BY created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING *;
+$$;
+
+REVOKE EXECUTE ON FUNCTION claim_execution_job(TEXT) FROM PUBLIC, anon, authenticated;
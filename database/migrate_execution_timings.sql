@@ -0,0 +1,85 @@
+-- Migration: Execution timing history with per-problem percentile reports
+-- Run this in Supabase SQL Editor
+
+-- One row per executed test, appended in batches by the API (app/timings.py).
+-- No foreign keys, so history survives deleted test cases and inserts stay cheap
+CREATE TABLE IF NOT EXISTS execution_timings (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    problem_id UUID NOT NULL,
+    test_case_id UUID NOT NULL,
+    code_hash TEXT NOT NULL,       -- normalized_hash of the solution
+    node TEXT NOT NULL,            -- Host that executed the test
+    deploy_id TEXT NOT NULL,       -- DEPLOY_ID of the API that dispatched it
+    execution_time REAL NOT NULL,  -- Seconds
+    passed BOOLEAN NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_execution_timings_problem ON execution_timings(problem_id, recorded_at);
+-- Rows arrive in time order, so a BRIN index covers time-range scans at a tiny size
+CREATE INDEX IF NOT EXISTS idx_execution_timings_recorded_at ON execution_timings USING BRIN (recorded_at);
+
+ALTER TABLE execution_timings ENABLE ROW LEVEL SECURITY;
+
+-- Percentiles of a problem's execution times overall, per test case and per
+-- deploy, optionally only since a given time
+CREATE OR REPLACE FUNCTION execution_timing_report(
+    p_problem_id UUID,
+    p_since TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH timings AS (
+        SELECT test_case_id, deploy_id, recorded_at, execution_time
+        FROM execution_timings
+        WHERE problem_id = p_problem_id
+          AND (p_since IS NULL OR recorded_at >= p_since)
+    )
+    SELECT jsonb_build_object(
+        'overall', (
+            SELECT jsonb_build_object(
+                'executions', COUNT(*),
+                'p50', percentile_cont(0.50) WITHIN GROUP (ORDER BY execution_time),
+                'p95', percentile_cont(0.95) WITHIN GROUP (ORDER BY execution_time),
+                'p99', percentile_cont(0.99) WITHIN GROUP (ORDER BY execution_time),
+                'max', MAX(execution_time)
+            )
+            FROM timings
+        ),
+        'test_cases', (
+            SELECT COALESCE(jsonb_agg(per_test ORDER BY per_test.p95 DESC), '[]'::jsonb)
+            FROM (
+                SELECT
+                    test_case_id,
+                    COUNT(*) AS executions,
+                    percentile_cont(0.50) WITHIN GROUP (ORDER BY execution_time) AS p50,
+                    percentile_cont(0.95) WITHIN GROUP (ORDER BY execution_time) AS p95,
+                    percentile_cont(0.99) WITHIN GROUP (ORDER BY execution_time) AS p99,
+                    MAX(execution_time) AS max
+                FROM timings
+                GROUP BY test_case_id
+            ) AS per_test
+        ),
+        'deploys', (
+            SELECT COALESCE(jsonb_agg(per_deploy ORDER BY per_deploy.last_seen DESC), '[]'::jsonb)
+            FROM (
+                SELECT
+                    deploy_id,
+                    MIN(recorded_at) AS first_seen,
+                    MAX(recorded_at) AS last_seen,
+                    COUNT(*) AS executions,
+                    percentile_cont(0.50) WITHIN GROUP (ORDER BY execution_time) AS p50,
+                    percentile_cont(0.95) WITHIN GROUP (ORDER BY execution_time) AS p95,
+                    percentile_cont(0.99) WITHIN GROUP (ORDER BY execution_time) AS p99,
+                    MAX(execution_time) AS max
+                FROM timings
+                GROUP BY deploy_id
+            ) AS per_deploy
+        )
+    );
+$$;
+
+-- Only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION execution_timing_report(UUID, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,10 @@
+-- Migration: Optional instruction budgets for load-independent verdicts
+-- Run this in Supabase SQL Editor
+
+-- Maximum line events a solution may execute per test; NULL keeps the
+-- wall-clock time limit as the only limit
+ALTER TABLE problems
+ADD COLUMN IF NOT EXISTS instruction_budget BIGINT CHECK (instruction_budget IS NULL OR instruction_budget > 0);
+
+COMMENT ON COLUMN problems.instruction_budget IS
+'Per-test budget of executed line events; verdicts using it do not depend on host load';
@@ -0,0 +1,31 @@
+-- Migration: Priority lanes for the remote execution queue
+-- Run this in Supabase SQL Editor (after migrate_execution_jobs.sql)
+
+-- 0 = interactive runs, 1 = bulk/admin grading; lower values are claimed first
+ALTER TABLE execution_jobs
+ADD COLUMN IF NOT EXISTS priority SMALLINT NOT NULL DEFAULT 0;
+
+DROP INDEX IF EXISTS idx_execution_jobs_queued;
+CREATE INDEX IF NOT EXISTS idx_execution_jobs_priority ON execution_jobs(priority, created_at) WHERE status = 'queued';
+
+-- Claim the oldest job of the highest priority, optionally only jobs up to
+-- p_max_priority (workers keep some consumers for interactive jobs only)
+DROP FUNCTION IF EXISTS claim_execution_job(TEXT);
+CREATE OR REPLACE FUNCTION claim_execution_job(p_worker_id TEXT, p_max_priority INTEGER DEFAULT NULL)
+RETURNS SETOF execution_jobs
+LANGUAGE sql
+AS $$
+    UPDATE execution_jobs
+    SET status = 'running', worker_id = p_worker_id, claimed_at = NOW()
+    WHERE id = (
+        SELECT id FROM execution_jobs
+        WHERE status = 'queued'
+          AND (p_max_priority IS NULL OR priority <= p_max_priority)
+        ORDER BY priority, created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING *;
+$$;
+
+REVOKE EXECUTE ON FUNCTION claim_execution_job(TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,25 @@
+-- Migration: Row versions for ETag conditional GETs
+-- Run this in Supabase SQL Editor
+
+-- Every table served through a conditional GET needs an updated_at column
+ALTER TABLE problems
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+ALTER TABLE test_cases
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+ALTER TABLE submissions
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+-- Keep them current with the existing update_updated_at_column() trigger function
+DROP TRIGGER IF EXISTS update_problems_updated_at ON problems;
+CREATE TRIGGER update_problems_updated_at BEFORE UPDATE ON problems
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_test_cases_updated_at ON test_cases;
+CREATE TRIGGER update_test_cases_updated_at BEFORE UPDATE ON test_cases
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_submissions_updated_at ON submissions;
+CREATE TRIGGER update_submissions_updated_at BEFORE UPDATE ON submissions
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
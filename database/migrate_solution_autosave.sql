@@ -0,0 +1,27 @@
+-- Migration: Delta-based autosave for solutions
+-- Run this in Supabase SQL Editor
+
+-- One solution per user and problem, so autosave can upsert on it
+CREATE UNIQUE INDEX IF NOT EXISTS idx_solutions_problem_user ON solutions(problem_id, user_id);
+
+-- Store the patched code only if the stored code still has the version the
+-- patches were made against (SHA-256 hex of the UTF-8 text). A NULL base
+-- version only creates a new solution. Returns no row on a version conflict.
+CREATE OR REPLACE FUNCTION autosave_solution(
+    p_problem_id UUID,
+    p_user_id UUID,
+    p_base_version TEXT,
+    p_solution_code TEXT
+)
+RETURNS TABLE (id UUID, updated_at TIMESTAMPTZ)
+LANGUAGE sql
+AS $$
+    INSERT INTO solutions AS s (problem_id, user_id, solution_code)
+    VALUES (p_problem_id, p_user_id, p_solution_code)
+    ON CONFLICT (problem_id, user_id) DO UPDATE
+        SET solution_code = EXCLUDED.solution_code,
+            updated_at = NOW()
+        WHERE p_base_version IS NOT NULL
+          AND encode(sha256(convert_to(s.solution_code, 'UTF8')), 'hex') = p_base_version
+    RETURNING s.id, s.updated_at;
+$$;
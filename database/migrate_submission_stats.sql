@@ -0,0 +1,54 @@
+-- Migration: Aggregate statistics function for the admin dashboard
+-- Run this in Supabase SQL Editor (after migrate_submission_summary.sql)
+
+-- Returns status counts, per-problem pass rates and execution-time percentiles
+-- computed entirely in the database, so the result size does not grow with
+-- the number of submissions
+CREATE OR REPLACE FUNCTION submission_stats()
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'total_submissions', (SELECT COUNT(*) FROM submissions),
+        'status_counts', (
+            SELECT COALESCE(jsonb_object_agg(status, n), '{}'::jsonb)
+            FROM (
+                SELECT status, COUNT(*) AS n
+                FROM submissions
+                GROUP BY status
+            ) AS counts
+        ),
+        'problems', (
+            SELECT COALESCE(jsonb_agg(per_problem ORDER BY per_problem.submissions DESC), '[]'::jsonb)
+            FROM (
+                SELECT
+                    s.problem_id,
+                    p.title AS problem_title,
+                    COUNT(*) AS submissions,
+                    COUNT(*) FILTER (WHERE s.all_passed AND s.total_count > 0) AS passing,
+                    ROUND(
+                        (COUNT(*) FILTER (WHERE s.all_passed AND s.total_count > 0))::numeric / COUNT(*),
+                        4
+                    ) AS pass_rate
+                FROM submissions s
+                JOIN problems p ON p.id = s.problem_id
+                GROUP BY s.problem_id, p.title
+            ) AS per_problem
+        ),
+        'execution_time', (
+            SELECT jsonb_build_object(
+                'p50', percentile_cont(0.50) WITHIN GROUP (ORDER BY max_execution_time),
+                'p90', percentile_cont(0.90) WITHIN GROUP (ORDER BY max_execution_time),
+                'p95', percentile_cont(0.95) WITHIN GROUP (ORDER BY max_execution_time),
+                'p99', percentile_cont(0.99) WITHIN GROUP (ORDER BY max_execution_time),
+                'max', MAX(max_execution_time)
+            )
+            FROM submissions
+            WHERE total_count > 0
+        )
+    );
+$$;
+
+-- Only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION submission_stats() FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,40 @@
+-- Migration: Materialized summary columns for submissions
+-- Run this in Supabase SQL Editor
+
+-- Summary of test_results, maintained by the backend whenever results are written
+ALTER TABLE submissions
+ADD COLUMN IF NOT EXISTS passed_count INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_count INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS max_execution_time DOUBLE PRECISION NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_execution_time DOUBLE PRECISION NOT NULL DEFAULT 0;
+
+-- PostgREST cannot compare two columns, so expose the verdict as its own column
+ALTER TABLE submissions
+ADD COLUMN IF NOT EXISTS all_passed BOOLEAN GENERATED ALWAYS AS (passed_count = total_count) STORED;
+
+-- Backfill existing submissions from their test_results
+UPDATE submissions s
+SET passed_count = summary.passed_count,
+    total_count = summary.total_count,
+    max_execution_time = summary.max_execution_time,
+    total_execution_time = summary.total_execution_time
+FROM (
+    SELECT
+        id,
+        COUNT(r.value) FILTER (WHERE (r.value ->> 'passed')::boolean) AS passed_count,
+        COUNT(r.value) AS total_count,
+        COALESCE(MAX((r.value ->> 'execution_time')::double precision), 0) AS max_execution_time,
+        COALESCE(SUM((r.value ->> 'execution_time')::double precision), 0) AS total_execution_time
+    FROM submissions
+    LEFT JOIN LATERAL jsonb_array_elements(test_results) AS r(value) ON TRUE
+    GROUP BY id
+) AS summary
+WHERE s.id = summary.id;
+
+-- Indexes for filtering and sorting on the summary columns
+CREATE INDEX IF NOT EXISTS idx_submissions_submitted_at ON submissions(submitted_at DESC);
+CREATE INDEX IF NOT EXISTS idx_submissions_all_passed ON submissions(all_passed, submitted_at DESC);
+CREATE INDEX IF NOT EXISTS idx_submissions_passed_count ON submissions(passed_count);
+CREATE INDEX IF NOT EXISTS idx_submissions_total_count ON submissions(total_count);
+CREATE INDEX IF NOT EXISTS idx_submissions_max_execution_time ON submissions(max_execution_time DESC);
+CREATE INDEX IF NOT EXISTS idx_submissions_total_execution_time ON submissions(total_execution_time DESC);
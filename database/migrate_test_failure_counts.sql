@@ -0,0 +1,39 @@
+-- Migration: Per-test failure counts for fail-fast test ordering
+-- Run this in Supabase SQL Editor
+
+-- How many runs have failed this test; fail-fast runs try often-failing tests first
+ALTER TABLE test_cases
+ADD COLUMN IF NOT EXISTS failure_count BIGINT NOT NULL DEFAULT 0;
+
+-- Add p_count failures to each test case in one statement, without a
+-- read-modify-write race between concurrent runs
+CREATE OR REPLACE FUNCTION record_test_failures(
+    p_test_case_ids UUID[],
+    p_count INT DEFAULT 1
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE test_cases
+    SET failure_count = failure_count + p_count
+    WHERE id = ANY(p_test_case_ids);
+$$;
+
+-- Only the API (service role) may record failures
+REVOKE EXECUTE ON FUNCTION record_test_failures(UUID[], INT) FROM PUBLIC, anon, authenticated;
+
+-- failure_count is bookkeeping, not content: bumping it keeps the row's
+-- updated_at, so test case ETags (database/migrate_row_versions.sql) stay valid
+CREATE OR REPLACE FUNCTION update_test_cases_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'failure_count' - 'updated_at') IS DISTINCT FROM (to_jsonb(OLD) - 'failure_count' - 'updated_at') THEN
+        NEW.updated_at = NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_test_cases_updated_at ON test_cases;
+CREATE TRIGGER update_test_cases_updated_at BEFORE UPDATE ON test_cases
+    FOR EACH ROW EXECUTE FUNCTION update_test_cases_updated_at_column();
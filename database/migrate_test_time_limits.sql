@@ -0,0 +1,10 @@
+-- Migration: Per-test time limits calibrated from a reference solution
+-- Run this in Supabase SQL Editor
+
+-- Seconds a solution may run on this test; NULL uses the default limit
+-- (DEFAULT_TIME_LIMIT). Set by POST /api/admin/calibrate/{problem_id}
+ALTER TABLE test_cases
+ADD COLUMN IF NOT EXISTS time_limit DOUBLE PRECISION CHECK (time_limit IS NULL OR time_limit > 0);
+
+COMMENT ON COLUMN test_cases.time_limit IS
+'Per-test time limit in seconds, a multiple of a reference solution''s median time';
@@ -7,22 +7,59 @@ const api = axios.create({
   headers: {
     'Content-Type': 'application/json',
   },
+  // 304 Not Modified is answered from the ETag cache below
+  validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
 })
 
+// Last ETag and body seen for each GET URL
+const etagCache = new Map()
+
+const cacheKey = (config) => `${config.url}?${new URLSearchParams(config.params || {})}`
+
 // Add auth token to requests
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('access_token')
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+
+  // Revalidate cached GET responses instead of downloading them again
+  if (config.method === 'get') {
+    const cached = etagCache.get(cacheKey(config))
+    if (cached) {
+      config.headers['If-None-Match'] = cached.etag
+    }
+  }
   return config
 })
 
+// Serve 304 responses from the cache and remember new ETags
+api.interceptors.response.use((response) => {
+  if (response.config.method !== 'get') {
+    return response
+  }
+
+  const key = cacheKey(response.config)
+  if (response.status === 304) {
+    const cached = etagCache.get(key)
+    if (cached) {
+      return { ...response, status: 200, data: cached.data }
+    }
+  }
+
+  const etag = response.headers.etag
+  if (etag) {
+    etagCache.set(key, { etag, data: response.data })
+  }
+  return response
+})
+
 // Handle 401 responses
 api.interceptors.response.use(
   (response) => response,
   (error) => {
     if (error.response?.status === 401) {
+      etagCache.clear()
       localStorage.removeItem('access_token')
       localStorage.removeItem('user')
       window.location.href = '/login'
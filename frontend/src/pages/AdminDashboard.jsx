@@ -2,21 +2,44 @@ import React, { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import api from '../config/api'
 
+const PAGE_SIZE = 50
+
 const AdminDashboard = () => {
   const [submissions, setSubmissions] = useState([])
+  const [stats, setStats] = useState(null)
   const [filter, setFilter] = useState('all')
+  const [page, setPage] = useState(0)
+  const [hasNextPage, setHasNextPage] = useState(false)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState('')
 
+  useEffect(() => {
+    fetchStats()
+  }, [])
+
   useEffect(() => {
     fetchSubmissions()
-  }, [filter])
+  }, [filter, page])
+
+  const fetchStats = async () => {
+    try {
+      const response = await api.get('/api/admin/stats')
+      setStats(response.data)
+    } catch (err) {
+      console.error(err)
+    }
+  }
 
   const fetchSubmissions = async () => {
     try {
-      const params = filter !== 'all' ? `?status_filter=${filter}` : ''
-      const response = await api.get(`/api/admin/submissions${params}`)
-      setSubmissions(response.data)
+      // One row more than a page tells whether there is a next page
+      const params = new URLSearchParams({ limit: PAGE_SIZE + 1, offset: page * PAGE_SIZE, include_code: false })
+      if (filter !== 'all') {
+        params.set('status_filter', filter)
+      }
+      const response = await api.get(`/api/admin/submissions?${params}`)
+      setSubmissions(response.data.slice(0, PAGE_SIZE))
+      setHasNextPage(response.data.length > PAGE_SIZE)
     } catch (err) {
       setError('Failed to load submissions')
       console.error(err)
@@ -25,6 +48,11 @@ const AdminDashboard = () => {
     }
   }
 
+  const changeFilter = (value) => {
+    setFilter(value)
+    setPage(0)
+  }
+
   const getStatusBadge = (status) => {
     const baseClasses = 'px-3 py-1 rounded-full text-sm font-semibold'
     
@@ -59,9 +87,36 @@ const AdminDashboard = () => {
         </div>
       )}
 
+      {stats && (
+        <div className="grid grid-cols-2 gap-4 mb-6 sm:grid-cols-5">
+          <div className="bg-white shadow rounded-lg p-4">
+            <div className="text-sm text-gray-500">Total</div>
+            <div className="text-2xl font-bold text-gray-900">{stats.total_submissions}</div>
+          </div>
+          <div className="bg-white shadow rounded-lg p-4">
+            <div className="text-sm text-gray-500">Pending</div>
+            <div className="text-2xl font-bold text-yellow-600">{stats.status_counts.pending || 0}</div>
+          </div>
+          <div className="bg-white shadow rounded-lg p-4">
+            <div className="text-sm text-gray-500">Approved</div>
+            <div className="text-2xl font-bold text-green-600">{stats.status_counts.approved || 0}</div>
+          </div>
+          <div className="bg-white shadow rounded-lg p-4">
+            <div className="text-sm text-gray-500">Rejected</div>
+            <div className="text-2xl font-bold text-red-600">{stats.status_counts.rejected || 0}</div>
+          </div>
+          <div className="bg-white shadow rounded-lg p-4">
+            <div className="text-sm text-gray-500">p95 slowest test</div>
+            <div className="text-2xl font-bold text-gray-900">
+              {stats.execution_time.p95 != null ? `${(stats.execution_time.p95 * 1000).toFixed(1)}ms` : '-'}
+            </div>
+          </div>
+        </div>
+      )}
+
       <div className="mb-4 flex space-x-2">
         <button
-          onClick={() => setFilter('all')}
+          onClick={() => changeFilter('all')}
           className={`px-4 py-2 rounded ${
             filter === 'all' ? 'bg-blue-600 text-white' : 'bg-gray-200 text-gray-700'
           }`}
@@ -69,7 +124,7 @@ const AdminDashboard = () => {
           All
         </button>
         <button
-          onClick={() => setFilter('pending')}
+          onClick={() => changeFilter('pending')}
           className={`px-4 py-2 rounded ${
             filter === 'pending' ? 'bg-yellow-600 text-white' : 'bg-gray-200 text-gray-700'
           }`}
@@ -77,7 +132,7 @@ const AdminDashboard = () => {
           Pending
         </button>
         <button
-          onClick={() => setFilter('approved')}
+          onClick={() => changeFilter('approved')}
           className={`px-4 py-2 rounded ${
             filter === 'approved' ? 'bg-green-600 text-white' : 'bg-gray-200 text-gray-700'
           }`}
@@ -85,7 +140,7 @@ const AdminDashboard = () => {
           Approved
         </button>
         <button
-          onClick={() => setFilter('rejected')}
+          onClick={() => changeFilter('rejected')}
           className={`px-4 py-2 rounded ${
             filter === 'rejected' ? 'bg-red-600 text-white' : 'bg-gray-200 text-gray-700'
           }`}
@@ -122,8 +177,8 @@ const AdminDashboard = () => {
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
               {submissions.map((submission) => {
-                const passedTests = submission.test_results?.filter(r => r.passed).length || 0
-                const totalTests = submission.test_results?.length || 0
+                const passedTests = submission.passed_count ?? 0
+                const totalTests = submission.total_count ?? 0
                 
                 return (
                   <tr key={submission.id}>
@@ -162,6 +217,26 @@ const AdminDashboard = () => {
           </table>
         </div>
       )}
+
+      {(page > 0 || hasNextPage) && (
+        <div className="mt-4 flex items-center justify-between">
+          <button
+            onClick={() => setPage(page - 1)}
+            disabled={page === 0}
+            className="px-4 py-2 rounded bg-gray-200 text-gray-700 disabled:opacity-50"
+          >
+            Previous
+          </button>
+          <span className="text-sm text-gray-600">Page {page + 1}</span>
+          <button
+            onClick={() => setPage(page + 1)}
+            disabled={!hasNextPage}
+            className="px-4 py-2 rounded bg-gray-200 text-gray-700 disabled:opacity-50"
+          >
+            Next
+          </button>
+        </div>
+      )}
     </div>
   )
 }
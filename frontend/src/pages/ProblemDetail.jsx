@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react'
+import React, { useState, useEffect, useRef } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
 import Editor from '@monaco-editor/react'
 import api from '../config/api'
@@ -17,13 +17,28 @@ const ProblemDetail = () => {
   const [loading, setLoading] = useState(true)
   const [executing, setExecuting] = useState(false)
   const [submitting, setSubmitting] = useState(false)
+  const [stressing, setStressing] = useState(false)
+  const [importing, setImporting] = useState(false)
   const [error, setError] = useState('')
   const [success, setSuccess] = useState('')
+  // Last code stored on the server and its version, the base for autosave patches
+  const saved = useRef({ code: null, version: null })
+  // Stored solution that changed under an autosave and overlaps local edits; autosave waits until it's resolved
+  const [conflict, setConflict] = useState(null)
+  // In-flight "Run Tests" request; aborting it cancels the run on the server
+  const runController = useRef(null)
 
   useEffect(() => {
     fetchProblemData()
+    return () => runController.current?.abort()
   }, [id])
 
+  useEffect(() => {
+    if (conflict || saved.current.code === null || code === saved.current.code) return
+    const timer = setTimeout(autosave, 3000)
+    return () => clearTimeout(timer)
+  }, [code, conflict])
+
   const fetchProblemData = async () => {
     try {
       const [problemRes, testCasesRes] = await Promise.all([
@@ -39,6 +54,7 @@ const ProblemDetail = () => {
         const solutionRes = await api.get(`/api/solutions/${id}`)
         setSolution(solutionRes.data)
         setCode(solutionRes.data.solution_code)
+        saved.current = { code: solutionRes.data.solution_code, version: solutionRes.data.version }
       } catch (err) {
         // No solution exists - populate with function signature template
         if (problemRes.data.function_signature) {
@@ -49,6 +65,7 @@ const ProblemDetail = () => {
     pass
 `
           setCode(template)
+          saved.current = { code: template, version: null }
         }
       }
     } catch (err) {
@@ -59,6 +76,61 @@ const ProblemDetail = () => {
     }
   }
 
+  // Single edit turning base into text: base[start:end] is replaced by text
+  const diff = (base, text) => {
+    let start = 0
+    while (start < base.length && start < text.length && base[start] === text[start]) start++
+    let end = 0
+    while (
+      end < base.length - start &&
+      end < text.length - start &&
+      base[base.length - 1 - end] === text[text.length - 1 - end]
+    ) end++
+    return { start, end: base.length - end, text: text.slice(start, text.length - end) }
+  }
+
+  const autosave = async () => {
+    const current = code
+    // Without a version nothing is stored yet and the patch starts from empty text
+    const base = saved.current.version ? saved.current.code : ''
+    const patch = diff(base, current)
+
+    try {
+      const response = await api.patch('/api/solutions/autosave', {
+        problem_id: id,
+        base_version: saved.current.version,
+        patches: [patch]
+      })
+      saved.current = { code: current, version: response.data.version }
+    } catch (err) {
+      if (err.response?.status === 409) {
+        // Saved from somewhere else in the meantime: reload the stored code and
+        // merge the local edit into it when the two don't touch the same text
+        try {
+          const stored = (await api.get(`/api/solutions/${id}`)).data
+          const remote = diff(base, stored.solution_code)
+          saved.current = { code: stored.solution_code, version: stored.version }
+          setSolution(stored)
+          if (remote.start === remote.end && !remote.text) return
+          if (patch.end < remote.start) {
+            setCode(current.slice(0, current.length - (base.length - patch.end)) + stored.solution_code.slice(patch.end))
+          } else if (remote.end < patch.start) {
+            setCode(stored.solution_code.slice(0, patch.start + remote.text.length - (remote.end - remote.start)) + current.slice(patch.start))
+          } else {
+            setConflict(stored)
+          }
+        } catch (loadErr) {
+          console.error(loadErr)
+        }
+      }
+    }
+  }
+
+  const handleLoadStored = () => {
+    setCode(conflict.solution_code)
+    setConflict(null)
+  }
+
   const handleSaveSolution = async () => {
     try {
       const response = await api.post('/api/solutions', {
@@ -66,6 +138,8 @@ const ProblemDetail = () => {
         solution_code: code
       })
       setSolution(response.data)
+      saved.current = { code, version: response.data.version }
+      setConflict(null)
       setSuccess('Solution saved!')
       setTimeout(() => setSuccess(''), 3000)
     } catch (err) {
@@ -95,6 +169,36 @@ const ProblemDetail = () => {
     }
   }
 
+  const handleImportTestCases = async (e) => {
+    const file = e.target.files[0]
+    e.target.value = ''
+    if (!file) return
+
+    setImporting(true)
+    setError('')
+
+    try {
+      const isCsv = file.name.toLowerCase().endsWith('.csv')
+      const response = await api.post(`/api/test-cases/${id}/import`, file, {
+        headers: { 'Content-Type': isCsv ? 'text/csv' : 'application/x-ndjson' }
+      })
+      const { imported, failed, errors } = response.data
+      const testCasesRes = await api.get(`/api/test-cases/${id}`)
+      setTestCases(testCasesRes.data)
+      if (failed) {
+        const details = errors.slice(0, 5).map((row) => `row ${row.row}: ${row.error}`).join('; ')
+        setError(`Imported ${imported} test case(s), ${failed} row(s) rejected: ${details}`)
+      } else {
+        setSuccess(`Imported ${imported} test case(s)`)
+        setTimeout(() => setSuccess(''), 3000)
+      }
+    } catch (err) {
+      setError(err.response?.data?.detail || 'Failed to import test cases')
+    } finally {
+      setImporting(false)
+    }
+  }
+
   const handleDeleteTestCase = async (testCaseId) => {
     try {
       await api.delete(`/api/test-cases/${testCaseId}`)
@@ -112,6 +216,10 @@ const ProblemDetail = () => {
       return
     }
 
+    runController.current?.abort()
+    const controller = new AbortController()
+    runController.current = controller
+
     setExecuting(true)
     setError('')
     setTestResults(null)
@@ -125,14 +233,43 @@ const ProblemDetail = () => {
         test_cases: testCases
       }, {
         params: {
-          function_signature: problem?.function_signature
-        }
+          function_signature: problem?.function_signature,
+          instruction_budget: problem?.instruction_budget ?? undefined
+        },
+        signal: controller.signal
       })
       setTestResults(response.data)
     } catch (err) {
+      if (controller.signal.aborted) return
       setError(err.response?.data?.detail || 'Failed to execute code')
     } finally {
-      setExecuting(false)
+      if (runController.current === controller) {
+        runController.current = null
+        setExecuting(false)
+      }
+    }
+  }
+
+  const handleGenerateStressTests = async () => {
+    setStressing(true)
+    setError('')
+
+    try {
+      const response = await api.post('/api/test-cases/stress', {
+        problem_id: id,
+        solution_code: code
+      })
+      setTestCases([...testCases, ...response.data.created])
+      const timedOut = response.data.runs.filter(run => run.timed_out).length
+      setSuccess(
+        `Added ${response.data.created.length} stress test case(s)` +
+        (timedOut ? `; ${timedOut} input(s) timed out even at the maximum time limit` : '')
+      )
+      setTimeout(() => setSuccess(''), 3000)
+    } catch (err) {
+      setError(err.response?.data?.detail || 'Failed to generate stress tests')
+    } finally {
+      setStressing(false)
     }
   }
 
@@ -180,6 +317,26 @@ const ProblemDetail = () => {
         </div>
       )}
 
+      {conflict && (
+        <div className="bg-yellow-50 border border-yellow-200 text-yellow-800 px-4 py-3 rounded mb-4 flex items-center justify-between">
+          <span>This solution was changed somewhere else while you were editing. Autosave is paused.</span>
+          <span className="space-x-2">
+            <button
+              onClick={handleLoadStored}
+              className="bg-yellow-200 hover:bg-yellow-300 px-3 py-1 rounded text-sm font-medium"
+            >
+              Load saved version
+            </button>
+            <button
+              onClick={handleSaveSolution}
+              className="bg-yellow-200 hover:bg-yellow-300 px-3 py-1 rounded text-sm font-medium"
+            >
+              Keep mine
+            </button>
+          </span>
+        </div>
+      )}
+
       {success && (
         <div className="bg-green-50 border border-green-200 text-green-700 px-4 py-3 rounded mb-4">
           {success}
@@ -267,6 +424,16 @@ const ProblemDetail = () => {
                 >
                   Add Test Case
                 </button>
+                <label className="block w-full text-center bg-gray-100 hover:bg-gray-200 text-gray-700 py-2 rounded text-sm cursor-pointer">
+                  {importing ? 'Importing...' : 'Import from JSONL/CSV'}
+                  <input
+                    type="file"
+                    accept=".jsonl,.ndjson,.json,.csv"
+                    className="hidden"
+                    disabled={importing}
+                    onChange={handleImportTestCases}
+                  />
+                </label>
               </div>
             </div>
           </div>
@@ -283,7 +450,12 @@ const ProblemDetail = () => {
                     }`}
                   >
                     <div className="flex justify-between items-center mb-2">
-                      <span className="font-semibold">Test Case {index + 1}</span>
+                      <span className="font-semibold">
+                        Test Case {index + 1}
+                        {result.cost != null && (
+                          <span className="ml-2 text-xs font-normal text-gray-500">cost {result.cost}</span>
+                        )}
+                      </span>
                       <span className={`text-sm font-semibold ${result.passed ? 'text-green-700' : 'text-red-700'}`}>
                         {result.passed ? '✓ PASSED' : '✗ FAILED'}
                       </span>
@@ -362,6 +534,14 @@ const ProblemDetail = () => {
               {executing ? 'Running Tests...' : 'Run Tests'}
             </button>
             
+            <button
+              onClick={handleGenerateStressTests}
+              disabled={stressing}
+              className="w-full bg-gray-200 hover:bg-gray-300 text-gray-800 py-2 rounded font-medium disabled:opacity-50"
+            >
+              {stressing ? 'Generating Stress Tests...' : 'Generate Stress Tests'}
+            </button>
+            
             <button
               onClick={handleSubmit}
               disabled={submitting || !testResults?.all_passed}